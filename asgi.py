@@ -0,0 +1,376 @@
+"""ASGI 진입점 - 채팅 스트리밍을 스레드 대신 코루틴으로 처리
+
+실행: uvicorn asgi:app --host 0.0.0.0 --port 5000  (또는 python asgi.py)
+
+POST /api/chat은 비동기 Ollama 클라이언트(httpx)로 스트리밍하고 (끊긴 SSE 스트림 이어 받기도 코루틴으로 처리),
+나머지 라우트는 기존 Flask 앱을 스레드 풀(a2wsgi)에서 실행한다.
+"""
+import asyncio
+import itertools
+import json
+import re
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from config import Config
+from main import create_app
+from routes.api import (
+    prepare_chat, finish_reply, replay_cached, enqueue_chat, queued_frame, QUEUE_TIMEOUT_FRAME, ollama,
+    open_stream, cancelled_frame, wants_event_stream, STREAM_HEADERS
+)
+from utils.active_streams import active_streams
+from utils.stream_buffer import aiter_events, parse_last_event_id, sse_event
+from utils.chat_stream import ChatStreamProcessor, encode_frame
+from utils.instrumentation import metrics, HTTP_REQUEST_DURATION
+from utils.scheduler import scheduler
+from utils.user_cache import user_cache
+
+flask_app = create_app()
+wsgi_app = WSGIMiddleware(flask_app, workers=Config.ASGI_WSGI_WORKERS)
+RESUME_PATH = re.compile(r'/api/chat/([0-9a-f]{32})/events')
+_producers = set()  # 실행 중인 생성 태스크 (가비지 컬렉션 방지)
+
+
+def _header(scope, name):
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def _stream_headers(content_type, stream=None):
+    headers = [(b'content-type', content_type)]
+    headers += [(key.lower().encode('ascii'), value.encode('ascii')) for key, value in STREAM_HEADERS.items()]
+    if stream is not None:
+        headers.append((b'x-stream-id', stream.id.encode('ascii')))
+    return headers
+
+
+def _session_user_id(scope):
+    """Flask 세션 쿠키에서 user_id 추출 (서명이 잘못되면 None)"""
+    cookie_header = b'; '.join(
+        value for name, value in scope['headers'] if name == b'cookie'
+    ).decode('latin-1')
+    cookie = SimpleCookie()
+    try:
+        cookie.load(cookie_header)
+    except Exception:
+        return None
+
+    morsel = cookie.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if morsel is None:
+        return None
+
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+    try:
+        data = serializer.loads(morsel.value, max_age=max_age)
+    except BadSignature:
+        return None
+    return data.get('user_id')
+
+
+async def _read_body(receive):
+    """요청 본문 읽기 (중간에 연결이 끊기면 None)"""
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def _send_json(send, payload, status):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii'))
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def wait_for_turn(ticket):
+    """routes.api.wait_for_turn의 비동기 버전"""
+    deadline = time.monotonic() + Config.SCHEDULER_QUEUE_TIMEOUT
+    last_position = None
+    while not ticket.granted:
+        position = scheduler.position(ticket)
+        if position and position != last_position:
+            last_position = position
+            yield queued_frame(position)
+        if await ticket.wait_async(Config.SCHEDULER_POSITION_INTERVAL):
+            return
+        if time.monotonic() >= deadline:
+            yield encode_frame(QUEUE_TIMEOUT_FRAME)
+            return
+
+
+async def generate(chat_request, ticket):
+    """스트리밍 응답 생성 (비동기, 차례가 올 때까지 대기 순서 전송)"""
+    if chat_request['cached']:
+        for frame in replay_cached(chat_request):
+            yield frame
+        return
+
+    try:
+        async for frame in wait_for_turn(ticket):
+            yield frame
+        if ticket.granted:
+            async for frame in stream_reply(chat_request):
+                yield frame
+    finally:
+        scheduler.release(ticket)
+
+
+async def stream_reply(chat_request):
+    model = chat_request['model']
+    result = await ollama.achat(model, chat_request['messages'], stream=True, options=chat_request['options'])
+
+    if not result.get('success'):
+        yield encode_frame({"success": False, "message": result.get('message', '알 수 없는 에러')})
+        return
+
+    response = result.get('response')
+    if response is None:
+        yield encode_frame({"success": False, "message": "응답이 없습니다"})
+        return
+
+    # Ollama 스트리밍 응답을 클라이언트에 전달
+    processor = ChatStreamProcessor(model, chat_request['conversation_id'])
+    chat_request['processor'] = processor
+    try:
+        async for line in response.aiter_lines():
+            frame = processor.process_line(line)
+            if frame:
+                yield encode_frame(frame)
+        # done 없이 끝난 경우 남은 토큰 전송
+        frame = processor.flush_pending()
+        if frame:
+            yield encode_frame(frame)
+    except Exception as e:
+        yield encode_frame({"success": False, "message": str(e)})
+    finally:
+        # 정상 종료든 취소/클라이언트 연결 끊김(태스크 취소)이든 응답 저장
+        stream = chat_request.get('stream')
+        processor.cancelled = stream is not None and stream.cancelled and not processor.done
+        await response.aclose()
+        finish_reply(chat_request, processor)
+
+    yield encode_frame(processor.final_frame())
+
+
+async def _wait_disconnect(receive):
+    """요청 본문을 다 읽은 뒤 클라이언트 연결이 끊길 때(http.disconnect)까지 대기"""
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _watch_disconnect(receive, stream):
+    """클라이언트 연결이 끊기면 스트림 취소"""
+    await _wait_disconnect(receive)
+    stream.cancel('disconnect')
+
+
+async def _produce(chat_request, ticket, stream):
+    """생성 태스크 - 프레임을 스트림 버퍼에 쌓음 (연결과 무관하게 실행, 취소되면 최종 프레임을 넣고 끝)"""
+    frames = generate(chat_request, ticket)
+    try:
+        async for frame in frames:
+            stream.buffer.append(frame)
+    except asyncio.CancelledError:
+        if not stream.cancelled:
+            raise
+        await frames.aclose()
+        stream.buffer.append(cancelled_frame(chat_request))
+    finally:
+        await frames.aclose()
+        scheduler.release(ticket)
+        active_streams.close(stream)
+        stream.buffer.close()
+
+
+def start_producer(chat_request, ticket, stream):
+    task = asyncio.ensure_future(_produce(chat_request, ticket, stream))
+    _producers.add(task)
+    task.add_done_callback(_producers.discard)
+    loop = asyncio.get_running_loop()
+    stream.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+
+
+async def send_events(receive, send, stream, after, headers):
+    """응답을 시작하고 버퍼의 프레임을 SSE로 전송 (연결이 끊기면 전송만 멈추고 생성은 계속)
+
+    읽는 연결은 응답을 시작하기 전에 등록해서 첫 프레임 전에 끊겨도 재연결 대기 시간이 적용되게 한다.
+    """
+    stream.buffer.attach()
+    events = aiter_events(stream.buffer, after, Config.STREAM_KEEPALIVE_SECONDS)
+
+    async def pump():
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+        async for text in events:
+            await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    sender = asyncio.ensure_future(pump())
+    watcher = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        await asyncio.wait((sender, watcher), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        sender.cancel()
+        try:
+            await sender
+        except (asyncio.CancelledError, Exception):
+            pass
+        await events.aclose()
+        stream.buffer.detach()
+
+
+async def chat(scope, receive, send):
+    """채팅 (스트리밍) - routes.api.chat의 비동기 버전"""
+    user_id = _session_user_id(scope)
+    if not user_id:
+        await _send_json(send, {"success": False, "message": "로그인이 필요합니다"}, 401)
+        return
+
+    body = await _read_body(receive)
+    if body is None:
+        return
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        await _send_json(send, {"success": False, "message": "잘못된 요청입니다"}, 400)
+        return
+
+    # DB 작업(사용자 확인, 사용자 메시지 저장, 컨텍스트 조립)은 스레드에서 실행
+    def _prepare():
+        with flask_app.app_context():
+            user = user_cache.get(user_id)
+            if not user or not user['is_approved']:
+                return None, ({"success": False, "message": "로그인이 필요합니다"}, 401)
+            return prepare_chat(user_id, data)
+
+    chat_request, error = await asyncio.to_thread(_prepare)
+    if error:
+        payload, status = error
+        await _send_json(send, payload, status)
+        return
+
+    ticket = None
+    if not chat_request['cached']:
+        ticket, error = enqueue_chat(chat_request)
+        if error:
+            payload, status = error
+            await _send_json(send, payload, status)
+            return
+
+    resumable = wants_event_stream(_header(scope, b'accept'))
+    if resumable and ticket:
+        # 생성은 별도 태스크에서 버퍼로, 응답은 버퍼에서 읽음 (연결이 끊겨도 생성은 계속)
+        stream = open_stream(chat_request, ticket, resumable=True)
+        start_producer(chat_request, ticket, stream)
+        await send_events(receive, send, stream, 0, _stream_headers(b'text/event-stream', stream))
+        return
+
+    stream = open_stream(chat_request, ticket) if ticket else None
+    content_type = b'text/event-stream' if resumable else b'application/x-ndjson'
+    await send({'type': 'http.response.start', 'status': 200, 'headers': _stream_headers(content_type, stream)})
+
+    frames = generate(chat_request, ticket)
+    seq = itertools.count(1)
+
+    async def pump():
+        async for frame in frames:
+            if resumable:  # 캐시된 응답 (재생이라 이어 받기 없음)
+                frame = sse_event(next(seq), frame)
+            await send({'type': 'http.response.body', 'body': frame.encode('utf-8'), 'more_body': True})
+
+    # 취소 요청(다른 스레드)이나 연결 끊김이 오면 전송 태스크를 취소 - 대기 중이든 Ollama 응답을
+    # 기다리는 중이든 바로 깨어나고 generate()의 정리 코드가 Ollama 연결을 닫는다
+    task = asyncio.ensure_future(pump())
+    watcher = None
+    if stream is not None:
+        loop = asyncio.get_running_loop()
+        stream.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+        watcher = asyncio.ensure_future(_watch_disconnect(receive, stream))
+    try:
+        try:
+            await task
+        except asyncio.CancelledError:
+            if stream is None or not stream.cancelled:
+                raise  # 서버 종료 등 이 요청 밖에서 온 취소
+            await frames.aclose()
+            if stream.reason == 'cancel':
+                await send({'type': 'http.response.body', 'body': cancelled_frame(chat_request).encode('utf-8'),
+                            'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        # 전송 실패(연결 끊김) 시에도 generate()의 정리 코드가 바로 실행되도록
+        if watcher is not None:
+            watcher.cancel()
+        await frames.aclose()
+        if ticket:
+            scheduler.release(ticket)
+        if stream is not None:
+            active_streams.close(stream)
+
+
+async def resume(scope, receive, send, stream_id):
+    """끊긴 스트림 이어 받기 - routes.api.resume_chat의 비동기 버전"""
+    user_id = _session_user_id(scope)
+    stream = active_streams.get(stream_id, user_id) if user_id else None
+    if stream is None or stream.buffer is None:
+        await _send_json(send, {"success": False, "message": "이어 받을 스트림을 찾을 수 없습니다"}, 404)
+        return
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    after = parse_last_event_id(_header(scope, b'last-event-id') or (query.get('last_event_id') or [None])[0])
+    await send_events(receive, send, stream, after, _stream_headers(b'text/event-stream'))
+
+
+def _timed_send(send):
+    """응답 헤더를 보낼 때 처리 시간 기록 (Flask after_request 훅과 같은 기준)"""
+    start = time.perf_counter()
+
+    async def timed(message):
+        if message['type'] == 'http.response.start':
+            HTTP_REQUEST_DURATION.labels('POST', '/api/chat', message['status']).observe(
+                time.perf_counter() - start
+            )
+        await send(message)
+    return timed
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await ollama.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI 앱"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] == '/api/chat':
+        await chat(scope, receive, _timed_send(send) if metrics.enabled else send)
+    elif scope['type'] == 'http' and scope['method'] == 'GET' and RESUME_PATH.fullmatch(scope['path']):
+        await resume(scope, receive, send, RESUME_PATH.fullmatch(scope['path']).group(1))
+    else:
+        await wsgi_app(scope, receive, send)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=Config.SERVER_PORT)
@@ -0,0 +1 @@
+"""성능 벤치마크 스크립트 (저장소 루트에서 python -m benchmarks.<name> 으로 실행)"""
@@ -0,0 +1,131 @@
+"""응답 성능 분석 쿼리 벤치마크: Message.metrics JSON 스캔 vs 집계 테이블
+
+python -m benchmarks.analytics_query --messages 100000 --days 30
+
+임시 DB에 메트릭이 있는 assistant 메시지를 채우고 rebuild-metrics로 집계 테이블을 만든 뒤,
+모델별 p50/p95/p99를 (1) 메시지 JSON을 전부 읽어 정확히 계산할 때와 (2) 집계 테이블의
+히스토그램으로 계산할 때의 지연 시간과 오차를 비교한다.
+"""
+import argparse
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+MODELS = {'llama3:8b': (42.0, 0.25), 'mistral:7b': (48.0, 0.2), 'qwen2:14b': (21.0, 0.3), 'llava:13b': (18.0, 0.35)}
+
+
+def fake_metrics(rng, model):
+    median, spread = MODELS[model]
+    tokens_per_second = rng.lognormvariate(math.log(median), spread)
+    tokens = rng.randint(50, 800)
+    return {
+        'tokens_per_second': round(tokens_per_second, 2),
+        'generation_time_sec': round(tokens / tokens_per_second, 2),
+        'prompt_processing_time_sec': round(rng.lognormvariate(math.log(0.4), 0.6), 2),
+        'load_time_sec': round(rng.choice([0.01] * 9 + [rng.uniform(2, 8)]), 2)
+    }
+
+
+def exact_percentiles(values):
+    ordered = sorted(values)
+    return {f'p{p}': ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] for p in (50, 95, 99)}
+
+
+def scan_json(db, since):
+    """집계 테이블 없이 계산: 기간 내 메시지의 metrics JSON을 모두 읽어 모델별로 정렬"""
+    from models import Message
+    values = {}
+    rows = db.session.query(Message.model, Message.metrics).filter(
+        Message.role == 'assistant',
+        Message.metrics.isnot(None),
+        Message.created_at >= since
+    ).yield_per(5000)
+    for model, metrics in rows:
+        value = metrics.get('tokens_per_second')
+        if value is not None:
+            values.setdefault(model, []).append(value)
+    return {model: exact_percentiles(model_values) for model, model_values in values.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=100_000, help='assistant 메시지 수')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--days', type=int, default=30, help='메시지가 분포하는 기간')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from benchmarks.common import prepare_environment
+    prepare_environment('http://127.0.0.1:9')
+
+    from main import create_app
+    from models import db
+    from utils.metrics_rollup import query_analytics, rebuild_rollups
+    app = create_app()
+    rng = random.Random(7)
+    now = datetime.utcnow()
+
+    with app.app_context():
+        conn = db.engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT INTO users (id, username, password_hash, is_admin, is_approved) VALUES (?, ?, '-', 0, 1)",
+                [(u, f'user{u}') for u in range(1, args.users + 1)]
+            )
+            cursor.executemany(
+                "INSERT INTO conversations (id, user_id, title, is_deleted, created_at, updated_at) "
+                "VALUES (?, ?, 'bench', 0, datetime('now'), datetime('now'))",
+                [(u, u) for u in range(1, args.users + 1)]
+            )
+            batch = []
+            for i in range(args.messages):
+                model = rng.choice(list(MODELS))
+                created_at = now - timedelta(seconds=rng.uniform(0, args.days * 86400))
+                batch.append((rng.randint(1, args.users), model, json.dumps(fake_metrics(rng, model)),
+                              created_at.isoformat(sep=' ')))
+                if len(batch) == 10000 or i == args.messages - 1:
+                    cursor.executemany(
+                        "INSERT INTO messages (conversation_id, role, content, model, metrics, created_at) "
+                        "VALUES (?, 'assistant', 'reply', ?, ?, ?)",
+                        batch
+                    )
+                    batch = []
+            conn.commit()
+        finally:
+            conn.close()
+
+        start = time.perf_counter()
+        rebuild_rollups()
+        rebuild = time.perf_counter() - start
+        rollup_rows = db.session.execute(db.text('SELECT count(*) FROM metric_rollups')).scalar()
+        print(f'{args.messages:,} messages over {args.days} days, {args.users} users; '
+              f'rebuild-metrics {rebuild:.1f}s -> {rollup_rows:,} rollup rows')
+
+        print(f'{"window":<8} {"json scan":>10} {"rollup":>9}  p95 tok/s (exact vs rollup)')
+        for window in (1, 7, args.days):
+            since = now - timedelta(days=window)
+            timings = {'scan': [], 'rollup': []}
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                exact = scan_json(db, since)
+                timings['scan'].append(time.perf_counter() - start)
+                db.session.expunge_all()
+
+                start = time.perf_counter()
+                rows = query_analytics('model', since, metrics=['tokens_per_second'])
+                timings['rollup'].append(time.perf_counter() - start)
+                db.session.expunge_all()
+
+            errors = []
+            for row in rows:
+                approx = row['metrics']['tokens_per_second']['p95']
+                errors.append(f"{row['key']} {exact[row['key']]['p95']:.1f}/{approx:.1f}")
+            print(f'{str(window) + "d":<8} {min(timings["scan"]) * 1000:>8.1f}ms '
+                  f'{min(timings["rollup"]) * 1000:>7.1f}ms  {", ".join(sorted(errors))}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""대화 보관/정리(maintenance) 벤치마크
+
+python -m benchmarks.archive_maintenance --conversations 6000 --per-conversation 30
+
+임시 DB에 활성/오래된/삭제된 대화를 채우고 maintenance 명령 전후의
+DB 파일 크기, messages 행 수, 대화 열기/검색/목록 지연 시간을 비교한다.
+보관된 대화를 처음 열 때(복원)와 다시 열 때의 지연 시간도 함께 잰다.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+WORDS = (
+    '서버 설정 배포 모델 데이터 파이썬 함수 오류 로그 메모리 네트워크 컨테이너 '
+    'docker nginx python flask sqlite index query cache thread async stream token '
+    'kubernetes gpu cuda ollama llama prompt context image vision embedding'
+).split()
+VOCABULARY = WORDS + [f'{WORDS[i % len(WORDS)]}{i}' for i in range(5000)]
+
+
+def sentence(rng, length):
+    return ' '.join(rng.choice(VOCABULARY) if rng.random() < 0.3 else rng.choice(WORDS) for _ in range(length))
+
+
+def measure(client, ids, path):
+    latencies = []
+    for conversation_id in ids:
+        start = time.perf_counter()
+        response = client.get(path.format(id=conversation_id))
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.data[:200]
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--conversations', type=int, default=6000)
+    parser.add_argument('--per-conversation', type=int, default=30)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+
+    from benchmarks.common import fmt, percentile, prepare_environment
+    prepare_environment('http://127.0.0.1:9', ARCHIVE_IDLE_DAYS=90, ARCHIVE_PURGE_DAYS=30)
+
+    from main import create_app
+    from models import db
+    from utils.archive import database_size, default_codec, vacuum_database
+    app = create_app()
+    rng = random.Random(11)
+    now = datetime.utcnow()
+
+    # 활성 25%, 90일 넘게 쓰지 않음 60%, 삭제 15% (삭제 시점은 0~60일 전 - 절반은 정리 대상)
+    kinds = {}
+    with app.app_context():
+        conn = db.engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT INTO users (id, username, password_hash, is_admin, is_approved, created_at) "
+                "VALUES (?, ?, '-', 0, 1, datetime('now'))",
+                [(u, f'user{u}') for u in range(1, args.users + 1)]
+            )
+            conversations = []
+            for c in range(1, args.conversations + 1):
+                roll = rng.random()
+                if roll < 0.25:
+                    kinds[c], updated = 'active', now - timedelta(days=rng.uniform(0, 30))
+                elif roll < 0.85:
+                    kinds[c], updated = 'idle', now - timedelta(days=rng.uniform(91, 400))
+                else:
+                    kinds[c], updated = 'deleted', now - timedelta(days=rng.uniform(0, 60))
+                conversations.append((c, c % args.users + 1, sentence(rng, 4), kinds[c] == 'deleted',
+                                      updated.isoformat(sep=' ')))
+            cursor.executemany(
+                "INSERT INTO conversations (id, user_id, title, is_deleted, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(c, u, title, deleted, updated, updated) for c, u, title, deleted, updated in conversations]
+            )
+            batch = []
+            for c, _, _, _, updated in conversations:
+                for i in range(args.per_conversation):
+                    role = 'user' if i % 2 == 0 else 'assistant'
+                    batch.append((c, role, sentence(rng, 20 if role == 'user' else 120), updated))
+                if len(batch) >= 10000:
+                    cursor.executemany(
+                        "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)", batch
+                    )
+                    batch = []
+            if batch:
+                cursor.executemany(
+                    "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)", batch
+                )
+            conn.commit()
+        finally:
+            conn.close()
+        vacuum_database()  # 같은 조건에서 비교 (빈 페이지 없음, WAL 체크포인트)
+
+    def stats(label):
+        with app.app_context():
+            messages = db.session.execute(db.text('SELECT count(*) FROM messages')).scalar()
+            size = database_size()
+        client = app.test_client()
+        active = [c for c, kind in kinds.items() if kind == 'active']
+        sample = rng.sample(active, min(args.samples, len(active)))
+        measure(client_for(client, sample[0]), sample[:1], '/api/conversations/{id}')  # 워밍업
+        opened = []
+        listed = []
+        searched = []
+        for conversation_id in sample:
+            client = client_for(client, conversation_id)
+            opened += measure(client, [conversation_id], '/api/conversations/{id}')
+            listed += measure(client, [conversation_id], '/api/conversations')
+            start = time.perf_counter()
+            client.get(f'/api/search?q={rng.choice(VOCABULARY[len(WORDS):])}')
+            searched.append(time.perf_counter() - start)
+        print(f'{label:<7} {size / 1e6:8.1f} MB {messages:>9,} msgs  '
+              f'open p50 {fmt(percentile(opened, 50))}  list p50 {fmt(percentile(listed, 50))}  '
+              f'search p50 {fmt(percentile(searched, 50))} p95 {fmt(percentile(searched, 95))}')
+
+    def client_for(client, conversation_id):
+        with client.session_transaction() as sess:
+            sess['user_id'] = conversation_id % args.users + 1
+        return client
+
+    print(f'{args.conversations:,} conversations x {args.per_conversation} messages, {args.users} users, '
+          f'codec {default_codec()}')
+    stats('before')
+
+    start = time.perf_counter()
+    result = app.test_cli_runner().invoke(args=['maintenance'])
+    elapsed = time.perf_counter() - start
+    if result.exit_code != 0:
+        raise result.exception
+    print(f'maintenance {elapsed:.1f}s')
+    for line in result.output.strip().splitlines():
+        print(f'  {line}')
+    stats('after')
+
+    # 보관된 대화 열기: 처음(복원) vs 다시 열기
+    client = app.test_client()
+    idle = rng.sample([c for c, kind in kinds.items() if kind == 'idle'], args.samples)
+    first, again = [], []
+    for conversation_id in idle:
+        client = client_for(client, conversation_id)
+        first += measure(client, [conversation_id], '/api/conversations/{id}')
+        again += measure(client, [conversation_id], '/api/conversations/{id}')
+    print(f'archived open: first (restore) p50 {fmt(percentile(first, 50))} p95 {fmt(percentile(first, 95))}, '
+          f'again p50 {fmt(percentile(again, 50))}')
+
+
+if __name__ == '__main__':
+    main()
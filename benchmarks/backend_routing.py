@@ -0,0 +1,125 @@
+"""여러 Ollama 서버 분배 벤치마크
+
+python -m benchmarks.backend_routing --clients 16 --requests 4
+
+속도가 다른 가짜 Ollama 두 대(fast, slow)와 꺼져 있는 주소 하나를 OLLAMA_API_URL에 넣고
+여러 클라이언트가 채팅을 반복할 때 서버별 처리 건수, 실패 없이 넘겨졌는지(failover),
+전체 처리 시간을 fast 한 대만 쓸 때와 비교한다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+async def client_loop(client, conversation_id, requests, results):
+    for _ in range(requests):
+        start = time.perf_counter()
+        ttft = None
+        completed = False
+        async with client.stream('POST', '/api/chat', json={
+            'model': 'fake-model',
+            'conversation_id': conversation_id,
+            'user_message': {'content': 'benchmark'}
+        }) as response:
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                frame = json.loads(line)
+                if frame.get('chunk') and ttft is None:
+                    ttft = time.perf_counter() - start
+                if frame.get('final'):
+                    completed = True
+        if completed:
+            results['ttft'].append(ttft)
+            results['latency'].append(time.perf_counter() - start)
+        else:
+            results['errors'] += 1
+
+
+async def run_clients(base_url, clients, requests):
+    import httpx
+    from benchmarks.common import login
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=600, limits=limits) as client:
+        await login(client)
+        conversation_ids = []
+        for i in range(clients):
+            response = await client.post('/api/conversations', json={'title': f'bench {i}'})
+            conversation_ids.append(response.json()['conversation']['id'])
+
+        results = {'ttft': [], 'latency': [], 'errors': 0}
+        start = time.perf_counter()
+        await asyncio.gather(*[client_loop(client, cid, requests, results) for cid in conversation_ids])
+        results['wall'] = time.perf_counter() - start
+        results['backends'] = (await client.get('/api/backends')).json()['backends']
+    return results
+
+
+def run_child(ollama_urls, clients, requests):
+    from benchmarks.common import percentile, prepare_environment, start_wsgi
+    # 스케줄러가 아니라 서버 분배만 보기 위해 스케줄러는 끔
+    prepare_environment(ollama_urls, SCHEDULER_MAX_CONCURRENT=0)
+
+    from main import create_app
+    app = create_app()
+    server, port = start_wsgi(app, clients + 8)
+    results = asyncio.run(run_clients(f'http://127.0.0.1:{port}', clients, requests))
+    server.shutdown()
+    print(json.dumps({
+        'completed': len(results['latency']),
+        'errors': results['errors'],
+        'wall': results['wall'],
+        'ttft_p95': percentile([t for t in results['ttft'] if t is not None], 95),
+        'latency_p95': percentile(results['latency'], 95),
+        'backends': results['backends']
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=16, help='동시 클라이언트 수')
+    parser.add_argument('--requests', type=int, default=4, help='클라이언트당 요청 수')
+    parser.add_argument('--child', metavar='OLLAMA_URLS', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.clients, args.requests)
+        return
+
+    from benchmarks.common import fmt, free_port, start_fake_ollama
+    # 가짜 Ollama는 모델별 동시 생성 2개로 제한 (CPU 서버처럼 몰리면 줄을 섬)
+    fast, fast_url = start_fake_ollama('--tokens', '32', '--token-rate', '64', '--parallel', '2', '--max-loaded', '1')
+    slow, slow_url = start_fake_ollama('--tokens', '32', '--token-rate', '16', '--parallel', '2', '--max-loaded', '1')
+    dead_url = f'http://127.0.0.1:{free_port()}'
+    setups = {
+        'single': fast_url,
+        'routed': ','.join([dead_url, slow_url, fast_url]),
+    }
+    try:
+        print(f'{args.clients} clients x {args.requests} requests, fast=64 tok/s, slow=16 tok/s, '
+              f'2 parallel each, plus one unreachable URL')
+        for name, urls in setups.items():
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.backend_routing', '--child', urls,
+                 '--clients', str(args.clients), '--requests', str(args.requests)],
+                env=dict(os.environ), capture_output=True, text=True, check=True
+            ).stdout
+            row = json.loads(output.strip().splitlines()[-1])
+            print(f'{name:<7} wall {fmt(row["wall"])}  ttft p95 {fmt(row["ttft_p95"])}  '
+                  f'latency p95 {fmt(row["latency_p95"])}  completed {row["completed"]}  errors {row["errors"]}')
+            labels = {fast_url: 'fast', slow_url: 'slow', dead_url: 'dead'}
+            for backend in row['backends']:
+                print(f'          {labels.get(backend["url"], backend["url"]):<5} '
+                      f'requests {backend["requests"]:>4}  failures {backend["failures"]:>3}  '
+                      f'healthy {backend["healthy"]!s:<5}  tok/s {backend["tokens_per_second"]}')
+    finally:
+        fast.terminate()
+        slow.terminate()
+
+
+if __name__ == '__main__':
+    main()
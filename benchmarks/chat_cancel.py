@@ -0,0 +1,184 @@
+"""채팅 응답 취소 검증: 취소 요청/연결 끊김 후 Ollama 연결이 얼마나 빨리 닫히는지
+
+python -m benchmarks.chat_cancel --runs 5
+
+느린 가짜 Ollama(기본 10 tok/s, 응답 하나에 60초)로 응답을 받는 도중
+(1) POST /api/chat/<stream_id>/cancel, (2) 클라이언트 연결 끊기를 WSGI/ASGI 서버 각각에서 실행하고
+가짜 Ollama가 연결 끊김을 본 시각까지의 지연, 취소 후 최종 프레임까지의 지연,
+저장된 부분 응답(cancelled 표시)을 확인한다. 스케줄러 동시 실행 수를 1로 두고
+대기 중이던 다음 요청이 취소 후 얼마 만에 첫 토큰을 받는지도 잰다.
+지연이 --limit초를 넘거나 부분 응답이 저장되지 않으면 종료 코드 1로 끝난다.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import (
+    fmt, login, percentile, prepare_environment, start_fake_ollama, start_uvicorn, start_wsgi
+)
+
+MODEL = 'fake-model'
+
+
+async def next_frame(lines):
+    async for line in lines:
+        if line:
+            return json.loads(line)
+    return None
+
+
+async def read_chunks(lines, count):
+    """chunk 프레임을 count개 받을 때까지 읽음"""
+    received = 0
+    while received < count:
+        frame = await next_frame(lines)
+        if frame is None:
+            raise RuntimeError('응답이 예상보다 일찍 끝남')
+        if frame.get('chunk'):
+            received += 1
+
+
+async def upstream_closed_at(fake, previous, timeout=10.0):
+    """가짜 Ollama의 연결 끊김 수가 previous보다 커질 때까지 기다려 끊긴 시각 반환"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = (await fake.get('/bench/stats')).json()
+        if stats['disconnects'] > previous:
+            return stats['last_disconnect_at']
+        await asyncio.sleep(0.01)
+    return None
+
+
+async def saved_reply(client, conversation_id, timeout=5.0):
+    """저장된 마지막 AI 응답 (쓰기 지연 큐 커밋을 기다림)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        messages = (await client.get(f'/api/conversations/{conversation_id}')).json()['conversation']['messages']
+        if messages and messages[-1]['role'] == 'assistant':
+            return messages[-1]
+        await asyncio.sleep(0.05)
+    return None
+
+
+async def cancel_once(client, fake, how, after_chunks):
+    conversation_id = (await client.post('/api/conversations', json={'title': how})).json()['conversation']['id']
+    previous = (await fake.get('/bench/stats')).json()['disconnects']
+    final_delay = None
+    async with client.stream('POST', '/api/chat', json={
+        'model': MODEL, 'conversation_id': conversation_id, 'user_message': {'content': 'cancel me'}
+    }) as response:
+        stream_id = response.headers['x-stream-id']
+        lines = response.aiter_lines()
+        await read_chunks(lines, after_chunks)
+        start = time.time()
+        if how == 'cancel':
+            result = await client.post(f'/api/chat/{stream_id}/cancel')
+            assert result.status_code == 200, result.text
+            while True:
+                frame = await next_frame(lines)
+                if frame is None or frame.get('final'):
+                    break
+            assert frame and frame.get('cancelled'), frame
+            final_delay = time.time() - start
+    # how == 'disconnect': 응답 블록을 나오면서 연결을 닫음
+    closed_at = await upstream_closed_at(fake, previous)
+    reply = await saved_reply(client, conversation_id)
+    return {
+        'upstream': None if closed_at is None else closed_at - start,
+        'final': final_delay,
+        'saved': bool(reply and reply['cancelled'] and reply['content'])
+    }
+
+
+async def queued_handoff(client, after_chunks):
+    """실행 중인 요청을 취소했을 때 대기 중이던 요청이 첫 토큰을 받기까지 걸린 시간"""
+    ids = [(await client.post('/api/conversations', json={'title': f'queue {i}'})).json()['conversation']['id']
+           for i in range(2)]
+    async with client.stream('POST', '/api/chat', json={
+        'model': MODEL, 'conversation_id': ids[0], 'user_message': {'content': 'first'}
+    }) as first:
+        first_lines = first.aiter_lines()
+        await read_chunks(first_lines, after_chunks)
+        async with client.stream('POST', '/api/chat', json={
+            'model': MODEL, 'conversation_id': ids[1], 'user_message': {'content': 'second'}
+        }) as second:
+            second_lines = second.aiter_lines()
+            frame = await next_frame(second_lines)
+            assert frame and frame.get('queued'), frame
+            start = time.time()
+            await client.post(f'/api/chat/{first.headers["x-stream-id"]}/cancel')
+            await read_chunks(second_lines, 1)
+            handoff = time.time() - start
+            await client.post(f'/api/chat/{second.headers["x-stream-id"]}/cancel')
+    return handoff
+
+
+async def run_mode(base_url, fake_url, runs, after_chunks):
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client, \
+            httpx.AsyncClient(base_url=fake_url, timeout=5) as fake:
+        await login(client)
+        results = {'cancel': [], 'disconnect': []}
+        for _ in range(runs):
+            for how in results:
+                results[how].append(await cancel_once(client, fake, how, after_chunks))
+        handoffs = [await queued_handoff(client, after_chunks) for _ in range(runs)]
+        stats = (await fake.get('/bench/stats')).json()
+    return results, handoffs, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--token-rate', type=float, default=10.0)
+    parser.add_argument('--tokens', type=int, default=600)
+    parser.add_argument('--after-chunks', type=int, default=3, help='취소 전에 받을 chunk 프레임 수')
+    parser.add_argument('--limit', type=float, default=1.0, help='허용하는 Ollama 연결 종료 지연 (초)')
+    args = parser.parse_args()
+
+    fake, ollama_url = start_fake_ollama(
+        '--tokens', str(args.tokens), '--token-rate', str(args.token_rate), '--parallel', '1'
+    )
+    failed = False
+    try:
+        prepare_environment(ollama_url, SCHEDULER_MAX_CONCURRENT=1, SCHEDULER_MAX_PER_MODEL=1,
+                            STREAM_FLUSH_INTERVAL_MS=0)
+        import asgi  # 환경 변수 설정 후 import
+
+        _, wsgi_port = start_wsgi(asgi.flask_app, 8)
+        _, asgi_port = start_uvicorn(asgi.app)
+        remaining = args.tokens / args.token_rate
+        print(f'stream = {args.tokens} tokens @ {args.token_rate} tok/s - without cancellation Ollama keeps '
+              f'generating for ~{remaining:.0f}s after the user leaves')
+        print(f'{"mode":<5} {"trigger":<11} {"upstream p50":>13} {"p95":>8} {"max":>8} '
+              f'{"final p50":>10} {"saved":>6}')
+        for mode, port in (('wsgi', wsgi_port), ('asgi', asgi_port)):
+            results, handoffs, stats = asyncio.run(
+                run_mode(f'http://127.0.0.1:{port}', ollama_url, args.runs, args.after_chunks)
+            )
+            for how, rows in results.items():
+                upstream = [row['upstream'] for row in rows if row['upstream'] is not None]
+                finals = [row['final'] for row in rows if row['final'] is not None]
+                saved = sum(row['saved'] for row in rows)
+                print(f'{mode:<5} {how:<11} {fmt(percentile(upstream, 50)):>13} '
+                      f'{fmt(percentile(upstream, 95)):>8} {fmt(max(upstream, default=None)):>8} '
+                      f'{fmt(percentile(finals, 50)):>10} {saved:>3}/{len(rows)}')
+                if len(upstream) < len(rows) or max(upstream) > args.limit or saved < len(rows):
+                    failed = True
+            print(f'{mode:<5} {"queued":<11} next request first token after cancel: '
+                  f'p50 {fmt(percentile(handoffs, 50))} max {fmt(max(handoffs))}  '
+                  f'(fake Ollama: {stats["disconnects"]} disconnects, {stats["active_streams"]} still streaming)')
+            if max(handoffs) > args.limit + 0.5:
+                failed = True
+    finally:
+        fake.terminate()
+
+    print('FAIL' if failed else 'OK')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""벤치마크 공용 헬퍼
+
+앱 모듈(config, main 등)은 환경 변수를 import 시점에 읽으므로
+prepare_environment()를 먼저 호출한 뒤 import해야 한다.
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_USERNAME = 'bench'
+BENCH_PASSWORD = 'bench-password'
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f'port {port} did not open')
+
+
+def prepare_environment(ollama_url: str, **extra) -> str:
+    """임시 DB와 Ollama 주소를 환경 변수로 설정 (임시 디렉터리 반환)"""
+    tmp = tempfile.mkdtemp(prefix='llm-webui-bench-')
+    os.environ['DATABASE_PATH'] = os.path.join(tmp, 'app.db')
+    os.environ['OLLAMA_API_URL'] = ollama_url
+    for key, value in extra.items():
+        os.environ[key] = str(value)
+    return tmp
+
+
+def start_fake_ollama(*args: str):
+    """가짜 Ollama를 별도 프로세스로 실행 (프로세스, URL 반환)"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.fake_ollama', '--port', str(port), *args]
+    )
+    wait_for_port(port)
+    return process, f'http://127.0.0.1:{port}'
+
+
+def start_uvicorn(app):
+    """ASGI 앱을 백그라운드 스레드에서 실행 (서버, 포트 반환)"""
+    import uvicorn
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    wait_for_port(port)
+    return server, port
+
+
+def start_wsgi(app, threads: int):
+    """스레드 수가 고정된 WSGI 서버 실행 (gunicorn gthread 등 운영 환경의 스레드 제한을 흉내냄)"""
+    from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    class PooledWSGIServer(BaseWSGIServer):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.pool = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    port = free_port()
+    server = PooledWSGIServer('127.0.0.1', port, app, handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    wait_for_port(port)
+    return server, port
+
+
+async def login(client, username: str = BENCH_USERNAME, password: str = BENCH_PASSWORD):
+    """벤치마크 사용자 등록(첫 사용자는 자동 승인) 후 로그인"""
+    await client.post('/api/auth/register', json={'username': username, 'password': password})
+    response = await client.post('/api/auth/login', json={'username': username, 'password': password})
+    response.raise_for_status()
+
+
+def percentile(values, p: float):
+    """p 백분위수 (값이 없으면 None)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def fmt(value, unit='s'):
+    return '-' if value is None else f'{value:.3f}{unit}'
@@ -0,0 +1,113 @@
+"""긴 대화의 프롬프트 처리 시간 벤치마크 (컨텍스트 길이 관리)
+
+python -m benchmarks.context_growth --turns 80
+
+한 대화에서 턴을 계속 이어갈 때 턴마다 Ollama에 보내는 프롬프트 토큰 수와 프롬프트 처리 시간을
+(1) 자르지 않음 (2) 토큰 예산으로 자름 (3) 자르고 앞부분은 요약 세 설정으로 비교한다.
+가짜 Ollama는 프롬프트 토큰에 비례해 처리 시간을 쓰고, 직전 요청과 같은 앞부분은 다시 처리하지 않는다.
+혼자 쓰는 경우(프롬프트 캐시 유지)와 다른 사용자의 요청이 턴 사이에 끼어드는 경우(캐시가 비워짐)를 모두 잰다.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SETUPS = {
+    'full': {'CONTEXT_MAX_TOKENS': 0},
+    'budget': {'CONTEXT_MAX_TOKENS': 4096},
+    'summary': {'CONTEXT_MAX_TOKENS': 4096, 'CONTEXT_SUMMARY_ENABLED': 'true'},
+}
+
+
+def run_child(ollama_url, setup, turns, busy):
+    from benchmarks.common import BENCH_PASSWORD, BENCH_USERNAME, prepare_environment
+    prepare_environment(ollama_url, SCHEDULER_MAX_CONCURRENT=0, **SETUPS[setup])
+
+    import requests
+    from main import create_app
+    from utils.context_window import estimate_tokens
+    from utils.write_behind import write_queue
+    from routes.api import summarizer
+    app = create_app()
+    client = app.test_client()
+    client.post('/api/auth/register', json={'username': BENCH_USERNAME, 'password': BENCH_PASSWORD})
+    client.post('/api/auth/login', json={'username': BENCH_USERNAME, 'password': BENCH_PASSWORD})
+    conversation_id = client.post('/api/conversations', json={'title': 'bench'}).json['conversation']['id']
+
+    # 사용자 메시지 약 200토큰 (영문/한글 섞음)
+    question = ('Explain the trade-offs of this design in detail, 설계의 장단점을 자세히 설명해 주세요. ' * 8).strip()
+    prompt_times = []
+    start = time.perf_counter()
+    for turn in range(turns):
+        if busy:
+            requests.post(f'{ollama_url}/bench/evict')
+        response = client.post('/api/chat', json={
+            'model': 'fake-model',
+            'conversation_id': conversation_id,
+            'user_message': {'content': f'[{turn}] {question}'}
+        })
+        final = json.loads(response.data.decode().splitlines()[-1])
+        prompt_times.append(final.get('metrics', {}).get('prompt_processing_time_sec', 0.0))
+        write_queue.flush()
+    wall = time.perf_counter() - start
+
+    # 마지막 턴에 보낸 프롬프트 토큰 수 (같은 조립 과정을 다시 실행)
+    with app.app_context():
+        from routes.api import prepare_chat
+        from models import User
+        user_id = User.query.filter_by(username=BENCH_USERNAME).first().id
+        request_info, _ = prepare_chat(user_id, {
+            'model': 'fake-model', 'conversation_id': conversation_id, 'user_message': {'content': question}
+        })
+        sent_tokens = sum(estimate_tokens(message) for message in request_info['messages'])
+    print(json.dumps({
+        'prompt_times': prompt_times,
+        'wall': wall,
+        'sent_tokens': sent_tokens,
+        'summaries': summarizer.stats()['completed']
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turns', type=int, default=80)
+    parser.add_argument('--prompt-rate', type=float, default=10000, help='가짜 Ollama 초당 프롬프트 처리 토큰 수')
+    parser.add_argument('--child', nargs=3, metavar=('OLLAMA_URL', 'SETUP', 'BUSY'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.turns, args.child[2] == 'busy')
+        return
+
+    from benchmarks.common import start_fake_ollama
+    print(f'{args.turns} turns, ~200-token questions, 100-token replies, '
+          f'prompt processing {args.prompt_rate:.0f} tok/s with prefix reuse')
+    checkpoints = sorted({t for t in (10, 20, 40, 60, 80, args.turns) if t <= args.turns})
+    print(f'{"setup":<8} ' + ' '.join(f'{"turn " + str(t):>9}' for t in checkpoints)
+          + f' {"total":>8} {"last prompt":>12}')
+    for mode in ('alone', 'busy'):
+        print(f'-- {mode}: ' + ('prompt cache kept between turns' if mode == 'alone'
+                                else 'other users evict the prompt cache between turns'))
+        for setup in SETUPS:
+            # 설정마다 새 가짜 Ollama (프롬프트 캐시 상태를 섞지 않도록)
+            fake, fake_url = start_fake_ollama('--tokens', '100', '--token-rate', '5000', '--latency', '0.01',
+                                               '--prompt-rate', str(args.prompt_rate))
+            try:
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.context_growth', '--child', fake_url, setup, mode,
+                     '--turns', str(args.turns)],
+                    env=dict(os.environ), capture_output=True, text=True, check=True
+                ).stdout
+            finally:
+                fake.terminate()
+            row = json.loads(output.strip().splitlines()[-1])
+            times = row['prompt_times']
+            cells = ' '.join(f'{times[t - 1]:>8.2f}s' for t in checkpoints)
+            note = f' ({row["summaries"]} summaries)' if setup == 'summary' else ''
+            print(f'{setup:<8} {cells} {sum(times):>7.1f}s {row["sent_tokens"]:>7} tok{note}')
+
+
+if __name__ == '__main__':
+    main()
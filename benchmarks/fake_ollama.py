@@ -0,0 +1,326 @@
+"""벤치마크용 가짜 Ollama 서버 (ASGI)
+
+실제 모델 없이 /api/tags, /api/chat(스트리밍), /api/pull(진행 상황 스트리밍), /api/delete를 흉내낸다.
+단독 실행: python -m benchmarks.fake_ollama --port 11434 --token-rate 30
+
+--max-loaded/--parallel을 주면 Ollama 스케줄러처럼 메모리에 올릴 수 있는 모델 수와
+모델별 동시 생성 수를 제한한다. 요청은 도착 순서대로 하나씩 배정되고(앞 요청이 기다리면
+뒤 요청도 기다림), 올라가 있지 않은 모델은 쉬고 있는 모델을 내린 뒤 --switch-cost초 동안 로드한다.
+GET /bench/stats로 모델 전환 횟수와 누적 로드 시간을 확인한다.
+
+--prompt-rate를 주면 프롬프트 처리 시간을 토큰 수(UTF-8 3바이트당 1토큰)에 비례하게 쓴다.
+Ollama처럼 모델별로 직전 요청과 앞부분이 같은 메시지는 다시 처리하지 않는다(프롬프트 캐시).
+POST /bench/evict는 프롬프트 캐시를 비운다 (다른 사용자의 요청이 끼어든 상황).
+
+Ollama처럼 채팅/다운로드 요청 도중 클라이언트 연결이 끊기면 생성(다운로드)을 멈추고 슬롯을 반납한다.
+/bench/stats의 disconnects, last_disconnect_at(time.time()), tokens_generated로 확인한다.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+
+
+class FakeOllama:
+    """토큰 속도/첫 토큰 지연을 설정할 수 있는 가짜 Ollama"""
+
+    def __init__(self, models=('fake-model',), token_rate: float = 50.0,
+                 tokens: int = 64, first_token_latency: float = 0.05,
+                 switch_cost: float = 0.0, max_loaded: int = 0, parallel: int = 0,
+                 pull_seconds: float = 2.0, prompt_rate: float = 0.0):
+        self.models = list(models)
+        self.token_rate = token_rate
+        self.tokens = tokens
+        self.first_token_latency = first_token_latency
+        self.switch_cost = switch_cost
+        self.max_loaded = max_loaded  # 0이면 제한 없음
+        self.parallel = parallel  # 모델별 동시 생성 수, 0이면 제한 없음
+        self.pull_seconds = pull_seconds  # 모델 다운로드에 걸리는 시간
+        self.prompt_rate = prompt_rate  # 초당 프롬프트 처리 토큰 수, 0이면 first_token_latency만
+        self._last_prompt = {}  # model -> 직전 요청 메시지 목록 (프롬프트 캐시)
+        self.active_streams = 0
+        self.total_requests = 0
+        self.switches = 0
+        self.load_seconds = 0.0
+        self.disconnects = 0
+        self.last_disconnect_at = None
+        self.tokens_generated = 0
+        self.chat_requests = 0
+        self._loaded: "OrderedDict[str, float]" = OrderedDict()  # model -> 로드 완료 시각
+        self._running = {}
+        self._pending = deque()
+        self._cond = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        self.total_requests += 1
+        path = scope['path']
+        if path == '/api/tags':
+            await self._send_json(send, {"models": [self._model_info(name) for name in self.models]})
+        elif path == '/bench/stats':
+            await self._send_json(send, {
+                "total_requests": self.total_requests,
+                "switches": self.switches,
+                "load_seconds": round(self.load_seconds, 3),
+                "loaded": list(self._loaded),
+                "active_streams": self.active_streams,
+                "disconnects": self.disconnects,
+                "last_disconnect_at": self.last_disconnect_at,
+                "tokens_generated": self.tokens_generated,
+                "chat_requests": self.chat_requests
+            })
+        elif path == '/bench/evict':
+            # 다른 대화의 요청이 끼어든 것처럼 프롬프트 캐시를 비움
+            self._last_prompt.clear()
+            await self._send_json(send, {"evicted": True})
+        elif path == '/api/chat':
+            self.chat_requests += 1
+            await self._chat(json.loads(body or b'{}'), receive, send)
+        elif path == '/api/pull':
+            await self._until_disconnect(self._pull(json.loads(body or b'{}'), send), receive)
+        elif path == '/api/delete':
+            await self._delete(json.loads(body or b'{}'), send)
+        else:
+            await self._send_json(send, {"error": "not found"}, 404)
+
+    def _model_info(self, name):
+        return {"name": name, "model": name, "size": 1024 * 1024 * 1024}
+
+    async def _send_json(self, send, payload, status=200):
+        data = json.dumps(payload).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json')]
+        })
+        await send({'type': 'http.response.body', 'body': data})
+
+    async def _pull(self, payload, send):
+        """모델 다운로드 흉내 (레이어 2개를 pull_seconds 동안 받는 상태 줄 스트림)"""
+        name = payload.get('name') or payload.get('model')
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'application/x-ndjson')]
+        })
+
+        async def emit(data, more=True):
+            line = (json.dumps(data) + '\n').encode('utf-8')
+            await send({'type': 'http.response.body', 'body': line, 'more_body': more})
+
+        await emit({"status": "pulling manifest"})
+        layers = [("sha256:" + "a" * 64, 400 * 1024 * 1024), ("sha256:" + "b" * 64, 100 * 1024 * 1024)]
+        steps = 10
+        for digest, total in layers:
+            for step in range(steps + 1):
+                await emit({"status": f"pulling {digest[7:19]}", "digest": digest,
+                            "total": total, "completed": total * step // steps})
+                await asyncio.sleep(self.pull_seconds / (len(layers) * steps))
+        for status in ("verifying sha256 digest", "writing manifest"):
+            await emit({"status": status})
+        if name not in self.models:
+            self.models.append(name)
+        await emit({"status": "success"}, more=False)
+
+    async def _delete(self, payload, send):
+        """모델 삭제 (Ollama처럼 없는 모델이면 404)"""
+        name = payload.get('name') or payload.get('model')
+        if name not in self.models:
+            await self._send_json(send, {"error": f"model '{name}' not found"}, 404)
+            return
+        self.models.remove(name)
+        self._loaded.pop(name, None)
+        self._last_prompt.pop(name, None)
+        await self._send_json(send, {})
+
+    async def _chat(self, payload, receive, send):
+        model = payload.get('model')
+        if model not in self.models:
+            await self._send_json(send, {"error": f"model '{model}' not found"}, 404)
+            return
+
+        # 대기/프롬프트 처리/생성 중 어느 단계에서든 연결이 끊기면 바로 중단
+        await self._until_disconnect(self._run_chat(model, payload, send), receive)
+
+    async def _until_disconnect(self, coro, receive):
+        """coro를 실행하다가 클라이언트 연결이 끊기면 바로 중단 (disconnects에 기록)"""
+        task = asyncio.ensure_future(coro)
+        watcher = asyncio.ensure_future(self._wait_disconnect(receive))
+        await asyncio.wait((task, watcher), return_when=asyncio.FIRST_COMPLETED)
+        if task.done():
+            watcher.cancel()
+            task.result()
+            return
+        self.disconnects += 1
+        self.last_disconnect_at = time.time()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _wait_disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def _run_chat(self, model, payload, send):
+        load_duration = await self._acquire(model)
+        try:
+            await self._generate(model, payload, send, load_duration)
+        finally:
+            await self._release(model)
+
+    async def _acquire(self, model):
+        """생성 슬롯 확보 (필요하면 모델 전환), 로드 대기 시간(초) 반환"""
+        if not self.max_loaded and not self.parallel:
+            return 0.0
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        marker = object()
+        async with self._cond:
+            self._pending.append(marker)
+            try:
+                while True:
+                    if self._pending[0] is marker:
+                        ready_at = self._try_admit(model)
+                        if ready_at is not None:
+                            break
+                    await self._cond.wait()
+            finally:
+                self._pending.remove(marker)
+                self._cond.notify_all()
+        load_duration = max(0.0, ready_at - time.monotonic())
+        try:
+            await asyncio.sleep(load_duration)
+        except asyncio.CancelledError:
+            await self._release(model)  # 로드 중 연결 끊김
+            raise
+        return load_duration
+
+    def _try_admit(self, model):
+        now = time.monotonic()
+        if model in self._loaded:
+            if self.parallel and self._running.get(model, 0) >= self.parallel:
+                return None
+        else:
+            if self.max_loaded and len(self._loaded) >= self.max_loaded:
+                idle = [name for name in self._loaded if not self._running.get(name)]
+                if not idle:
+                    return None
+                del self._loaded[idle[0]]
+            self._loaded[model] = now + self.switch_cost
+            self.switches += 1
+            self.load_seconds += self.switch_cost
+        self._loaded.move_to_end(model)
+        self._running[model] = self._running.get(model, 0) + 1
+        return self._loaded[model]
+
+    async def _release(self, model):
+        if not self.max_loaded and not self.parallel:
+            return
+        async with self._cond:
+            self._running[model] -= 1
+            self._cond.notify_all()
+
+    def _prompt_tokens(self, model, messages):
+        """다시 처리해야 하는 프롬프트 토큰 수 (직전 요청과 앞부분이 같은 메시지는 제외)"""
+        previous = self._last_prompt.get(model, [])
+        self._last_prompt[model] = messages
+        shared = 0
+        while shared < min(len(previous), len(messages)) and previous[shared] == messages[shared]:
+            shared += 1
+        return sum(len((message.get('content') or '').encode('utf-8')) // 3 + 4 for message in messages[shared:])
+
+    async def _generate(self, model, payload, send, load_duration):
+        start = time.perf_counter()
+        prompt_tokens = self._prompt_tokens(model, payload.get('messages') or [])
+        delay = self.first_token_latency
+        if self.prompt_rate:
+            delay += prompt_tokens / self.prompt_rate
+        await asyncio.sleep(delay)
+        prompt_eval = time.perf_counter() - start
+
+        if not payload.get('stream', True):
+            content = ' '.join(f'tok{i}' for i in range(self.tokens))
+            await self._send_json(send, {
+                "model": model,
+                "message": {"role": "assistant", "content": content},
+                "done": True
+            })
+            return
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'application/x-ndjson')]
+        })
+        self.active_streams += 1
+        try:
+            eval_start = time.perf_counter()
+            for i in range(self.tokens):
+                line = json.dumps({
+                    "model": model,
+                    "message": {"role": "assistant", "content": f'tok{i} '},
+                    "done": False
+                }) + '\n'
+                await send({'type': 'http.response.body', 'body': line.encode('utf-8'), 'more_body': True})
+                self.tokens_generated += 1
+                await asyncio.sleep(1 / self.token_rate)
+            eval_duration = time.perf_counter() - eval_start
+
+            final = json.dumps({
+                "model": model,
+                "message": {"role": "assistant", "content": ''},
+                "done": True,
+                "eval_count": self.tokens,
+                "eval_duration": int(eval_duration * 1e9),
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": int(prompt_eval * 1e9),
+                "load_duration": int(load_duration * 1e9)
+            }) + '\n'
+            await send({'type': 'http.response.body', 'body': final.encode('utf-8')})
+        finally:
+            self.active_streams -= 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='가짜 Ollama 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--models', default='fake-model', help='쉼표로 구분한 모델 목록')
+    parser.add_argument('--token-rate', type=float, default=50.0, help='초당 토큰 수')
+    parser.add_argument('--tokens', type=int, default=64, help='응답당 토큰 수')
+    parser.add_argument('--latency', type=float, default=0.05, help='첫 토큰 지연 (초)')
+    parser.add_argument('--switch-cost', type=float, default=0.0, help='모델 로드 시간 (초)')
+    parser.add_argument('--max-loaded', type=int, default=0, help='동시에 올릴 수 있는 모델 수 (0: 제한 없음)')
+    parser.add_argument('--parallel', type=int, default=0, help='모델별 동시 생성 수 (0: 제한 없음)')
+    parser.add_argument('--pull-seconds', type=float, default=2.0, help='모델 다운로드 시간 (초)')
+    parser.add_argument('--prompt-rate', type=float, default=0.0, help='초당 프롬프트 처리 토큰 수 (0: 지연만)')
+    args = parser.parse_args()
+
+    import uvicorn
+    app = FakeOllama(
+        models=args.models.split(','),
+        token_rate=args.token_rate,
+        tokens=args.tokens,
+        first_token_latency=args.latency,
+        switch_cost=args.switch_cost,
+        max_loaded=args.max_loaded,
+        parallel=args.parallel,
+        pull_seconds=args.pull_seconds,
+        prompt_rate=args.prompt_rate
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
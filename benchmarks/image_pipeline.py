@@ -0,0 +1,113 @@
+"""업로드 이미지 축소/재인코딩 벤치마크
+
+python -m benchmarks.image_pipeline --images 20 --concurrency 8
+
+화면 캡처(큰 PNG)와 휴대폰 사진(큰 JPEG) 형태의 이미지를 만들어
+(1) 이미지 종류별 원본/처리 후 크기와 처리 시간, (2) 동시 업로드 시 처리 풀의 처리량과
+대기열 초과(503) 건수를 IMAGE_MAX_DIMENSION 설정별로 비교한다. Pillow가 필요하다.
+"""
+import argparse
+import io
+import random
+import threading
+import time
+
+
+def screenshot(rng, width=3840, height=2160):
+    """글자와 창이 많은 화면 캡처 비슷한 PNG"""
+    from PIL import Image, ImageDraw
+    image = Image.new('RGB', (width, height), (245, 246, 248))
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(width - 400), rng.randrange(height - 300)
+        draw.rectangle((x, y, x + rng.randint(300, 1200), y + rng.randint(200, 800)),
+                       fill=tuple(rng.randrange(200, 256) for _ in range(3)), outline=(120, 120, 120))
+    for line in range(height // 24):
+        draw.text((rng.randrange(40, 400), line * 24), 'def handler(request): return jsonify(result) ' * 3,
+                  fill=(30, 30, 30))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def photo(rng, width=4032, height=3024):
+    """노이즈와 그라데이션이 섞인 휴대폰 사진 비슷한 JPEG"""
+    from PIL import Image
+    base = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    noise = Image.effect_noise((width, height), rng.randint(30, 60)).convert('RGB')
+    image = Image.blend(base, noise, 0.4)
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=20, help='종류별 이미지 수')
+    parser.add_argument('--concurrency', type=int, default=8, help='동시 업로드 수')
+    args = parser.parse_args()
+
+    from benchmarks.common import fmt, percentile, prepare_environment
+    prepare_environment('http://127.0.0.1:9')
+    from config import Config
+    from utils.image_pipeline import ImageProcessor, ImageProcessorBusy
+
+    rng = random.Random(5)
+    samples = {
+        'screenshot': [screenshot(rng) for _ in range(min(args.images, 4))],
+        'photo': [photo(rng) for _ in range(min(args.images, 4))],
+    }
+    print(f'workers {Config.IMAGE_WORKERS}, queue limit {Config.IMAGE_QUEUE_LIMIT}, '
+          f'jpeg quality {Config.IMAGE_JPEG_QUALITY}')
+    print(f'{"kind":<11} {"max px":>6} {"original":>10} {"processed":>10} {"ratio":>6} '
+          f'{"p50":>8} {"p95":>8}')
+    for max_dimension in (0, 2048, 1344, 672):
+        processor = ImageProcessor(Config.IMAGE_WORKERS, Config.IMAGE_QUEUE_LIMIT, Config.IMAGE_JPEG_QUALITY)
+        for kind, images in samples.items():
+            latencies = []
+            original = processed = 0
+            for i in range(args.images):
+                data = images[i % len(images)]
+                start = time.perf_counter()
+                output, info = processor.process(data, max_dimension)
+                latencies.append(time.perf_counter() - start)
+                original += info['original_bytes']
+                processed += info['bytes']
+            print(f'{kind:<11} {max_dimension or "-":>6} {original / args.images / 1024:>8.0f}KB '
+                  f'{processed / args.images / 1024:>8.0f}KB {processed / original * 100:>5.0f}% '
+                  f'{fmt(percentile(latencies, 50))} {fmt(percentile(latencies, 95))}')
+
+    # 동시 업로드: 처리 풀 처리량과 대기열 초과
+    processor = ImageProcessor(Config.IMAGE_WORKERS, Config.IMAGE_QUEUE_LIMIT, Config.IMAGE_JPEG_QUALITY)
+    images = samples['screenshot'] + samples['photo']
+    for concurrency in sorted({1, args.concurrency, args.concurrency * 4}):
+        done = 0
+        busy = 0
+        lock = threading.Lock()
+
+        def upload(worker):
+            nonlocal done, busy
+            for i in range(args.images):
+                try:
+                    processor.process(images[(worker + i) % len(images)], Config.IMAGE_MAX_DIMENSION)
+                    result = 'done'
+                except ImageProcessorBusy:
+                    result = 'busy'
+                with lock:
+                    if result == 'done':
+                        done += 1
+                    else:
+                        busy += 1
+
+        threads = [threading.Thread(target=upload, args=(w,)) for w in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        print(f'{concurrency:>3} concurrent uploads: {done / elapsed:6.1f} images/s, {busy} rejected (503)')
+
+
+if __name__ == '__main__':
+    main()
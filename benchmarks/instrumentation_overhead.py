@@ -0,0 +1,129 @@
+"""Prometheus 계측 오버헤드 벤치마크
+
+python -m benchmarks.instrumentation_overhead --clients 16 --seconds 10
+
+METRICS_ENABLED=true/false 두 설정으로 앱을 각각 별도 프로세스에서 띄우고
+(1) 가벼운 요청(GET /api/auth/check)과 (2) 가짜 Ollama 채팅 스트림의 초당 처리 건수를 비교한다.
+히스토그램 observe() 한 번의 비용(단일 스레드, 여러 스레드)도 함께 잰다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+
+async def hammer(client, seconds, request):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        await request(client)
+        count += 1
+    return count
+
+
+async def run_clients(base_url, clients, seconds):
+    import httpx
+    from benchmarks.common import login
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        await login(client)
+        conversation_id = (await client.post('/api/conversations', json={'title': 'bench'})).json()['conversation']['id']
+
+        async def check(c):
+            (await c.get('/api/auth/check')).raise_for_status()
+
+        async def chat(c):
+            response = await c.post('/api/chat', json={
+                'model': 'fake-model',
+                'conversation_id': conversation_id,
+                'user_message': {'content': 'benchmark'}
+            })
+            if '"final":true' not in response.text:
+                raise RuntimeError(response.text[-200:])
+
+        results = {}
+        for name, request in (('check', check), ('chat', chat)):
+            counts = await asyncio.gather(*[hammer(client, seconds, request) for _ in range(clients)])
+            results[name] = sum(counts) / seconds
+        metrics_lines = (await client.get('/metrics')).text.count('\n')
+    results['metrics_lines'] = metrics_lines
+    return results
+
+
+def run_child(ollama_url, enabled, clients, seconds):
+    from benchmarks.common import prepare_environment, start_wsgi
+    prepare_environment(ollama_url, METRICS_ENABLED=enabled, SCHEDULER_MAX_CONCURRENT=0)
+
+    from main import create_app
+    app = create_app()
+    server, port = start_wsgi(app, clients + 4)
+    results = asyncio.run(run_clients(f'http://127.0.0.1:{port}', clients, seconds))
+    server.shutdown()
+    print(json.dumps(results))
+
+
+def observe_cost(iterations, threads):
+    """observe() 한 번의 평균 시간 (ns)"""
+    from benchmarks.common import prepare_environment
+    prepare_environment('http://127.0.0.1:9')
+    from utils.instrumentation import MetricsRegistry
+    histogram = MetricsRegistry().histogram('bench_seconds', 'bench', ('label',)).labels('x')
+
+    def work():
+        for i in range(iterations):
+            histogram.observe((i % 1000) / 1000)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    assert histogram.values()[-1] == iterations * threads
+    return elapsed / (iterations * threads) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=16, help='동시 클라이언트 수')
+    parser.add_argument('--seconds', type=float, default=10, help='요청 종류별 측정 시간')
+    parser.add_argument('--child', nargs=2, metavar=('OLLAMA_URL', 'ENABLED'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.clients, args.seconds)
+        return
+
+    print(f'observe(): {observe_cost(200_000, 1):.0f} ns (1 thread), '
+          f'{observe_cost(50_000, 8):.0f} ns (8 threads)')
+
+    from benchmarks.common import start_fake_ollama
+    fake, fake_url = start_fake_ollama('--tokens', '16', '--token-rate', '2000')
+    try:
+        print(f'{args.clients} clients, {args.seconds:.0f}s per request type')
+        rows = {'false': [], 'true': []}
+        # 순서에 따른 차이(시스템 상태 변화)를 줄이려고 번갈아 두 번씩 실행해 평균
+        for enabled in ('false', 'true', 'true', 'false'):
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.instrumentation_overhead', '--child', fake_url, enabled,
+                 '--clients', str(args.clients), '--seconds', str(args.seconds)],
+                env=dict(os.environ), capture_output=True, text=True, check=True
+            ).stdout
+            rows[enabled].append(json.loads(output.strip().splitlines()[-1]))
+        for name in ('check', 'chat'):
+            off = sum(row[name] for row in rows['false']) / 2
+            on = sum(row[name] for row in rows['true']) / 2
+            print(f'{name:<6} uninstrumented {off:8.1f} req/s  instrumented {on:8.1f} req/s  '
+                  f'({(on - off) / off * 100:+.1f}%)')
+        print(f'/metrics lines after run: {rows["true"][0]["metrics_lines"]}')
+    finally:
+        fake.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""종단 간 부하 테스트: 여러 사용자가 동시에 대화할 때의 기준 성능
+
+python -m benchmarks.load_test --users 16 --turns 5
+python -m benchmarks.load_test --server asgi --json baseline.json
+
+main.create_app()으로 만든 앱(--server asgi면 asgi:app)을 가짜 Ollama에 연결하고
+사용자 --users명이 각자 로그인해서 대화 하나에 --turns번 메시지를 보낸다.
+한 턴은 채팅 스트림(POST /api/chat)을 끝까지 받은 뒤 대화 목록과 대화 내용을 다시 불러오는
+웹 UI의 동작과 같다. 측정 항목:
+  - 채팅 첫 토큰까지 시간(TTFT)과 전체 응답 시간
+  - 클라이언트가 받은 토큰/초 (스트림별, 전체 합계)
+  - 대화 관련 API의 p50/p95/최대 지연 시간
+  - 스케줄러 대기열에서 기다린 채팅 수 (--parallel: SCHEDULER_MAX_CONCURRENT/PER_MODEL, 가짜 Ollama도 같은 값)
+  - DB 파일 크기 증가량과 메시지당 바이트 (체크포인트 전 WAL 크기는 따로 표시)
+--json을 주면 결과를 파일로 저장한다 (성능 변경 전후 비교용 기준값).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.common import (
+    fmt, login, percentile, prepare_environment, start_fake_ollama, start_uvicorn, start_wsgi
+)
+
+MODEL = 'fake-model'
+USER_PASSWORD = 'load-password'
+
+
+def file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def count_messages(path):
+    with sqlite3.connect(f'file:{path}?mode=ro', uri=True) as conn:
+        return conn.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+
+
+async def wait_for_messages(path, expected, timeout=30.0):
+    """쓰기 지연 큐가 메시지를 모두 커밋할 때까지 대기 (커밋된 메시지 수 반환)"""
+    deadline = time.monotonic() + timeout
+    count = count_messages(path)
+    while count < expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+        count = count_messages(path)
+    return count
+
+
+async def timed(results, name, request):
+    start = time.perf_counter()
+    response = await request
+    results['latency'][name].append(time.perf_counter() - start)
+    if response.status_code >= 400:
+        results['errors'][f'{name} {response.status_code}'] += 1
+    return response
+
+
+async def chat_turn(client, conversation_id, text, results):
+    """채팅 스트림 하나를 끝까지 받음"""
+    start = time.perf_counter()
+    ttft = None
+    content = ''
+    final = None
+    queued = False
+    try:
+        async with client.stream('POST', '/api/chat', json={
+            'model': MODEL, 'conversation_id': conversation_id,
+            'user_message': {'content': text}, 'cache': False
+        }) as response:
+            if response.status_code != 200:
+                results['errors'][f'chat {response.status_code}'] += 1
+                return
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                frame = json.loads(line)
+                queued = queued or bool(frame.get('queued'))
+                if frame.get('chunk'):
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    content += frame['chunk']
+                if frame.get('final'):
+                    final = frame
+    except httpx.HTTPError as e:
+        results['errors'][f'chat {type(e).__name__}'] += 1
+        return
+    duration = time.perf_counter() - start
+    if final is None or not final.get('success', True) or ttft is None:
+        results['errors']['chat incomplete'] += 1
+        return
+    tokens = len(content.split())
+    results['ttft'].append(ttft)
+    results['queued'] += queued
+    results['latency']['POST /api/chat'].append(duration)
+    results['tokens'] += tokens
+    if duration > ttft:
+        results['stream_rate'].append(tokens / (duration - ttft))
+
+
+async def simulated_user(base_url, index, args, results):
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        response = await client.post('/api/auth/login', json={
+            'username': f'user{index}', 'password': USER_PASSWORD
+        })
+        response.raise_for_status()
+        await timed(results, 'GET /api/models', client.get('/api/models'))
+        await timed(results, 'GET /api/conversations', client.get('/api/conversations'))
+        response = await timed(results, 'POST /api/conversations',
+                               client.post('/api/conversations', json={'title': f'load {index}'}))
+        conversation_id = response.json()['conversation']['id']
+        for turn in range(args.turns):
+            await chat_turn(client, conversation_id, f'user {index} turn {turn}: hello', results)
+            await timed(results, 'GET /api/conversations', client.get('/api/conversations'))
+            await timed(results, 'GET /api/conversations/<id>',
+                        client.get(f'/api/conversations/{conversation_id}'))
+            await asyncio.sleep(args.think)
+
+
+async def register_users(base_url, users):
+    """관리자(첫 사용자)로 부하 사용자들을 등록하고 승인"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as admin:
+        await login(admin)
+        for index in range(users):
+            response = await admin.post('/api/auth/register', json={
+                'username': f'user{index}', 'password': USER_PASSWORD
+            })
+            response.raise_for_status()
+            user_id = response.json()['user']['id']
+            (await admin.post(f'/api/auth/users/{user_id}/approve')).raise_for_status()
+
+
+async def run_load(base_url, db_path, args):
+    await register_users(base_url, args.users)
+    messages_before = count_messages(db_path)
+    size_before = file_size(db_path)
+    results = {
+        'ttft': [], 'stream_rate': [], 'tokens': 0, 'queued': 0,
+        'latency': defaultdict(list), 'errors': defaultdict(int)
+    }
+    start = time.perf_counter()
+    await asyncio.gather(*(simulated_user(base_url, i, args, results) for i in range(args.users)))
+    wall = time.perf_counter() - start
+    expected = messages_before + 2 * len(results['ttft'])
+    messages_after = await wait_for_messages(db_path, expected)
+    results.update(
+        wall=wall,
+        messages=messages_after - messages_before,
+        db_growth=file_size(db_path) - size_before,
+        wal_size=file_size(db_path + '-wal')
+    )
+    return results
+
+
+def summarize(results, args):
+    latency = {
+        name: {
+            'count': len(values),
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'max': max(values)
+        }
+        for name, values in sorted(results['latency'].items())
+    }
+    return {
+        'users': args.users,
+        'turns': args.turns,
+        'server': args.server,
+        'parallel': args.parallel,
+        'chats': len(results['ttft']),
+        'queued': results['queued'],
+        'ttft_p50': percentile(results['ttft'], 50),
+        'ttft_p95': percentile(results['ttft'], 95),
+        'stream_tokens_per_sec_p50': percentile(results['stream_rate'], 50),
+        'delivered_tokens_per_sec': results['tokens'] / results['wall'],
+        'wall_seconds': results['wall'],
+        'latency': latency,
+        'messages': results['messages'],
+        'db_growth_bytes': results['db_growth'],
+        'wal_bytes': results['wal_size'],
+        'errors': dict(results['errors'])
+    }
+
+
+def report(summary, args):
+    print(f'{summary["server"]}: {summary["users"]} users x {summary["turns"]} turns, '
+          f'{args.tokens} tokens @ {args.token_rate:g} tok/s, first token latency {args.latency:g}s, '
+          f'{args.parallel} parallel')
+    print(f'chats {summary["chats"]} in {summary["wall_seconds"]:.1f}s ({summary["queued"]} queued)   '
+          f'TTFT p50 {fmt(summary["ttft_p50"])} p95 {fmt(summary["ttft_p95"])}   '
+          f'tokens/sec per stream p50 {fmt(summary["stream_tokens_per_sec_p50"], "")}   '
+          f'delivered total {summary["delivered_tokens_per_sec"]:.0f} tok/s')
+    print(f'{"endpoint":<30} {"count":>6} {"p50":>9} {"p95":>9} {"max":>9}')
+    for name, row in summary['latency'].items():
+        print(f'{name:<30} {row["count"]:>6} {fmt(row["p50"]):>9} {fmt(row["p95"]):>9} {fmt(row["max"]):>9}')
+    messages = summary['messages']
+    per_message = summary['db_growth_bytes'] / messages if messages else 0
+    print(f'DB growth {summary["db_growth_bytes"] / 1024:.0f} KiB for {messages} messages '
+          f'({per_message:.0f} bytes/message), WAL {summary["wal_bytes"] / 1024:.0f} KiB not yet checkpointed')
+    if summary['errors']:
+        print(f'errors: {summary["errors"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=16, help='동시 사용자 수')
+    parser.add_argument('--turns', type=int, default=5, help='사용자당 보내는 메시지 수')
+    parser.add_argument('--think', type=float, default=0.2, help='턴 사이 대기 시간 (초)')
+    parser.add_argument('--server', choices=('wsgi', 'asgi'), default='wsgi')
+    parser.add_argument('--parallel', type=int, default=4, help='동시에 생성하는 응답 수 (스케줄러 한도)')
+    parser.add_argument('--threads', type=int, default=64, help='WSGI 서버 스레드 수')
+    parser.add_argument('--tokens', type=int, default=64, help='응답당 토큰 수')
+    parser.add_argument('--token-rate', type=float, default=50.0, help='가짜 Ollama 스트림별 초당 토큰 수')
+    parser.add_argument('--latency', type=float, default=0.05, help='가짜 Ollama 첫 토큰 지연 (초)')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일')
+    args = parser.parse_args()
+
+    fake, ollama_url = start_fake_ollama(
+        '--tokens', str(args.tokens), '--token-rate', str(args.token_rate), '--latency', str(args.latency),
+        '--parallel', str(args.parallel)
+    )
+    try:
+        # 한 IP에서 여러 사용자가 로그인하므로 로그인 시도 제한은 끔
+        prepare_environment(ollama_url, LOGIN_RATE_IP_BURST=0, LOGIN_RATE_USER_BURST=0,
+                            SCHEDULER_MAX_CONCURRENT=args.parallel, SCHEDULER_MAX_PER_MODEL=args.parallel)
+        if args.server == 'asgi':
+            import asgi  # 환경 변수 설정 후 import
+            _, port = start_uvicorn(asgi.app)
+        else:
+            from main import create_app
+            _, port = start_wsgi(create_app(), args.threads)
+        db_path = os.environ['DATABASE_PATH']
+        results = asyncio.run(run_load(f'http://127.0.0.1:{port}', db_path, args))
+    finally:
+        fake.terminate()
+
+    summary = summarize(results, args)
+    report(summary, args)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    sys.exit(1 if summary['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""로그인 폭주 중 채팅 지연 시간 벤치마크
+
+python -m benchmarks.login_storm --attackers 32 --chats 4 --seconds 10
+
+여러 클라이언트가 틀린 비밀번호로 로그인을 반복하는 동안(크리덴셜 스터핑) 채팅 스트림의
+TTFT/완료 시간과 일반 API 지연 시간을 측정한다. 설정별로 별도 프로세스에서 실행한다.
+  inline : 요청 스레드마다 bcrypt 실행 (변경 전과 같은 동시성), 시도 제한 없음
+  pool   : bcrypt 전용 풀 + 대기열 한도, 시도 제한 없음
+  limited: 기본 설정 (전용 풀 + 사용자명/IP별 시도 제한)
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+PROFILES = {
+    'inline': {'PASSWORD_HASH_WORKERS': '64', 'PASSWORD_HASH_QUEUE_LIMIT': '1000', 'PASSWORD_HASH_NICE': '0',
+               'LOGIN_RATE_USER_BURST': '0', 'LOGIN_RATE_IP_BURST': '0'},
+    'pool': {'LOGIN_RATE_USER_BURST': '0', 'LOGIN_RATE_IP_BURST': '0'},
+    'limited': {},
+}
+VICTIMS = 200
+
+
+async def chat_loop(client, conversation_id, stop, results):
+    import httpx
+    while not stop.is_set():
+        start = time.perf_counter()
+        ttft = None
+        try:
+            async with client.stream('POST', '/api/chat', json={
+                'model': 'fake-model',
+                'conversation_id': conversation_id,
+                'user_message': {'content': 'benchmark'}
+            }) as response:
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    frame = json.loads(line)
+                    if frame.get('chunk') and ttft is None:
+                        ttft = time.perf_counter() - start
+                    if frame.get('final'):
+                        results['ttft'].append(ttft)
+                        results['duration'].append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            results['chat_errors'] += 1
+
+
+async def api_loop(client, stop, results):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get('/api/conversations')
+        results['api'].append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+
+
+async def attacker(base_url, index, stop, statuses):
+    import httpx
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        i = index
+        while not stop.is_set():
+            try:
+                response = await client.post('/api/auth/login', json={
+                    'username': f'victim{i % VICTIMS}', 'password': 'wrong-password'
+                })
+                statuses[response.status_code] += 1
+                if response.status_code in (429, 503):
+                    # 잘 만든 클라이언트처럼 Retry-After를 지키지 않고 바로 다시 시도
+                    await asyncio.sleep(0.01)
+            except httpx.HTTPError:
+                statuses['error'] += 1
+            i += 7
+
+
+async def run_phase(base_url, attackers, chats, seconds):
+    import httpx
+    from benchmarks.common import login
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await login(client)
+        conversation_ids = []
+        for i in range(chats):
+            response = await client.post('/api/conversations', json={'title': f'bench {i}'})
+            conversation_ids.append(response.json()['conversation']['id'])
+
+        stop = asyncio.Event()
+        results = {'ttft': [], 'duration': [], 'api': [], 'chat_errors': 0}
+        statuses = Counter()
+        tasks = [asyncio.create_task(chat_loop(client, cid, stop, results)) for cid in conversation_ids]
+        tasks.append(asyncio.create_task(api_loop(client, stop, results)))
+        tasks += [asyncio.create_task(attacker(base_url, i, stop, statuses)) for i in range(attackers)]
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+    return results, statuses
+
+
+def run_child(ollama_url, attackers, chats, seconds):
+    from benchmarks.common import BENCH_PASSWORD, BENCH_USERNAME, percentile, prepare_environment, start_wsgi
+    prepare_environment(ollama_url)
+
+    from main import create_app
+    from models import db, User
+    app = create_app()
+    with app.app_context():
+        # 벤치마크 사용자(승인됨)와 피해자 계정 (해시는 한 번만 계산해서 복사)
+        bench = User(username=BENCH_USERNAME, is_admin=True, is_approved=True)
+        bench.set_password(BENCH_PASSWORD)
+        db.session.add(bench)
+        template = User(username='victim0')
+        template.set_password('correct-password')
+        db.session.add_all([
+            User(username=f'victim{i}', password_hash=template.password_hash, is_approved=True)
+            for i in range(VICTIMS)
+        ])
+        db.session.commit()
+
+    server, port = start_wsgi(app, 64)
+    base_url = f'http://127.0.0.1:{port}'
+    output = {}
+    for phase, count in (('quiet', 0), ('storm', attackers)):
+        results, statuses = asyncio.run(run_phase(base_url, count, chats, seconds))
+        ttfts = [value for value in results['ttft'] if value is not None]
+        output[phase] = {
+            'streams': len(results['duration']),
+            'ttft_p50': percentile(ttfts, 50),
+            'ttft_p95': percentile(ttfts, 95),
+            'duration_p95': percentile(results['duration'], 95),
+            'api_p95': percentile(results['api'], 95),
+            'logins': {str(key): value for key, value in statuses.items()}
+        }
+    server.shutdown()
+    print(json.dumps(output))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--attackers', type=int, default=32, help='동시 로그인 시도 클라이언트 수')
+    parser.add_argument('--chats', type=int, default=4, help='동시 채팅 스트림 수')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--child', metavar='OLLAMA_URL', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.attackers, args.chats, args.seconds)
+        return
+
+    from benchmarks.common import fmt, start_fake_ollama
+    fake, ollama_url = start_fake_ollama('--tokens', '32', '--token-rate', '64')
+    try:
+        print(f'{args.chats} chat streams (32 tokens @ 64 tok/s), {args.attackers} login attackers, '
+              f'{args.seconds:g}s per phase')
+        print(f'{"profile":<8} {"phase":<6} {"streams":>8} {"ttft p50":>9} {"ttft p95":>9} '
+              f'{"dur p95":>8} {"api p95":>8}  logins')
+        for name, env in PROFILES.items():
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.login_storm', '--child', ollama_url,
+                 '--attackers', str(args.attackers), '--chats', str(args.chats), '--seconds', str(args.seconds)],
+                env={**os.environ, **env}, capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            for phase, row in result.items():
+                logins = ' '.join(f'{code}:{count}' for code, count in sorted(row['logins'].items()))
+                print(f'{name:<8} {phase:<6} {row["streams"]:>8} {fmt(row["ttft_p50"]):>9} '
+                      f'{fmt(row["ttft_p95"]):>9} {fmt(row["duration_p95"]):>8} {fmt(row["api_p95"]):>8}  {logins}')
+    finally:
+        fake.terminate()
+
+
+if __name__ == '__main__':
+    main()
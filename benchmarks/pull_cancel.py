@@ -0,0 +1,91 @@
+"""모델 다운로드 취소 검증: 진행 상황 줄을 기다리는 중에 취소해도 Ollama 연결이 바로 닫히는지
+
+python -m benchmarks.pull_cancel --runs 3
+
+가짜 Ollama의 다운로드를 느리게 해서(--line-interval초마다 상태 줄 하나) 작업 스레드가
+iter_lines()에서 다음 줄을 기다리는 동안 DELETE /api/pull/<job_id>로 취소하고,
+가짜 Ollama가 연결 끊김을 본 시각까지의 지연을 잰다. Response.close()만으로는 기다리던 스레드가
+다음 상태 줄이 올 때까지 깨지 않으므로 지연이 상태 줄 간격만큼 늘어난다.
+지연이 --limit초를 넘거나 작업이 cancelled로 끝나지 않으면 종료 코드 1로 끝난다.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import fmt, login, percentile, prepare_environment, start_fake_ollama, start_wsgi
+
+PULL_STEPS = 20  # 가짜 Ollama가 다운로드 하나에 보내는 진행 상황 줄 수 (레이어 2개 x 10)
+
+
+async def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = await condition()
+        if value:
+            return value
+        await asyncio.sleep(0.01)
+    return None
+
+
+async def cancel_once(client, fake, model):
+    previous = (await fake.get('/bench/stats')).json()['disconnects']
+    job_id = (await client.post('/api/pull', json={'model': model})).json()['job']['job_id']
+
+    async def progressing():
+        job = (await client.get(f'/api/pull/{job_id}')).json()['job']
+        return job['completed'] > 0
+
+    # 첫 진행 상황 줄을 받은 직후 = 작업 스레드가 다음 줄을 기다리는 중
+    if not await wait_for(progressing, 10):
+        raise RuntimeError('다운로드가 시작되지 않음')
+    await asyncio.sleep(0.1)
+    start = time.time()
+    status = (await client.delete(f'/api/pull/{job_id}')).json()['job']['status']
+
+    async def disconnected():
+        stats = (await fake.get('/bench/stats')).json()
+        return stats['last_disconnect_at'] if stats['disconnects'] > previous else None
+
+    closed_at = await wait_for(disconnected, 10)
+    return None if closed_at is None else closed_at - start, status == 'cancelled'
+
+
+async def run(base_url, fake_url, runs):
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client, \
+            httpx.AsyncClient(base_url=fake_url, timeout=5) as fake:
+        await login(client)
+        return [await cancel_once(client, fake, f'pull-model-{i}') for i in range(runs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--line-interval', type=float, default=3.0, help='가짜 Ollama 상태 줄 간격 (초)')
+    parser.add_argument('--limit', type=float, default=1.0, help='허용하는 Ollama 연결 종료 지연 (초)')
+    args = parser.parse_args()
+
+    fake, ollama_url = start_fake_ollama('--pull-seconds', str(args.line_interval * PULL_STEPS))
+    try:
+        prepare_environment(ollama_url)
+        from main import create_app  # 환경 변수 설정 후 import
+
+        _, port = start_wsgi(create_app(), 8)
+        results = asyncio.run(run(f'http://127.0.0.1:{port}', ollama_url, args.runs))
+    finally:
+        fake.terminate()
+
+    delays = [delay for delay, _ in results if delay is not None]
+    cancelled = sum(ok for _, ok in results)
+    print(f'progress line every {args.line_interval:g}s - cancel while the worker waits for the next line')
+    print(f'upstream closed after cancel: p50 {fmt(percentile(delays, 50))} max {fmt(max(delays, default=None))}  '
+          f'closed {len(delays)}/{len(results)}  cancelled {cancelled}/{len(results)}')
+    failed = len(delays) < len(results) or max(delays) > args.limit or cancelled < len(results)
+    print('FAIL' if failed else 'OK')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
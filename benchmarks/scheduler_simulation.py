@@ -0,0 +1,143 @@
+"""모델별 스케줄러 시뮬레이션: 요청을 바로 Ollama로 보낼 때 vs 스케줄러를 거칠 때
+
+python -m benchmarks.scheduler_simulation --clients 24 --requests 6 --switch-cost 2
+
+가짜 Ollama는 모델을 max_loaded개까지만 올려둘 수 있고, 다른 모델로 바꿀 때마다
+switch_cost초 동안 로드한다 (요청은 도착 순서대로 배정). 여러 클라이언트가 모델을
+무작위로 골라 채팅을 반복할 때 전체 처리 시간, 요청 지연, 모델 전환 횟수를 비교한다.
+  direct   : SCHEDULER_MAX_CONCURRENT=0 (변경 전처럼 바로 전달)
+  scheduled: 모델별 대기열 + 올라가 있는 모델 우선
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+MODEL_WEIGHTS = {'model-a': 0.5, 'model-b': 0.3, 'model-c': 0.2}
+
+
+def profiles(parallel, max_loaded):
+    return {
+        'direct': {'SCHEDULER_MAX_CONCURRENT': '0'},
+        'scheduled': {
+            'SCHEDULER_MAX_CONCURRENT': str(parallel * max_loaded),
+            'SCHEDULER_MAX_PER_MODEL': str(parallel),
+            'SCHEDULER_MAX_LOADED_MODELS': str(max_loaded),
+            'SCHEDULER_MAX_WAIT': '20'
+        },
+    }
+
+
+async def client_loop(client, conversation_id, rng, requests, results):
+    models, weights = zip(*MODEL_WEIGHTS.items())
+    for _ in range(requests):
+        model = rng.choices(models, weights)[0]
+        start = time.perf_counter()
+        completed = False
+        async with client.stream('POST', '/api/chat', json={
+            'model': model,
+            'conversation_id': conversation_id,
+            'user_message': {'content': 'benchmark'}
+        }) as response:
+            async for line in response.aiter_lines():
+                if line and json.loads(line).get('final'):
+                    completed = True
+        if completed:
+            results['latency'].append(time.perf_counter() - start)
+        else:
+            results['errors'] += 1
+
+
+async def run_clients(base_url, clients, requests, seed):
+    import httpx
+    from benchmarks.common import login
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=600, limits=limits) as client:
+        await login(client)
+        conversation_ids = []
+        for i in range(clients):
+            response = await client.post('/api/conversations', json={'title': f'bench {i}'})
+            conversation_ids.append(response.json()['conversation']['id'])
+
+        results = {'latency': [], 'errors': 0}
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            client_loop(client, cid, random.Random(seed + i), requests, results)
+            for i, cid in enumerate(conversation_ids)
+        ])
+        results['wall'] = time.perf_counter() - start
+    return results
+
+
+def run_child(ollama_url, clients, requests, seed):
+    from benchmarks.common import percentile, prepare_environment, start_wsgi
+    prepare_environment(ollama_url)
+
+    import httpx
+    from main import create_app
+    app = create_app()
+    server, port = start_wsgi(app, clients + 8)
+    results = asyncio.run(run_clients(f'http://127.0.0.1:{port}', clients, requests, seed))
+    server.shutdown()
+    fake_stats = httpx.get(f'{ollama_url}/bench/stats').json()
+    latency = results['latency']
+    print(json.dumps({
+        'completed': len(latency),
+        'errors': results['errors'],
+        'wall': results['wall'],
+        'throughput': len(latency) / results['wall'],
+        'p50': percentile(latency, 50),
+        'p95': percentile(latency, 95),
+        'max': max(latency) if latency else None,
+        'switches': fake_stats['switches'],
+        'load_seconds': fake_stats['load_seconds']
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=24, help='동시 클라이언트 수')
+    parser.add_argument('--requests', type=int, default=6, help='클라이언트당 요청 수')
+    parser.add_argument('--switch-cost', type=float, default=2.0, help='모델 로드 시간 (초)')
+    parser.add_argument('--max-loaded', type=int, default=1, help='동시에 올릴 수 있는 모델 수')
+    parser.add_argument('--parallel', type=int, default=4, help='모델별 동시 생성 수')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--child', metavar='OLLAMA_URL', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.clients, args.requests, args.seed)
+        return
+
+    from benchmarks.common import fmt, start_fake_ollama
+    print(f'{args.clients} clients x {args.requests} requests, models {MODEL_WEIGHTS}, '
+          f'max_loaded={args.max_loaded} parallel={args.parallel} switch_cost={args.switch_cost:g}s')
+    print(f'{"profile":<10} {"wall":>8} {"req/s":>7} {"p50":>8} {"p95":>8} {"max":>8} '
+          f'{"switches":>8} {"load":>8} {"errors":>6}')
+    for name, env in profiles(args.parallel, args.max_loaded).items():
+        # 프로필마다 새 가짜 Ollama (전환 횟수 초기화)
+        fake, ollama_url = start_fake_ollama(
+            '--models', ','.join(MODEL_WEIGHTS), '--tokens', '32', '--token-rate', '64',
+            '--switch-cost', str(args.switch_cost), '--max-loaded', str(args.max_loaded),
+            '--parallel', str(args.parallel)
+        )
+        try:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.scheduler_simulation', '--child', ollama_url,
+                 '--clients', str(args.clients), '--requests', str(args.requests), '--seed', str(args.seed)],
+                env={**os.environ, **env}, capture_output=True, text=True, check=True
+            ).stdout
+        finally:
+            fake.terminate()
+        row = json.loads(output.strip().splitlines()[-1])
+        print(f'{name:<10} {fmt(row["wall"]):>8} {row["throughput"]:>7.2f} {fmt(row["p50"]):>8} '
+              f'{fmt(row["p95"]):>8} {fmt(row["max"]):>8} {row["switches"]:>8} '
+              f'{fmt(row["load_seconds"]):>8} {row["errors"]:>6}')
+
+
+if __name__ == '__main__':
+    main()
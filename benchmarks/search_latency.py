@@ -0,0 +1,97 @@
+"""대화 검색 지연 시간 벤치마크 (FTS5)
+
+python -m benchmarks.search_latency --messages 1000000 --users 100
+
+임시 DB에 메시지를 채운 뒤(트리거로 색인됨) 한 사용자 범위의 검색 지연 시간을 측정한다.
+단어 빈도는 실제 문서처럼 Zipf 분포를 따르고, 검색어는 흔한 단어(상위 50개)와 일반 단어로 나눠 측정한다.
+"""
+import argparse
+import random
+import time
+from itertools import accumulate
+
+WORDS = (
+    '서버 설정 배포 모델 데이터 파이썬 함수 오류 로그 메모리 네트워크 컨테이너 '
+    'docker nginx python flask sqlite index query cache thread async stream token '
+    'kubernetes gpu cuda ollama llama prompt context image vision embedding'
+).split()
+
+VOCABULARY = WORDS + [f'{WORDS[i % len(WORDS)]}{i}' for i in range(20000)]
+CUM_WEIGHTS = list(accumulate(1 / rank for rank in range(1, len(VOCABULARY) + 1)))
+
+
+def sentence(rng, length=40):
+    return ' '.join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=length))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--per-conversation', type=int, default=50)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    from benchmarks.common import percentile, fmt, prepare_environment
+    prepare_environment('http://127.0.0.1:9')
+
+    from main import create_app
+    from models import db
+    from utils.search import search_conversations
+    app = create_app()
+    rng = random.Random(42)
+
+    with app.app_context():
+        start = time.perf_counter()
+        conn = db.engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT INTO users (id, username, password_hash, is_admin, is_approved) VALUES (?, ?, '-', 0, 1)",
+                [(u, f'user{u}') for u in range(1, args.users + 1)]
+            )
+            conversations = max(1, args.messages // args.per_conversation)
+            cursor.executemany(
+                "INSERT INTO conversations (id, user_id, title, is_deleted, created_at, updated_at) "
+                "VALUES (?, ?, ?, 0, datetime('now'), datetime('now'))",
+                [(c, c % args.users + 1, sentence(rng, 4)) for c in range(1, conversations + 1)]
+            )
+            batch = []
+            for i in range(args.messages):
+                batch.append((i % conversations + 1, 'user' if i % 2 == 0 else 'assistant', sentence(rng)))
+                if len(batch) == 10000:
+                    cursor.executemany(
+                        "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, datetime('now'))",
+                        batch
+                    )
+                    batch = []
+            if batch:
+                cursor.executemany(
+                    "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, datetime('now'))",
+                    batch
+                )
+            conn.commit()
+        finally:
+            conn.close()
+        print(f'{args.messages:,} messages indexed in {time.perf_counter() - start:.1f}s')
+
+        for label, make_query in (
+            ('common', lambda: rng.choice(VOCABULARY[:50])),
+            ('one word', lambda: rng.choice(VOCABULARY[50:5000])),
+            ('two words', lambda: f'{rng.choice(VOCABULARY[:500])} {rng.choice(VOCABULARY[50:5000])}'),
+            ('prefix', lambda: rng.choice(VOCABULARY[50:5000])[:-1]),
+        ):
+            latencies = []
+            for _ in range(args.queries):
+                user_id = rng.randint(1, args.users)
+                query = make_query()
+                start = time.perf_counter()
+                search_conversations(user_id, query, 20)
+                latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            print(f'{label:<9} p50 {fmt(percentile(latencies, 50))}  p95 {fmt(percentile(latencies, 95))}  '
+                  f'max {fmt(latencies[-1])}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""SQLite 동시성 벤치마크: 메시지 삽입과 대화 목록 조회를 동시에 실행
+
+python -m benchmarks.sqlite_concurrency --writers 8 --readers 8 --seconds 5
+
+설정별로 별도 프로세스를 띄워 비교한다 (Config는 import 시점에 환경 변수를 읽음).
+  legacy: journal_mode=DELETE, synchronous=FULL (변경 전 기본값)
+  tuned : 기본 설정 (WAL, synchronous=NORMAL, mmap, busy timeout)
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+PROFILES = {
+    'legacy': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_MMAP_SIZE': '0'},
+    'tuned': {},
+}
+
+
+def run_child(writers, readers, seconds):
+    from benchmarks.common import percentile, prepare_environment
+    prepare_environment('http://127.0.0.1:9')
+
+    from main import create_app
+    from models import db, User, Conversation, Message
+    from datetime import datetime
+    app = create_app()
+
+    with app.app_context():
+        user = User(username='bench', password_hash='-', is_approved=True)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        conversation_ids = []
+        for i in range(200):
+            conversation = Conversation(user_id=user_id, title=f'conversation {i}')
+            db.session.add(conversation)
+            db.session.flush()
+            conversation_ids.append(conversation.id)
+        db.session.commit()
+
+    stop = threading.Event()
+    stats = {'writes': [], 'reads': [], 'errors': 0}
+    lock = threading.Lock()
+
+    def writer(index):
+        latencies = []
+        with app.app_context():
+            i = 0
+            while not stop.is_set():
+                conversation_id = conversation_ids[(index * 31 + i) % len(conversation_ids)]
+                start = time.perf_counter()
+                try:
+                    db.session.add(Message(conversation_id=conversation_id, role='user', content='x' * 500))
+                    Conversation.query.filter_by(id=conversation_id).update(
+                        {'updated_at': datetime.utcnow()}, synchronize_session=False
+                    )
+                    db.session.commit()
+                    latencies.append(time.perf_counter() - start)
+                except Exception:
+                    db.session.rollback()
+                    with lock:
+                        stats['errors'] += 1
+                i += 1
+        with lock:
+            stats['writes'].extend(latencies)
+
+    def reader():
+        latencies = []
+        with app.app_context():
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    Conversation.query.filter_by(user_id=user_id, is_deleted=False).order_by(
+                        Conversation.updated_at.desc()
+                    ).all()
+                    db.session.rollback()  # 읽기 트랜잭션 종료
+                    latencies.append(time.perf_counter() - start)
+                except Exception:
+                    db.session.rollback()
+                    with lock:
+                        stats['errors'] += 1
+        with lock:
+            stats['reads'].extend(latencies)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(json.dumps({
+        'writes_per_sec': len(stats['writes']) / seconds,
+        'reads_per_sec': len(stats['reads']) / seconds,
+        'write_p95': percentile(stats['writes'], 95),
+        'read_p95': percentile(stats['reads'], 95),
+        'read_max': max(stats['reads']) if stats['reads'] else None,
+        'errors': stats['errors']
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.writers, args.readers, args.seconds)
+        return
+
+    from benchmarks.common import fmt
+    print(f'{args.writers} writers + {args.readers} readers, {args.seconds:g}s each')
+    print(f'{"profile":<8} {"writes/s":>9} {"reads/s":>9} {"write p95":>10} {"read p95":>10} {"read max":>10} {"errors":>7}')
+    for name, env in PROFILES.items():
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.sqlite_concurrency', '--child',
+             '--writers', str(args.writers), '--readers', str(args.readers), '--seconds', str(args.seconds)],
+            env={**os.environ, **env}, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f'{name:<8} {result["writes_per_sec"]:>9,.0f} {result["reads_per_sec"]:>9,.0f} '
+              f'{fmt(result["write_p95"]):>10} {fmt(result["read_p95"]):>10} {fmt(result["read_max"]):>10} '
+              f'{result["errors"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""동시 채팅 스트림 처리량 비교: 스레드 제한 WSGI vs ASGI(asgi.py)
+
+python -m benchmarks.stream_capacity --concurrency 16,64,256 --threads 16
+
+가짜 Ollama는 스트림당 tokens / token_rate 초가 걸린다. WSGI는 스트림 하나가 스레드 하나를
+생성 내내 점유하므로 동시 스트림 수가 스레드 수로 제한되고, ASGI는 코루틴으로 처리한다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from benchmarks.common import (
+    fmt, login, percentile, prepare_environment, start_fake_ollama, start_uvicorn, start_wsgi
+)
+
+
+async def one_stream(client, conversation_id, model):
+    start = time.perf_counter()
+    ttft = None
+    completed = False
+    try:
+        async with client.stream('POST', '/api/chat', json={
+            'model': model,
+            'conversation_id': conversation_id,
+            'user_message': {'content': 'benchmark'}
+        }) as response:
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                frame = json.loads(line)
+                if frame.get('chunk') and ttft is None:
+                    ttft = time.perf_counter() - start
+                if frame.get('final'):
+                    completed = True
+    except httpx.HTTPError:
+        pass
+    return completed, ttft, time.perf_counter() - start
+
+
+async def run_level(base_url, concurrency, model, timeout):
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        await login(client)
+        conversation_ids = []
+        for i in range(concurrency):
+            response = await client.post('/api/conversations', json={'title': f'bench {i}'})
+            conversation_ids.append(response.json()['conversation']['id'])
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            one_stream(client, conversation_id, model) for conversation_id in conversation_ids
+        ])
+        wall = time.perf_counter() - start
+
+    ttfts = [ttft for ok, ttft, _ in results if ok and ttft is not None]
+    durations = [duration for ok, _, duration in results if ok]
+    return {
+        'completed': sum(1 for ok, _, _ in results if ok),
+        'wall': wall,
+        'ttft_p50': percentile(ttfts, 50),
+        'ttft_p95': percentile(ttfts, 95),
+        'duration_p95': percentile(durations, 95)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', default='16,64,256', help='동시 스트림 수 (쉼표 구분)')
+    parser.add_argument('--threads', type=int, default=16, help='WSGI 서버 스레드 수')
+    parser.add_argument('--tokens', type=int, default=32)
+    parser.add_argument('--token-rate', type=float, default=32.0)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    fake, ollama_url = start_fake_ollama('--tokens', str(args.tokens), '--token-rate', str(args.token_rate))
+    try:
+        # 서버 자체의 동시 스트림 한도를 재는 벤치마크라 스케줄러는 기본으로 끔
+        prepare_environment(ollama_url, SCHEDULER_MAX_CONCURRENT=os.environ.get('SCHEDULER_MAX_CONCURRENT', 0))
+        import asgi  # 환경 변수 설정 후 import
+
+        wsgi_server, wsgi_port = start_wsgi(asgi.flask_app, args.threads)
+        _, asgi_port = start_uvicorn(asgi.app)
+
+        levels = [int(value) for value in args.concurrency.split(',')]
+        print(f'stream = {args.tokens} tokens @ {args.token_rate} tok/s '
+              f'(~{args.tokens / args.token_rate:.1f}s), WSGI threads = {args.threads}')
+        print(f'{"mode":<6} {"streams":>8} {"done":>6} {"wall":>9} {"ttft p50":>10} {"ttft p95":>10} {"dur p95":>9}')
+        for mode, port in (('wsgi', wsgi_port), ('asgi', asgi_port)):
+            for concurrency in levels:
+                result = asyncio.run(run_level(
+                    f'http://127.0.0.1:{port}', concurrency, 'fake-model', args.timeout
+                ))
+                print(f'{mode:<6} {concurrency:>8} {result["completed"]:>6} {fmt(result["wall"]):>9} '
+                      f'{fmt(result["ttft_p50"]):>10} {fmt(result["ttft_p95"]):>10} {fmt(result["duration_p95"]):>9}')
+        wsgi_server.shutdown()
+    finally:
+        fake.terminate()
+
+
+if __name__ == '__main__':
+    main()
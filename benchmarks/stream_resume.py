@@ -0,0 +1,173 @@
+"""끊긴 채팅 스트림 이어 받기(SSE, Last-Event-ID) 검증
+
+python -m benchmarks.stream_resume --runs 5
+
+느린 가짜 Ollama로 SSE 스트림(Accept: text/event-stream)을 받다가 연결을 끊고
+--gap초 뒤 GET /api/chat/<stream_id>/events에 Last-Event-ID를 보내 이어 받는다 (WSGI/ASGI 각각).
+이어 붙인 내용이 중간 누락/중복 없이 저장된 응답과 같은지, Ollama에 다시 요청하지 않았는지,
+재연결 후 첫 이벤트까지 걸린 시간을 확인한다. 재연결하지 않으면 STREAM_RESUME_TIMEOUT 뒤
+생성을 멈추는지도 확인한다. 하나라도 어긋나면 종료 코드 1로 끝난다.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import fmt, login, percentile, prepare_environment, start_fake_ollama, start_uvicorn, start_wsgi
+
+MODEL = 'fake-model'
+RESUME_TIMEOUT = 2.0
+
+
+async def read_events(response, state, limit=None):
+    """SSE 이벤트를 읽어 state(last_id, content, final)에 반영 - chunk를 limit개 받으면 멈춤"""
+    received = 0
+    buffer = ''
+    async for text in response.aiter_text():
+        buffer += text
+        while '\n\n' in buffer:
+            block, buffer = buffer.split('\n\n', 1)
+            data = None
+            for line in block.split('\n'):
+                if line.startswith('id: '):
+                    state['last_id'] = line[4:]
+                elif line.startswith('data: '):
+                    data = json.loads(line[6:])
+            if data is None:
+                continue
+            if data.get('resume_failed'):
+                raise RuntimeError('resume gap')
+            if data.get('chunk'):
+                state['content'] += data['chunk']
+                received += 1
+                if state['first_event'] is None:
+                    state['first_event'] = time.perf_counter()
+            if data.get('final'):
+                state['final'] = data
+                return
+            if limit is not None and received >= limit:
+                return
+
+
+async def saved_reply(client, conversation_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        messages = (await client.get(f'/api/conversations/{conversation_id}')).json()['conversation']['messages']
+        if messages and messages[-1]['role'] == 'assistant':
+            return messages[-1]
+        await asyncio.sleep(0.05)
+    return None
+
+
+async def start(client, title):
+    conversation_id = (await client.post('/api/conversations', json={'title': title})).json()['conversation']['id']
+    request = client.build_request('POST', '/api/chat', headers={'Accept': 'text/event-stream'}, json={
+        'model': MODEL, 'conversation_id': conversation_id, 'user_message': {'content': title}
+    })
+    response = await client.send(request, stream=True)
+    assert response.headers['content-type'].startswith('text/event-stream'), response.headers
+    assert response.headers.get('x-accel-buffering') == 'no', response.headers
+    return conversation_id, response
+
+
+async def resume_once(client, fake, before_chunks, gap, tokens):
+    chats_before = (await fake.get('/bench/stats')).json()['chat_requests']
+    conversation_id, response = await start(client, 'resume')
+    stream_id = response.headers['x-stream-id']
+    state = {'last_id': '0', 'content': '', 'final': None, 'first_event': None}
+    await read_events(response, state, before_chunks)
+    await response.aclose()  # 연결 끊김
+    await asyncio.sleep(gap)
+
+    state['first_event'] = None
+    reconnect = time.perf_counter()
+    async with client.stream('GET', f'/api/chat/{stream_id}/events',
+                             headers={'Last-Event-ID': state['last_id']}) as resumed:
+        assert resumed.status_code == 200, resumed.status_code
+        await read_events(resumed, state)
+    reply = await saved_reply(client, conversation_id)
+    expected = ''.join(f'tok{i} ' for i in range(tokens))
+    chats_after = (await fake.get('/bench/stats')).json()['chat_requests']
+    return {
+        'resume': None if state['first_event'] is None else state['first_event'] - reconnect,
+        'complete': state['content'] == expected and bool(state['final']),
+        'saved': bool(reply) and reply['content'] == expected and not reply['cancelled'],
+        'regenerated': chats_after - chats_before - 1
+    }
+
+
+async def abandon_once(client, fake):
+    previous = (await fake.get('/bench/stats')).json()['disconnects']
+    conversation_id, response = await start(client, 'abandon')
+    state = {'last_id': '0', 'content': '', 'final': None, 'first_event': None}
+    await read_events(response, state, 3)
+    await response.aclose()
+    dropped = time.time()
+    deadline = time.monotonic() + RESUME_TIMEOUT + 5
+    while time.monotonic() < deadline:
+        stats = (await fake.get('/bench/stats')).json()
+        if stats['disconnects'] > previous:
+            break
+        await asyncio.sleep(0.05)
+    else:
+        return None, False
+    reply = await saved_reply(client, conversation_id)
+    return stats['last_disconnect_at'] - dropped, bool(reply and reply['cancelled'])
+
+
+async def run_mode(base_url, fake_url, args):
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client, \
+            httpx.AsyncClient(base_url=fake_url, timeout=5) as fake:
+        await login(client)
+        results = [await resume_once(client, fake, args.before_chunks, args.gap, args.tokens)
+                   for _ in range(args.runs)]
+        abandoned = await abandon_once(client, fake)
+    return results, abandoned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--tokens', type=int, default=100)
+    parser.add_argument('--token-rate', type=float, default=40.0)
+    parser.add_argument('--before-chunks', type=int, default=10, help='연결을 끊기 전에 받을 chunk 수')
+    parser.add_argument('--gap', type=float, default=0.5, help='끊긴 뒤 재연결까지 시간 (초)')
+    args = parser.parse_args()
+
+    fake, ollama_url = start_fake_ollama('--tokens', str(args.tokens), '--token-rate', str(args.token_rate))
+    failed = False
+    try:
+        prepare_environment(ollama_url, STREAM_FLUSH_INTERVAL_MS=0, STREAM_RESUME_TIMEOUT=RESUME_TIMEOUT)
+        import asgi  # 환경 변수 설정 후 import
+
+        _, wsgi_port = start_wsgi(asgi.flask_app, 8)
+        _, asgi_port = start_uvicorn(asgi.app)
+        print(f'stream = {args.tokens} tokens @ {args.token_rate} tok/s, drop after {args.before_chunks} chunks, '
+              f'reconnect after {args.gap}s')
+        print(f'{"mode":<5} {"complete":>9} {"saved":>6} {"regen":>6} {"resume p50":>11} {"max":>8}   abandoned')
+        for mode, port in (('wsgi', wsgi_port), ('asgi', asgi_port)):
+            results, (abandon_delay, abandon_saved) = asyncio.run(
+                run_mode(f'http://127.0.0.1:{port}', ollama_url, args)
+            )
+            resumes = [row['resume'] for row in results if row['resume'] is not None]
+            complete = sum(row['complete'] for row in results)
+            saved = sum(row['saved'] for row in results)
+            regenerated = sum(row['regenerated'] for row in results)
+            print(f'{mode:<5} {complete:>5}/{len(results)} {saved:>3}/{len(results)} {regenerated:>6} '
+                  f'{fmt(percentile(resumes, 50)):>11} {fmt(max(resumes, default=None)):>8}   '
+                  f'upstream closed {fmt(abandon_delay)} after drop '
+                  f'(timeout {RESUME_TIMEOUT:.0f}s), saved as cancelled: {abandon_saved}')
+            if complete < len(results) or saved < len(results) or regenerated or not abandon_saved:
+                failed = True
+    finally:
+        fake.terminate()
+
+    print('FAIL' if failed else 'OK')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""채팅 스트림 프록시 루프 처리량 마이크로 벤치마크
+
+python -m benchmarks.stream_throughput --tokens 20000
+
+가짜 Ollama 스트림(NDJSON 라인)을 routes.api의 generate() 루프와 같은 방식으로 처리하고
+토큰/초, 클라이언트로 나가는 프레임 수와 바이트 수를 비교한다.
+토큰 도착 시각은 가상 시계로 흉내내므로(토큰 속도 token_rate) 실제로 기다리지 않는다.
+"""
+import argparse
+import json
+import time
+
+from utils.chat_stream import ChatStreamProcessor, encode_frame, parse_metrics
+
+
+def fake_stream(tokens: int):
+    """Ollama /api/chat 스트리밍 응답 라인 (한글/영문 섞인 토큰)"""
+    words = ['안녕', 'hello', ' 세계', ' world', '입니다', '.', '\n', ' 코드']
+    lines = [
+        json.dumps({"model": "fake", "message": {"role": "assistant", "content": words[i % len(words)]}, "done": False}).encode()
+        for i in range(tokens)
+    ]
+    lines.append(json.dumps({
+        "model": "fake", "message": {"role": "assistant", "content": ""}, "done": True,
+        "eval_count": tokens, "eval_duration": 10 ** 9, "prompt_eval_duration": 10 ** 8
+    }).encode())
+    return lines
+
+
+def legacy_loop(lines):
+    """변경 전 루프: 토큰마다 json.dumps, 문자열 += 누적"""
+    full_content = ''
+    out = []
+    for line in lines:
+        chunk = json.loads(line)
+        response_text = chunk.get('message', {}).get('content', '')
+        full_content += response_text
+        response_data = {"success": True, "chunk": response_text, "done": chunk.get('done', False)}
+        if chunk.get('done', False):
+            response_data['metrics'] = parse_metrics(chunk)
+        out.append(json.dumps(response_data) + '\n')
+    out.append(json.dumps({"success": True, "done": True, "full_content": full_content}) + '\n')
+    return out
+
+
+def processor_loop(lines, flush_interval, token_rate):
+    """현재 루프: ChatStreamProcessor (가상 시계로 토큰 도착 시각 전달)"""
+    processor = ChatStreamProcessor('fake', 1, flush_interval=flush_interval)
+    out = []
+    step = 1 / token_rate
+    for i, line in enumerate(lines):
+        frame = processor.process_line(line, now=i * step)
+        if frame:
+            out.append(encode_frame(frame))
+    frame = processor.flush_pending()
+    if frame:
+        out.append(encode_frame(frame))
+    out.append(encode_frame(processor.final_frame()))
+    return out
+
+
+def measure(name, func, lines, repeat):
+    best = float('inf')
+    out = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = func(lines)
+        best = min(best, time.perf_counter() - start)
+    size = sum(len(frame.encode('utf-8')) for frame in out)
+    print(f'{name:<28} {len(lines) / best:>14,.0f} {len(out):>9,} {size:>12,}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tokens', type=int, default=20000)
+    parser.add_argument('--token-rate', type=float, default=100.0, help='가상 토큰 도착 속도 (tok/s)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    lines = fake_stream(args.tokens)
+    print(f'{args.tokens:,} tokens, virtual arrival rate {args.token_rate:g} tok/s')
+    print(f'{"loop":<28} {"tokens/sec":>14} {"frames":>9} {"bytes":>12}')
+    measure('legacy (per token)', legacy_loop, lines, args.repeat)
+    for interval_ms in (0, 30, 100):
+        measure(
+            f'processor flush={interval_ms}ms',
+            lambda ls, ms=interval_ms: processor_loop(ls, ms / 1000, args.token_rate),
+            lines, args.repeat
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import click
+from datetime import datetime, timedelta
+from models import db, Message
+from utils.image_store import ImageStore, is_image_hash
+from utils.metrics_rollup import rebuild_rollups
+from utils.archive import (
+    archive_conversations, collect_unused_images, database_size, purge_deleted, vacuum_database
+)
+from utils.search import optimize_search_index
+from config import Config
+
+
+def register_commands(app):
+    """Flask CLI 명령 등록 (flask --app main <command>)"""
+
+    @app.cli.command('migrate-images')
+    @click.option('--batch-size', default=100, show_default=True, help='커밋 단위 메시지 수')
+    def migrate_images(batch_size):
+        """Message.image에 저장된 base64를 이미지 저장소로 이전"""
+        store = ImageStore(Config.IMAGE_STORE_PATH)
+        migrated = 0
+        failed = 0
+        last_id = 0
+
+        while True:
+            rows = Message.query.filter(
+                Message.id > last_id,
+                Message.image.isnot(None)
+            ).order_by(Message.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            for msg in rows:
+                last_id = msg.id
+                if is_image_hash(msg.image):
+                    continue
+                try:
+                    msg.image = store.save_base64(msg.image)
+                    migrated += 1
+                except ValueError:
+                    failed += 1
+                    click.echo(f'메시지 {msg.id}: 잘못된 이미지 데이터, 건너뜀')
+
+            db.session.commit()
+            db.session.expunge_all()
+
+        click.echo(f'이미지 이전 완료: {migrated}개 이전, {failed}개 실패')
+
+    @app.cli.command('rebuild-metrics')
+    @click.option('--batch-size', default=5000, show_default=True, help='커밋 단위 메시지 수')
+    def rebuild_metrics(batch_size):
+        """저장된 메시지 메트릭으로 분석용 집계 테이블을 다시 만듦"""
+        processed = rebuild_rollups(batch_size)
+        click.echo(f'메트릭 집계 재생성 완료: 메시지 {processed}개')
+
+    @app.cli.command('maintenance')
+    @click.option('--idle-days', default=Config.ARCHIVE_IDLE_DAYS, show_default=True,
+                  help='이 기간 동안 쓰지 않은 대화를 보관 (0이면 삭제된 대화만)')
+    @click.option('--purge-days', default=Config.ARCHIVE_PURGE_DAYS, show_default=True,
+                  help='삭제한 지 이 기간이 지난 대화를 완전히 삭제 (0이면 삭제하지 않음)')
+    @click.option('--image-grace', default=3600, show_default=True, help='이보다 오래된(초) 미사용 이미지만 삭제')
+    @click.option('--batch-size', default=100, show_default=True, help='커밋 단위 대화 수')
+    @click.option('--no-vacuum', is_flag=True, help='VACUUM 생략 (DB 파일 크기는 줄지 않음)')
+    def maintenance(idle_days, purge_days, image_grace, batch_size, no_vacuum):
+        """오래된/삭제된 대화 압축 보관, 삭제 대화 정리, 미사용 이미지 삭제, 검색 인덱스 최적화, VACUUM"""
+        now = datetime.utcnow()
+        size_before = database_size()
+
+        if purge_days > 0:
+            purged = purge_deleted(now - timedelta(days=purge_days))
+            click.echo(f'삭제된 대화 정리: {purged}개')
+
+        idle_before = now - timedelta(days=idle_days) if idle_days > 0 else None
+        archived = archive_conversations(idle_before, batch_size)
+        ratio = archived['stored_bytes'] / archived['raw_bytes'] * 100 if archived['raw_bytes'] else 0
+        click.echo(f"대화 보관: {archived['conversations']}개 (메시지 {archived['messages']}개, "
+                   f"{archived['raw_bytes']:,} -> {archived['stored_bytes']:,} 바이트, {ratio:.0f}%)")
+
+        images = collect_unused_images(ImageStore(Config.IMAGE_STORE_PATH), image_grace)
+        click.echo(f"미사용 이미지 삭제: {images['removed']}개 ({images['freed_bytes']:,} 바이트)")
+
+        optimize_search_index()
+        if not no_vacuum:
+            vacuum_database()
+        click.echo(f'DB 크기: {size_before:,} -> {database_size():,} 바이트')
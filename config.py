@@ -7,11 +7,50 @@ load_dotenv()
 class Config:
     """Application configuration."""
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
-    OLLAMA_API_URL = os.getenv('OLLAMA_API_URL', 'http://localhost:11434')
+    # 사용자 권한 정보 캐시 유효 시간 (초, 승인/거부는 즉시 반영)
+    USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 30))
+    # 비밀번호 해싱 (bcrypt cost factor, 전용 스레드 수, 대기열 한도)
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+    PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv('PASSWORD_HASH_QUEUE_LIMIT', 32))
+    PASSWORD_HASH_NICE = int(os.getenv('PASSWORD_HASH_NICE', 10))  # 해싱 스레드 CPU 우선순위 낮춤 (Linux)
+    # 로그인 시도 제한 (토큰 버킷, burst=0이면 제한 없음)
+    LOGIN_RATE_USER_BURST = int(os.getenv('LOGIN_RATE_USER_BURST', 5))
+    LOGIN_RATE_USER_PER_MINUTE = float(os.getenv('LOGIN_RATE_USER_PER_MINUTE', 5))
+    LOGIN_RATE_IP_BURST = int(os.getenv('LOGIN_RATE_IP_BURST', 20))
+    LOGIN_RATE_IP_PER_MINUTE = float(os.getenv('LOGIN_RATE_IP_PER_MINUTE', 30))
+    # 여러 서버는 쉼표로 구분 (모델이 있고 가장 한가한 서버로 분배)
+    OLLAMA_API_URLS = [
+        url.strip() for url in os.getenv('OLLAMA_API_URL', 'http://localhost:11434').split(',') if url.strip()
+    ] or ['http://localhost:11434']
+    OLLAMA_API_URL = OLLAMA_API_URLS[0]
+    # Ollama HTTP 연결 풀 / 타임아웃 / 재시도 (연결 실패만 재시도)
+    OLLAMA_POOL_SIZE = int(os.getenv('OLLAMA_POOL_SIZE', 50))
+    OLLAMA_CONNECT_TIMEOUT = float(os.getenv('OLLAMA_CONNECT_TIMEOUT', 5))
+    OLLAMA_READ_TIMEOUT = float(os.getenv('OLLAMA_READ_TIMEOUT', 30))
+    OLLAMA_MAX_RETRIES = int(os.getenv('OLLAMA_MAX_RETRIES', 3))
+    OLLAMA_RETRY_BACKOFF = float(os.getenv('OLLAMA_RETRY_BACKOFF', 0.3))
+    # 모델 다운로드 작업 (백그라운드)
+    PULL_JOB_RETENTION = float(os.getenv('PULL_JOB_RETENTION', 3600))  # 끝난 작업 보관 시간 (초)
+    PULL_PROGRESS_STREAM_SECONDS = float(os.getenv('PULL_PROGRESS_STREAM_SECONDS', 30))  # NDJSON 진행 스트림 최대 길이
+    PULL_PROGRESS_INTERVAL = float(os.getenv('PULL_PROGRESS_INTERVAL', 0.5))  # 진행 상황 전송 간격 (초)
+    # 채팅 요청 스케줄러 (동시 생성 수 제한, MAX_CONCURRENT=0이면 사용 안 함)
+    SCHEDULER_MAX_CONCURRENT = int(os.getenv('SCHEDULER_MAX_CONCURRENT', 4))
+    SCHEDULER_MAX_PER_MODEL = int(os.getenv('SCHEDULER_MAX_PER_MODEL', 4))  # Ollama OLLAMA_NUM_PARALLEL
+    SCHEDULER_MAX_LOADED_MODELS = int(os.getenv('SCHEDULER_MAX_LOADED_MODELS', 1))  # Ollama OLLAMA_MAX_LOADED_MODELS
+    SCHEDULER_MAX_WAIT = float(os.getenv('SCHEDULER_MAX_WAIT', 30))  # 이보다 오래 기다리면 모델 전환 허용 (초)
+    SCHEDULER_MAX_QUEUE = int(os.getenv('SCHEDULER_MAX_QUEUE', 200))  # 대기열 최대 길이
+    SCHEDULER_QUEUE_TIMEOUT = float(os.getenv('SCHEDULER_QUEUE_TIMEOUT', 300))  # 최대 대기 시간 (초)
+    SCHEDULER_POSITION_INTERVAL = float(os.getenv('SCHEDULER_POSITION_INTERVAL', 1))  # 대기 순서 알림 주기 (초)
+    # 모델 목록/상태 캐시 (초)
+    MODEL_CACHE_TTL = float(os.getenv('MODEL_CACHE_TTL', 10))
+    MODEL_CACHE_REFRESH_INTERVAL = float(os.getenv('MODEL_CACHE_REFRESH_INTERVAL', 10))
     DEBUG = str(os.getenv('FLASK_DEBUG', 'False')).lower() in (
         '1', 'true', 't', 'yes', 'y', 'on'
     )
     SERVER_PORT = int(os.getenv('SERVER_PORT', 5000))
+    # ASGI 모드(asgi.py)에서 채팅 스트리밍 외 Flask 라우트를 처리할 스레드 수
+    ASGI_WSGI_WORKERS = int(os.getenv('ASGI_WSGI_WORKERS', 20))
 
     # SQLite 설정 - 항상 절대 경로 사용
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -26,3 +65,93 @@ class Config:
         os.makedirs(INSTANCE_PATH, exist_ok=True)
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{DATABASE_PATH}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # SQLite 튜닝 (WAL 모드에서는 쓰기 중에도 읽기가 막히지 않음)
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    # DB 연결 풀
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+
+    # 채팅 스트림 프레임 묶음 전송 (토큰을 시간/크기 기준으로 모아서 전송)
+    STREAM_FLUSH_INTERVAL_MS = float(os.getenv('STREAM_FLUSH_INTERVAL_MS', 30))
+    STREAM_FLUSH_MAX_CHARS = int(os.getenv('STREAM_FLUSH_MAX_CHARS', 512))
+    # 이어 받을 수 있는 채팅 스트림 (SSE, Last-Event-ID로 재연결)
+    STREAM_RESUME_BUFFER_FRAMES = int(os.getenv('STREAM_RESUME_BUFFER_FRAMES', 2048))  # 스트림별 보관 프레임 수
+    STREAM_RESUME_TIMEOUT = float(os.getenv('STREAM_RESUME_TIMEOUT', 60))  # 연결이 끊긴 뒤 재연결을 기다리는 시간 (초, 지나면 생성 중지)
+    STREAM_RESUME_RETENTION = float(os.getenv('STREAM_RESUME_RETENTION', 60))  # 생성이 끝난 뒤 이어 받을 수 있는 시간 (초)
+    STREAM_KEEPALIVE_SECONDS = float(os.getenv('STREAM_KEEPALIVE_SECONDS', 15))  # 새 프레임이 없을 때 keep-alive 주석 간격
+
+    # DB 쓰기 지연 큐 (채팅 메시지 저장을 모아서 커밋)
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', 50))
+    WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', 0.05))
+
+    # 이미지 저장소 (SHA-256 콘텐츠 주소 파일)
+    IMAGE_STORE_PATH = os.getenv(
+        'IMAGE_STORE_PATH',
+        os.path.join(INSTANCE_PATH, 'images')
+    )
+    if not os.path.isabs(IMAGE_STORE_PATH):
+        IMAGE_STORE_PATH = os.path.normpath(os.path.join(BASE_DIR, IMAGE_STORE_PATH))
+
+    # 업로드 이미지 축소 (긴 변 픽셀, 0이면 줄이지 않음 - 서버 측 처리는 Pillow 필요)
+    IMAGE_MAX_DIMENSION = int(os.getenv('IMAGE_MAX_DIMENSION', 1344))
+    IMAGE_MODEL_MAX_DIMENSION = {  # 모델별 값 (예: llava:13b=672,qwen2.5vl:7b=1792)
+        name.strip(): int(value)
+        for name, _, value in (
+            item.rpartition('=') for item in os.getenv('IMAGE_MODEL_MAX_DIMENSION', '').split(',') if '=' in item
+        )
+    }
+    IMAGE_JPEG_QUALITY = int(os.getenv('IMAGE_JPEG_QUALITY', 85))
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+    IMAGE_QUEUE_LIMIT = int(os.getenv('IMAGE_QUEUE_LIMIT', 16))
+
+    # 대화 메시지 페이지 크기 (GET /api/conversations/<id>)
+    MESSAGE_PAGE_SIZE = int(os.getenv('MESSAGE_PAGE_SIZE', 50))
+    MESSAGE_PAGE_MAX = int(os.getenv('MESSAGE_PAGE_MAX', 200))
+
+    # 대화 검색 결과 최대 개수 (GET /api/search, 제목/메시지 각각)
+    SEARCH_RESULT_LIMIT = int(os.getenv('SEARCH_RESULT_LIMIT', 20))
+
+    # 채팅 응답 캐시 (같은 모델/메시지/옵션이면 저장된 응답 재생, 기본 사용 안 함)
+    RESPONSE_CACHE_ENABLED = str(os.getenv('RESPONSE_CACHE_ENABLED', 'False')).lower() in (
+        '1', 'true', 't', 'yes', 'y', 'on'
+    )
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    RESPONSE_CACHE_EXCLUDE_MODELS = [
+        name.strip() for name in os.getenv('RESPONSE_CACHE_EXCLUDE_MODELS', '').split(',') if name.strip()
+    ]
+
+    # Prometheus 메트릭 (GET /metrics, 토큰을 설정하면 Authorization: Bearer <토큰> 필요)
+    METRICS_ENABLED = str(os.getenv('METRICS_ENABLED', 'True')).lower() in (
+        '1', 'true', 't', 'yes', 'y', 'on'
+    )
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+    # 컨텍스트 길이 관리 (토큰, 0이면 자르지 않음 - Ollama num_ctx / OLLAMA_CONTEXT_LENGTH와 맞출 것)
+    CONTEXT_MAX_TOKENS = int(os.getenv('CONTEXT_MAX_TOKENS', 4096))
+    CONTEXT_MODEL_TOKENS = {  # 모델별 컨텍스트 길이 (예: llama3.1:8b=8192,qwen2.5:14b=32768)
+        name.strip(): int(value)
+        for name, _, value in (
+            item.rpartition('=') for item in os.getenv('CONTEXT_MODEL_TOKENS', '').split(',') if '=' in item
+        )
+    }
+    CONTEXT_RESPONSE_RESERVE = int(os.getenv('CONTEXT_RESPONSE_RESERVE', 1024))  # 응답용으로 남겨둘 토큰
+    # 잘려나간 이전 대화를 요약해서 대신 보냄 (요약할 때마다 모델을 한 번 더 호출, 기본 사용 안 함)
+    CONTEXT_SUMMARY_ENABLED = str(os.getenv('CONTEXT_SUMMARY_ENABLED', 'False')).lower() in (
+        '1', 'true', 't', 'yes', 'y', 'on'
+    )
+    CONTEXT_SUMMARY_MODEL = os.getenv('CONTEXT_SUMMARY_MODEL', '')  # 비우면 대화 모델 사용
+    CONTEXT_SUMMARY_MAX_TOKENS = int(os.getenv('CONTEXT_SUMMARY_MAX_TOKENS', 400))
+
+    # 대화 보관/정리 (manage.sh maintenance) - 일 단위, 0이면 해당 단계를 건너뜀
+    ARCHIVE_IDLE_DAYS = int(os.getenv('ARCHIVE_IDLE_DAYS', 90))  # 이 기간 동안 쓰지 않은 대화는 압축 보관
+    ARCHIVE_PURGE_DAYS = int(os.getenv('ARCHIVE_PURGE_DAYS', 30))  # 삭제한 지 이 기간이 지난 대화는 완전히 삭제
+    ARCHIVE_COMPRESSION = os.getenv('ARCHIVE_COMPRESSION', 'zstd').lower()  # zstd(zstandard 필요) 또는 gzip
+
+    # 대화 컨텍스트 캐시 (서버 측 메시지 조립용, 바이트 단위)
+    CONTEXT_CACHE_MAX_BYTES = int(os.getenv('CONTEXT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
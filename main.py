@@ -1,25 +1,44 @@
-from flask import Flask, render_template, redirect, url_for, session
+from flask import Flask, Response, abort, render_template, redirect, request, url_for, session
 from config import Config
-from models import db
+from models import db, ensure_schema
 from routes.api import api_bp
 from routes.auth import auth_bp
+from commands import register_commands
+from utils.write_behind import write_queue
+from utils.db_engine import engine_options, configure_sqlite
+from utils.search import ensure_search_index
+from utils.user_cache import user_cache
+from utils.instrumentation import metrics
 
 def create_app():
     """Flask app factory"""
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options())
 
     # SQLAlchemy 초기화
     db.init_app(app)
 
     # DB 테이블 생성
     with app.app_context():
+        configure_sqlite(db.engine)
         db.create_all()
+        ensure_schema()
+        ensure_search_index()
+
+    # DB 쓰기 지연 큐 (채팅 메시지 저장)
+    write_queue.init_app(app)
+
+    # 요청 처리 시간 측정 (Prometheus /metrics)
+    metrics.init_app(app)
 
     # Register blueprints
     app.register_blueprint(api_bp)
     app.register_blueprint(auth_bp)
 
+    # CLI 명령 등록
+    register_commands(app)
+
     @app.route('/')
     def index():
         """Main page (로그인 필수)"""
@@ -43,14 +62,23 @@ def create_app():
         if not session.get('user_id'):
             return redirect(url_for('login'))
 
-        # 관리자 권한 확인
-        from models import User
-        user = User.query.get(session.get('user_id'))
-        if not user or not user.is_admin:
+        # 관리자 권한 확인 (사용자 권한 캐시)
+        user = user_cache.get(session.get('user_id'))
+        if not user or not user['is_admin']:
             return redirect(url_for('index'))
 
         return render_template('admin.html')
 
+    @app.route('/metrics')
+    def prometheus_metrics():
+        """Prometheus 메트릭 (METRICS_TOKEN을 설정하면 Bearer 토큰 필요)"""
+        if not metrics.enabled:
+            abort(404)
+        token = app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            abort(401)
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
     return app
 
 if __name__ == '__main__':
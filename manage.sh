@@ -1,7 +1,7 @@
 #!/bin/bash
 
 # Local LLM WebUI Management Script
-# Usage: ./manage.sh [start|stop|restart|status|logs|install|setup]
+# Usage: ./manage.sh [start|stop|restart|status|logs|install|setup|migrate-images|rebuild-metrics|maintenance]
 
 set -e
 
@@ -210,6 +210,36 @@ logs() {
     tail -f "$LOG_FILE"
 }
 
+# Migrate base64 images in the database to the image store
+migrate_images() {
+    check_venv
+    activate_venv
+
+    print_info "Migrating message images to the image store..."
+    $PYTHON_CMD -m flask --app main migrate-images
+    print_success "Image migration finished"
+}
+
+# Rebuild the analytics rollup tables from stored message metrics
+rebuild_metrics() {
+    check_venv
+    activate_venv
+
+    print_info "Rebuilding metric rollups..."
+    $PYTHON_CMD -m flask --app main rebuild-metrics
+    print_success "Metric rollups rebuilt"
+}
+
+# Archive idle/deleted conversations, purge old deleted ones, remove unused images and VACUUM
+maintenance() {
+    check_venv
+    activate_venv
+
+    print_info "Running database maintenance..."
+    $PYTHON_CMD -m flask --app main maintenance "$@"
+    print_success "Maintenance finished"
+}
+
 # Display help
 help() {
     cat << EOF
@@ -226,6 +256,9 @@ ${YELLOW}Commands:${NC}
     restart       Restart the application
     status        Show application status
     logs          Show application logs (tail -f)
+    migrate-images  Move base64 images from the database to the image store
+    rebuild-metrics Rebuild analytics rollups from stored message metrics
+    maintenance   Archive idle/deleted chats, purge old deleted chats, VACUUM
     help          Show this help message
 
 ${YELLOW}Examples:${NC}
@@ -234,6 +267,7 @@ ${YELLOW}Examples:${NC}
     ./manage.sh status        # Check if running
     ./manage.sh logs          # View logs
     ./manage.sh restart       # Restart the application
+    ./manage.sh maintenance --idle-days 180   # Nightly cleanup (e.g. from cron)
 
 ${YELLOW}Quick Start:${NC}
     1. ./manage.sh install
@@ -267,6 +301,16 @@ case "${1:-help}" in
     logs)
         logs
         ;;
+    migrate-images)
+        migrate_images
+        ;;
+    rebuild-metrics)
+        rebuild_metrics
+        ;;
+    maintenance)
+        shift
+        maintenance "$@"
+        ;;
     help)
         help
         ;;
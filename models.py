@@ -1,7 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
-import bcrypt
 from datetime import datetime
 import json
+from utils.image_store import is_image_hash
+from utils.password_hasher import password_hasher
 
 db = SQLAlchemy()
 
@@ -20,13 +21,16 @@ class User(db.Model):
     conversations = db.relationship('Conversation', backref='user', lazy=True, cascade='all, delete-orphan')
 
     def set_password(self, password: str):
-        """비밀번호를 해싱해서 저장"""
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        """비밀번호를 해싱해서 저장 (해싱 풀이 가득 차면 PasswordHasherBusy)"""
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
-        """비밀번호 확인"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        """비밀번호 확인 (해싱 풀이 가득 차면 PasswordHasherBusy)"""
+        return password_hasher.verify(password, self.password_hash)
+
+    def password_needs_rehash(self) -> bool:
+        """저장된 해시가 현재 BCRYPT_ROUNDS와 다른 cost factor로 만들어졌는지 확인"""
+        return password_hasher.needs_rehash(self.password_hash)
 
     def to_dict(self):
         """딕셔너리로 변환"""
@@ -42,17 +46,26 @@ class User(db.Model):
 class Conversation(db.Model):
     """대화 세션 모델"""
     __tablename__ = 'conversations'
+    __table_args__ = (
+        # 대화 목록 (user_id, is_deleted=0, updated_at 순) / ETag 집계 / since 델타 조회
+        db.Index('ix_conversations_user_id_is_deleted_updated_at', 'user_id', 'is_deleted', 'updated_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     model_used = db.Column(db.String(100), nullable=True)  # 마지막으로 사용한 모델
+    summary = db.Column(db.Text, nullable=True)  # 컨텍스트에서 잘려나간 앞부분 요약
+    summary_message_count = db.Column(db.Integer, nullable=True)  # 요약이 대신하는 앞쪽 메시지 수
     is_deleted = db.Column(db.Boolean, default=False)  # 소프트 삭제
+    is_archived = db.Column(db.Boolean, nullable=True, default=False)  # 메시지가 압축 보관 테이블로 옮겨짐
+    restored_at = db.Column(db.DateTime, nullable=True)  # 보관에서 마지막으로 복원한 시각 (다시 보관 판단용)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # 관계
     messages = db.relationship('Message', backref='conversation', lazy=True, cascade='all, delete-orphan')
+    archive = db.relationship('ConversationArchive', uselist=False, lazy=True, cascade='all, delete-orphan')
 
     def to_dict(self, include_messages=False):
         """딕셔너리로 변환"""
@@ -71,14 +84,19 @@ class Conversation(db.Model):
 class Message(db.Model):
     """메시지 모델"""
     __tablename__ = 'messages'
+    __table_args__ = (
+        # 대화별 키셋 페이지네이션 (conversation_id, id < before_id)
+        db.Index('ix_messages_conversation_id_id', 'conversation_id', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id'), nullable=False)
     role = db.Column(db.String(20), nullable=False)  # 'user' 또는 'assistant'
     content = db.Column(db.Text, nullable=False)
-    image = db.Column(db.Text, nullable=True)  # base64 encoded image
+    image = db.Column(db.Text, nullable=True)  # 이미지 저장소 SHA-256 해시
     model = db.Column(db.String(100), nullable=True)  # 사용된 모델명 (assistant 응답만)
     metrics = db.Column(db.JSON, nullable=True)  # {tokens_per_second, generation_time_sec, ...}
+    cancelled = db.Column(db.Boolean, nullable=True)  # 생성 도중 취소/연결 끊김으로 끝난 부분 응답
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def to_dict(self):
@@ -88,7 +106,73 @@ class Message(db.Model):
             'role': self.role,
             'content': self.content,
             'image': self.image,
+            'image_url': f'/api/images/{self.image}' if is_image_hash(self.image) else None,
             'model': self.model,
             'metrics': self.metrics,
+            'cancelled': bool(self.cancelled),
             'created_at': self.created_at.isoformat()
         }
+
+
+class ConversationArchive(db.Model):
+    """보관된 대화의 메시지 (압축한 JSON, 대화를 다시 열면 messages 테이블로 복원)"""
+    __tablename__ = 'conversation_archives'
+
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id'), primary_key=True)
+    codec = db.Column(db.String(10), nullable=False)  # 'zstd' 또는 'gzip'
+    payload = db.Column(db.LargeBinary, nullable=False)
+    message_count = db.Column(db.Integer, nullable=False)
+    raw_bytes = db.Column(db.Integer, nullable=False)  # 압축 전 크기
+    image_hashes = db.Column(db.JSON, nullable=True)  # 이미지 정리 시 참조 확인용 (압축 해제 없이)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ResponseCacheEntry(db.Model):
+    """채팅 응답 캐시 (모델 + 메시지 + 생성 옵션 해시 -> 응답, LRU)"""
+    __tablename__ = 'response_cache'
+
+    key = db.Column(db.String(64), primary_key=True)  # SHA-256
+    model = db.Column(db.String(100), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    metrics = db.Column(db.JSON, nullable=True)  # 처음 생성할 때의 메트릭
+    size = db.Column(db.Integer, nullable=False)  # 바이트 (용량 한도 계산용)
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class MetricRollup(db.Model):
+    """응답 성능 메트릭 집계 (로그 스케일 히스토그램)
+
+    모델별은 시간 단위, 사용자별은 일 단위로 집계한다 (dimension + key).
+    assistant 메시지를 저장할 때 함께 갱신되며, 분석 API는 Message.metrics JSON 대신 이 테이블을 읽는다.
+    """
+    __tablename__ = 'metric_rollups'
+
+    dimension = db.Column(db.String(10), primary_key=True)  # 'model' 또는 'user'
+    bucket_start = db.Column(db.DateTime, primary_key=True)  # UTC
+    key = db.Column(db.String(100), primary_key=True)  # 모델명 또는 사용자 ID
+    metric = db.Column(db.String(40), primary_key=True)  # tokens_per_second, generation_time_sec, ...
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    min_value = db.Column(db.Float, nullable=True)
+    max_value = db.Column(db.Float, nullable=True)
+    histogram = db.Column(db.JSON, nullable=False, default=dict)  # {구간 번호: 개수}
+
+
+def ensure_schema():
+    """기존 DB에 누락된 컬럼/인덱스 생성 (create_all은 이미 있는 테이블을 변경하지 않음)
+
+    새 컬럼은 NULL 허용 컬럼만 추가한다.
+    """
+    inspector = db.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                with db.engine.begin() as conn:
+                    conn.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
@@ -1,149 +1,566 @@
-from flask import Blueprint, request, jsonify, Response, session, current_app
-from utils.ollama_client import OllamaClient
-from utils.decorators import login_required
+from flask import Blueprint, request, jsonify, Response, session, current_app, send_file
+from utils.backend_router import OllamaRouter
+from utils.ollama_client import abort_response
+from utils.active_streams import active_streams
+from utils.stream_buffer import StreamBuffer, iter_events, parse_last_event_id, sse_event
+from utils.context_cache import ConversationContextCache
+from utils.image_store import ImageStore, decode_base64, is_image_hash
+from utils.image_pipeline import ImageProcessorBusy, image_processor, max_dimension_for
+from utils.archive import restore_conversation
+from utils.model_cache import ModelListCache
+from utils.chat_stream import ChatStreamProcessor, encode_frame
+from utils.context_window import ConversationSummarizer, context_budget, fit_context
+from utils.write_behind import write_queue
+from utils.search import search_conversations
+from utils.response_cache import response_cache, response_cache_key
+from utils.scheduler import scheduler, SchedulerFull
+from utils.pull_jobs import PullJobRegistry
+from utils.instrumentation import DB_COMMIT_DURATION
+from utils.metrics_rollup import ROLLUP_METRICS, query_analytics, record_metrics
+from utils.decorators import login_required, admin_required
 from models import db, Conversation, Message, User
-import json
+from config import Config
+from datetime import datetime, timedelta
+import base64
+import math
+import threading
+import time
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
-ollama = OllamaClient()
+ollama = OllamaRouter(Config.OLLAMA_API_URLS)
+model_cache = ModelListCache(ollama, Config.MODEL_CACHE_TTL, Config.MODEL_CACHE_REFRESH_INTERVAL)
+context_cache = ConversationContextCache(Config.CONTEXT_CACHE_MAX_BYTES)
+pull_jobs = PullJobRegistry(ollama, Config.PULL_JOB_RETENTION, on_complete=model_cache.invalidate)
+image_store = ImageStore(Config.IMAGE_STORE_PATH)
+
+
+def save_summary(conversation_id, summary, count):
+    """대화 요약 저장 (요약 작업 스레드에서 호출, 더 앞선 요약은 덮어쓰지 않음)"""
+    def task():
+        Conversation.query.filter(
+            Conversation.id == conversation_id,
+            db.or_(Conversation.summary_message_count.is_(None), Conversation.summary_message_count < count)
+        ).update(
+            # 요약은 대화 내용이 바뀐 것이 아니므로 목록 순서(updated_at)를 유지
+            {"summary": summary, "summary_message_count": count, "updated_at": Conversation.updated_at},
+            synchronize_session=False
+        )
+    write_queue.submit(task)
+
+
+summarizer = ConversationSummarizer(
+    ollama, scheduler, save_summary, Config.CONTEXT_SUMMARY_MAX_TOKENS, Config.CONTEXT_SUMMARY_MODEL or None
+)
+
+
+IMAGE_BUSY_ERROR = ({"success": False, "message": "이미지 처리 요청이 많습니다. 잠시 후 다시 시도해주세요"}, 503)
+
+
+def _normalize_image(value, model, client_original=None):
+    """업로드 이미지를 모델별 최대 크기로 줄이고 다시 인코딩 - (base64, 바이트, 크기 정보) 반환
+
+    브라우저가 먼저 줄여서 보낸 경우 client_original({bytes, width, height})을 원본 크기로 기록한다.
+    잘못된 이미지면 ValueError, 처리 대기열이 가득 차면 ImageProcessorBusy 발생
+    """
+    data, info = image_processor.process(decode_base64(value), max_dimension_for(model))
+    if isinstance(client_original, dict):
+        for key in ('bytes', 'width', 'height'):
+            original = client_original.get(key)
+            if isinstance(original, int) and original > 0:
+                info[f'original_{key}'] = original
+    return base64.b64encode(data).decode('ascii'), data, info
+
+
+def _to_context_message(role, content, image=None):
+    """Ollama messages 형식으로 변환"""
+    entry = {"role": role, "content": content}
+    if image:
+        entry["images"] = [image]
+    return entry
+
+
+def _load_context(conversation_id):
+    """대화 컨텍스트 조회 (캐시 우선, 없으면 DB에서 조립)"""
+    messages = context_cache.get(conversation_id)
+    if messages is None:
+        rows = Message.query.filter_by(
+            conversation_id=conversation_id
+        ).order_by(Message.id).all()
+        messages = [
+            _to_context_message(m.role, m.content, image_store.resolve_base64(m.image))
+            for m in rows
+        ]
+        context_cache.set(conversation_id, messages)
+    return messages
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
-    """Ollama 서버 연결 확인"""
-    result = ollama.check_connection()
+    """Ollama 서버 연결 확인 (캐시)"""
+    result = model_cache.health()
     return jsonify(result)
 
 @api_bp.route('/models', methods=['GET'])
 @login_required
 def get_models():
-    """모델 목록 조회"""
-    result = ollama.get_models()
-    return jsonify(result)
-
-@api_bp.route('/chat', methods=['POST'])
-@login_required
-def chat():
-    """채팅 (스트리밍) - 메시지 저장 포함"""
-    data = request.json
+    """모델 목록 조회 (캐시)"""
+    result = model_cache.get()
+    # 브라우저가 업로드 전에 이미지를 줄일 기준 (서버도 같은 기준으로 다시 확인)
+    return jsonify(dict(result, image_max_dimension={
+        "default": Config.IMAGE_MAX_DIMENSION,
+        "models": Config.IMAGE_MODEL_MAX_DIMENSION
+    }))
+
+def prepare_chat(user_id, data):
+    """채팅 요청 검증 및 컨텍스트 조립 (WSGI/ASGI 공용, 앱 컨텍스트 필요)
+
+    conversation_id가 있으면 새 사용자 메시지(user_message)만 받고
+    이전 대화 내용은 서버에서 조립한다. 없으면 messages 전체를 그대로 사용.
+    options는 Ollama 생성 옵션, cache=false면 응답 캐시를 사용하지 않는다.
+    성공하면 (요청 정보, None), 실패하면 (None, (응답 데이터, 상태 코드)) 반환
+    """
     model = data.get('model')
     messages = data.get('messages', [])
     conversation_id = data.get('conversation_id')
     user_message = data.get('user_message')  # 사용자 메시지와 이미지
+    options = data.get('options')
 
     if not model:
-        return jsonify({"success": False, "message": "모델을 선택해주세요"}), 400
+        return None, ({"success": False, "message": "모델을 선택해주세요"}, 400)
 
-    if not messages:
-        return jsonify({"success": False, "message": "메시지가 필요합니다"}), 400
+    if options is not None and not isinstance(options, dict):
+        return None, ({"success": False, "message": "options는 객체여야 합니다"}, 400)
+
+    if conversation_id:
+        if not user_message or not (user_message.get('content') or user_message.get('image')):
+            return None, ({"success": False, "message": "메시지가 필요합니다"}, 400)
+    elif not messages:
+        return None, ({"success": False, "message": "메시지가 필요합니다"}, 400)
 
     # 대화 조회 및 권한 확인
-    conversation = None
     conv_id = None
+    summary, summary_count = None, 0
     if conversation_id:
         conversation = Conversation.query.filter_by(
             id=conversation_id,
-            user_id=session.get('user_id')
+            user_id=user_id
         ).first()
         if not conversation:
-            return jsonify({"success": False, "message": "대화를 찾을 수 없습니다"}), 404
+            return None, ({"success": False, "message": "대화를 찾을 수 없습니다"}, 404)
+
+        # 보관된 대화면 메시지를 먼저 복원
+        restore_conversation(conversation)
 
         # conversation.id를 미리 저장 (세션 종료 후 접근 방지)
         conv_id = conversation.id
-
-    # 사용자 메시지 먼저 저장
-    if conversation and user_message:
-        user_msg = Message(
-            conversation_id=conv_id,
-            role='user',
-            content=user_message.get('content', ''),
-            image=user_message.get('image')
+        summary = conversation.summary
+        summary_count = conversation.summary_message_count or 0
+
+        # 이전 컨텍스트 조립 후 사용자 메시지 저장 (이미지는 모델별 최대 크기로 줄여서 저장/전송)
+        user_content = user_message.get('content', '')
+        user_image = user_message.get('image')
+        image_hash = None
+        image_info = None
+        if user_image:
+            try:
+                user_image, image_bytes, image_info = _normalize_image(
+                    user_image, model, user_message.get('image_original')
+                )
+            except ValueError as e:
+                return None, ({"success": False, "message": str(e)}, 400)
+            except ImageProcessorBusy:
+                return None, IMAGE_BUSY_ERROR
+            image_hash = image_store.save_bytes(image_bytes)
+
+        messages = _load_context(conv_id)
+
+        # 저장은 쓰기 지연 큐로 (AI 응답과 같은 큐라서 순서 보장)
+        def save_user_message():
+            db.session.add(Message(
+                conversation_id=conv_id,
+                role='user',
+                content=user_content,
+                image=image_hash,
+                metrics={"image": image_info} if image_info else None
+            ))
+        write_queue.submit(save_user_message)
+
+        user_entry = _to_context_message('user', user_content, user_image)
+        context_cache.append(conv_id, user_entry)
+        messages.append(user_entry)
+    else:
+        # 대화 없이 보낸 messages의 이미지도 같은 기준으로 줄임
+        normalized = []
+        for message in messages:
+            images = message.get('images') if isinstance(message, dict) else None
+            if images:
+                try:
+                    message = dict(message, images=[_normalize_image(image, model)[0] for image in images])
+                except ValueError as e:
+                    return None, ({"success": False, "message": str(e)}, 400)
+                except ImageProcessorBusy:
+                    return None, IMAGE_BUSY_ERROR
+            normalized.append(message)
+        messages = normalized
+
+    # 컨텍스트 길이 예산에 맞게 앞부분을 잘라냄 (대화 모드에서 요약을 켜면 잘린 부분은 요약으로 대신)
+    summarize = bool(conv_id) and Config.CONTEXT_SUMMARY_ENABLED
+    plan = fit_context(
+        messages,
+        context_budget(model, options),
+        summary=summary if summarize else None,
+        summary_count=summary_count,
+        summary_reserve=Config.CONTEXT_SUMMARY_MAX_TOKENS if summarize else 0
+    )
+    summary_job = None
+    if summarize and plan['cut'] > summary_count:
+        summary_job = (summary, messages[summary_count:plan['cut']], plan['cut'])
+    messages = plan['messages']
+
+    # 응답 캐시 조회 (같은 모델/메시지/옵션으로 완료된 응답이 있으면 재생)
+    cache_key = None
+    cached = None
+    if data.get('cache', True) is not False and response_cache.enabled_for(model):
+        cache_key = response_cache_key(model, messages, options)
+        cached = response_cache.lookup(cache_key)
+
+    return {
+        "user_id": user_id,
+        "model": model,
+        "messages": messages,
+        "conversation_id": conv_id,
+        "options": options,
+        "cache_key": cache_key,
+        "cached": cached,
+        "summary_job": summary_job
+    }, None
+
+def persist_reply(user_id, conversation_id, model, content, metrics, cancelled=False):
+    """AI 응답 저장 (스트림 종료/중단 시 서버에서 호출, 커밋은 쓰기 지연 큐, 메트릭 집계 포함)
+
+    cancelled: 취소 요청/연결 끊김으로 생성 도중 끝난 부분 응답
+    """
+    context_cache.append(conversation_id, _to_context_message('assistant', content))
+
+    def save_assistant_message():
+        created_at = datetime.utcnow()
+        db.session.add(Message(
+            conversation_id=conversation_id,
+            role='assistant',
+            content=content,
+            model=model,
+            metrics=metrics if metrics else None,
+            cancelled=cancelled or None,
+            created_at=created_at
+        ))
+        record_metrics(user_id, model, metrics, created_at)
+        Conversation.query.filter_by(id=conversation_id).update(
+            {"model_used": model, "updated_at": datetime.utcnow()},
+            synchronize_session=False
         )
-        db.session.add(user_msg)
-        db.session.commit()
+    write_queue.submit(save_assistant_message)
+
+def replay_cached(chat_request):
+    """캐시된 응답을 NDJSON 스트림으로 재생 (WSGI/ASGI 공용, 대화에 속하면 응답 저장)"""
+    model = chat_request['model']
+    cached = chat_request['cached']
+    processor = ChatStreamProcessor(model, chat_request['conversation_id'])
+    for frame in processor.replay(cached['content'], cached['metrics']):
+        yield encode_frame(frame)
+    finish_reply(chat_request, processor)
+    yield encode_frame(processor.final_frame())
+
+
+def finish_reply(chat_request, processor):
+    """스트림 종료 처리 - 응답 저장, 완료된 응답은 응답 캐시에 저장"""
+    conversation_id = chat_request['conversation_id']
+    content = processor.full_content
+    if not content:
+        return
+    if conversation_id:
+        persist_reply(chat_request['user_id'], conversation_id, chat_request['model'], content, processor.metrics,
+                      cancelled=processor.cancelled)
+    if chat_request['cache_key'] and processor.done and not processor.cached:
+        response_cache.store(chat_request['cache_key'], chat_request['model'], content, processor.metrics)
+    if chat_request['summary_job']:
+        # 응답이 끝난 뒤에 요약 (같은 Ollama에서 현재 응답과 경쟁하지 않도록)
+        previous, messages, count = chat_request['summary_job']
+        summarizer.submit(conversation_id, chat_request['model'], previous, messages, count)
+
+def enqueue_chat(chat_request):
+    """스케줄러 대기열에 추가 - (ticket, error) 반환 (WSGI/ASGI 공용)"""
+    try:
+        return scheduler.enqueue(chat_request['model']), None
+    except SchedulerFull:
+        return None, ({"success": False, "message": "요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요"}, 503)
+
+
+def queued_frame(position):
+    """대기 순서 알림 프레임"""
+    return encode_frame({"success": True, "queued": True, "position": position, "done": False})
+
+
+QUEUE_TIMEOUT_FRAME = {"success": False, "message": "대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요"}
+
+
+# 스트리밍 응답 헤더 - 프록시(nginx 등)가 모아서 보내지 않도록 해서 첫 바이트가 바로 도착하게 함
+STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+def wants_event_stream(accept):
+    """Accept 헤더가 SSE(text/event-stream)를 요청하는지 - 이어 받을 수 있는 스트림으로 응답"""
+    return 'text/event-stream' in (accept or '')
+
+
+def open_stream(chat_request, ticket, resumable=False):
+    """취소할 수 있는 스트림으로 등록 (WSGI/ASGI 공용, 취소되면 스케줄러 자리를 바로 반납)
+
+    클라이언트는 응답 헤더 X-Stream-Id의 값으로 POST /api/chat/<stream_id>/cancel을 호출한다.
+    resumable이면 프레임을 링 버퍼에 보관해서 GET /api/chat/<stream_id>/events로 이어 받을 수 있고,
+    연결이 끊겨도 STREAM_RESUME_TIMEOUT 동안 재연결이 없을 때만 생성을 멈춘다.
+    """
+    buffer = None
+    if resumable:
+        buffer = StreamBuffer(Config.STREAM_RESUME_BUFFER_FRAMES, Config.STREAM_RESUME_TIMEOUT)
+    stream = active_streams.open(
+        chat_request['user_id'], chat_request['conversation_id'], chat_request['model'], buffer
+    )
+    if buffer is not None:
+        buffer.on_abandoned = lambda: stream.cancel('disconnect')
+    stream.on_cancel(lambda: scheduler.release(ticket))
+    chat_request['stream'] = stream
+    return stream
+
+
+def cancelled_frame(chat_request):
+    """취소된 스트림의 최종 프레임 (응답을 받는 중이었으면 그때까지의 내용 기준)"""
+    processor = chat_request.get('processor') or ChatStreamProcessor(
+        chat_request['model'], chat_request['conversation_id']
+    )
+    processor.cancelled = True
+    return encode_frame(processor.final_frame())
+
+
+def wait_for_turn(ticket, stream=None):
+    """실행 허가를 기다리는 동안 대기 순서 프레임 전송 (시간 초과 시 에러 프레임, 취소되면 종료)"""
+    deadline = time.monotonic() + Config.SCHEDULER_QUEUE_TIMEOUT
+    last_position = None
+    while not ticket.granted:
+        if stream is not None and stream.cancelled:
+            return
+        position = scheduler.position(ticket)
+        if position and position != last_position:
+            last_position = position
+            yield queued_frame(position)
+        if ticket.wait(Config.SCHEDULER_POSITION_INTERVAL):
+            return
+        if time.monotonic() >= deadline:
+            yield encode_frame(QUEUE_TIMEOUT_FRAME)
+            return
+
+@api_bp.route('/chat', methods=['POST'])
+@login_required
+def chat():
+    """채팅 (스트리밍) - 메시지 저장 포함"""
+    chat_request, error = prepare_chat(session.get('user_id'), request.json or {})
+    if error:
+        payload, status = error
+        return jsonify(payload), status
+
+    resumable = wants_event_stream(request.headers.get('Accept'))
+    if chat_request['cached']:
+        frames = replay_cached(chat_request)
+        if resumable:
+            return Response((sse_event(seq, frame) for seq, frame in enumerate(frames, 1)),
+                            mimetype='text/event-stream', headers=STREAM_HEADERS)
+        return Response(frames, mimetype='application/x-ndjson', headers=STREAM_HEADERS)
+
+    ticket, error = enqueue_chat(chat_request)
+    if error:
+        payload, status = error
+        return jsonify(payload), status
+
+    model = chat_request['model']
+    messages = chat_request['messages']
+    conv_id = chat_request['conversation_id']
+    stream = open_stream(chat_request, ticket, resumable)
 
     def generate():
-        """스트리밍 응답 생성"""
-        result = ollama.chat(model, messages, stream=True)
+        """스트리밍 응답 생성 (차례가 올 때까지 대기 순서 전송)"""
+        try:
+            yield from wait_for_turn(ticket, stream)
+            if stream.cancelled:
+                yield cancelled_frame(chat_request)
+            elif ticket.granted:
+                yield from stream_reply()
+        except GeneratorExit:
+            # 대기 중 클라이언트 연결 끊김 (대기 순서 프레임을 쓸 때 감지됨, 응답 중이면 stream_reply에서 처리)
+            if 'processor' not in chat_request:
+                stream.cancel('disconnect')
+            raise
+        finally:
+            scheduler.release(ticket)
+            active_streams.close(stream)
+
+    def stream_reply():
+        result = ollama.chat(model, messages, stream=True, options=chat_request['options'])
 
         if not result.get('success'):
-            yield json.dumps({"success": False, "message": result.get('message', '알 수 없는 에러')}) + '\n'
+            yield encode_frame({"success": False, "message": result.get('message', '알 수 없는 에러')})
             return
 
         response = result.get('response')
         if response is None:
-            yield json.dumps({"success": False, "message": "응답이 없습니다"}) + '\n'
+            yield encode_frame({"success": False, "message": "응답이 없습니다"})
             return
 
+        # 취소되면 다른 스레드(취소 요청)에서 Ollama 연결을 바로 끊음 - 아래 읽기가 에러로 끝남
+        stream.on_cancel(lambda: abort_response(response))
+
         # Ollama 스트리밍 응답을 클라이언트에 전달
-        full_content = ''
-        metrics = {}
+        processor = ChatStreamProcessor(model, conv_id)
+        chat_request['processor'] = processor
         try:
             for line in response.iter_lines(decode_unicode=True):
-                if line:
-                    try:
-                        chunk = json.loads(line)
-                        # Ollama 응답은 message.content 형식
-                        message = chunk.get('message', {})
-                        response_text = message.get('content', '')
-                        full_content += response_text
-
-                        # 응답 데이터 구성
-                        response_data = {
-                            "success": True,
-                            "chunk": response_text,
-                            "done": chunk.get('done', False)
-                        }
-
-                        # done이 true일 때 성능 메트릭 포함
-                        if chunk.get('done', False):
-                            metrics = {}
-
-                            # 토큰 속도 계산 (tokens/sec)
-                            eval_count = chunk.get('eval_count', 0)
-                            eval_duration = chunk.get('eval_duration', 0)
-                            if eval_count > 0 and eval_duration > 0:
-                                tokens_per_sec = eval_count / (eval_duration / 1e9)
-                                metrics['tokens_per_second'] = round(tokens_per_sec, 2)
-
-                            # 생성 시간 (초)
-                            if eval_duration > 0:
-                                metrics['generation_time_sec'] = round(eval_duration / 1e9, 2)
-
-                            # 프롬프트 처리 시간 (초)
-                            prompt_eval_duration = chunk.get('prompt_eval_duration', 0)
-                            if prompt_eval_duration > 0:
-                                metrics['prompt_processing_time_sec'] = round(prompt_eval_duration / 1e9, 2)
-
-                            # 모델 로드 시간 (초)
-                            load_duration = chunk.get('load_duration', 0)
-                            if load_duration > 0:
-                                metrics['load_time_sec'] = round(load_duration / 1e9, 2)
-
-                            if metrics:
-                                response_data['metrics'] = metrics
-
-                        yield json.dumps(response_data) + '\n'
-                    except json.JSONDecodeError as e:
-                        continue
+                frame = processor.process_line(line)
+                if frame:
+                    yield encode_frame(frame)
+            # done 없이 끝난 경우 남은 토큰 전송
+            frame = processor.flush_pending()
+            if frame:
+                yield encode_frame(frame)
+        except GeneratorExit:
+            # 클라이언트 연결 끊김 (다음 프레임을 쓸 때 감지됨)
+            if not processor.done:
+                stream.cancel('disconnect')
+            raise
         except Exception as e:
-            yield json.dumps({"success": False, "message": str(e)}) + '\n'
+            if not stream.cancelled:
+                yield encode_frame({"success": False, "message": str(e)})
+        finally:
+            # 정상 종료든 취소/연결 끊김(GeneratorExit)이든 응답 저장
+            processor.cancelled = stream.cancelled and not processor.done
+            response.close()
+            finish_reply(chat_request, processor)
+
+        yield encode_frame(processor.final_frame())
+
+    if resumable:
+        # 생성은 별도 스레드에서 버퍼로, 응답은 버퍼에서 읽음 (연결이 끊겨도 생성은 계속)
+        threading.Thread(
+            target=_produce, args=(generate(), stream.buffer), name=f'chat-stream-{stream.id[:8]}', daemon=True
+        ).start()
+        streamed = event_stream_response(stream, 0)
+        streamed.headers['X-Stream-Id'] = stream.id
+        return streamed
+
+    streamed = Response(generate(), mimetype='application/x-ndjson', headers=STREAM_HEADERS)
+    streamed.headers['X-Stream-Id'] = stream.id
+    # 스트림을 시작하기 전에 연결이 끊겨도 자리 반납
+    streamed.call_on_close(lambda: scheduler.release(ticket))
+    streamed.call_on_close(lambda: active_streams.close(stream))
+    return streamed
+
+
+def event_stream_response(stream, after):
+    """스트림 버퍼를 SSE로 보내는 응답 (읽는 연결은 응답을 만들 때 등록하고 응답이 닫힐 때 해제)
+
+    본문을 읽기 전에 연결이 끊겨도 WSGI 서버가 close()를 부르므로 재연결 대기 시간이 지나면 생성이 멈춘다.
+    """
+    stream.buffer.attach()
+    response = Response(
+        iter_events(stream.buffer, after, Config.STREAM_KEEPALIVE_SECONDS),
+        mimetype='text/event-stream',
+        headers=STREAM_HEADERS
+    )
+    response.call_on_close(stream.buffer.detach)
+    return response
 
-        # 최종 응답 완료 신호 (클라이언트에서 저장하도록)
-        yield json.dumps({
-            "success": True,
-            "done": True,
-            "full_content": full_content,
-            "metrics": metrics,
-            "conversation_id": conv_id,
-            "model": model
-        }) + '\n'
 
-    return Response(generate(), mimetype='application/x-ndjson')
+def _produce(frames, buffer):
+    """생성 스레드 - 프레임을 버퍼에 쌓음"""
+    try:
+        for frame in frames:
+            buffer.append(frame)
+    finally:
+        buffer.close()
+
+
+@api_bp.route('/chat/<stream_id>/events', methods=['GET'])
+@login_required
+def resume_chat(stream_id):
+    """끊긴 스트림 이어 받기 (SSE, Last-Event-ID 헤더 또는 ?last_event_id= 다음 프레임부터)
+
+    생성 중이면 남은 프레임을 이어서 보내고, 끝났으면 STREAM_RESUME_RETENTION 동안 마지막까지 받을 수 있다.
+    """
+    stream = active_streams.get(stream_id, session.get('user_id'))
+    if stream is None or stream.buffer is None:
+        return jsonify({"success": False, "message": "이어 받을 스트림을 찾을 수 없습니다"}), 404
+    after = parse_last_event_id(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    return event_stream_response(stream, after)
+
+
+@api_bp.route('/chat/<stream_id>/cancel', methods=['POST'])
+@login_required
+def cancel_chat(stream_id):
+    """진행 중인 응답 생성 취소 (Ollama 연결을 끊고 그때까지의 응답을 cancelled로 저장)"""
+    stream = active_streams.cancel(stream_id, session.get('user_id'))
+    if stream is None:
+        return jsonify({"success": False, "message": "진행 중인 응답을 찾을 수 없습니다"}), 404
+    return jsonify({"success": True, "stream": stream.to_dict()})
+
+@api_bp.route('/scheduler', methods=['GET'])
+@admin_required
+def scheduler_stats():
+    """채팅 스케줄러 상태 (관리자 전용)"""
+    return jsonify({"success": True, "scheduler": scheduler.stats(), "streams": active_streams.stats()})
+
+@api_bp.route('/analytics', methods=['GET'])
+@admin_required
+def analytics():
+    """응답 성능 분석 - 그룹별 p50/p95/p99 (관리자 전용, 메트릭 집계 테이블 사용)
+
+    ?group=model|user|time&days=7&bucket=day|hour&model=&user_id=&metric=tokens_per_second,...
+    """
+    group = request.args.get('group', 'model')
+    bucket = request.args.get('bucket', 'day')
+    if group not in ('model', 'user', 'time') or bucket not in ('day', 'hour'):
+        return jsonify({"success": False, "message": "group은 model/user/time, bucket은 day/hour 중 하나여야 합니다"}), 400
+    days = request.args.get('days', 7, type=float)
+    if not math.isfinite(days):
+        return jsonify({"success": False, "message": "days는 숫자여야 합니다"}), 400
+    days = min(max(days, 0), 366)
+    metrics = [name for name in request.args.get('metric', '').split(',') if name] or ROLLUP_METRICS
+    since = datetime.utcnow() - timedelta(days=days)
+
+    try:
+        rows = query_analytics(
+            group,
+            since,
+            bucket=bucket,
+            model=request.args.get('model') or None,
+            user_id=request.args.get('user_id', type=int),
+            metrics=metrics
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify({
+        "success": True,
+        "group": group,
+        "bucket": bucket,
+        "since": since.isoformat(),
+        "rows": rows
+    })
+
+@api_bp.route('/backends', methods=['GET'])
+@admin_required
+def backend_stats():
+    """Ollama 서버별 상태 - 연결, 모델, 진행 중인 스트림, 생성 속도 (관리자 전용)"""
+    return jsonify({"success": True, "backends": ollama.stats()})
 
 @api_bp.route('/save-message', methods=['POST'])
 @login_required
 def save_message():
-    """AI 응답 메시지 저장 (클라이언트에서 호출)"""
+    """AI 응답 메시지 저장 (이전 클라이언트 호환용, 현재는 /api/chat이 직접 저장)"""
     data = request.json
     conversation_id = data.get('conversation_id')
     full_content = data.get('content', '')
@@ -158,22 +575,28 @@ def save_message():
 
         if not conversation:
             return jsonify({"success": False, "message": "대화를 찾을 수 없습니다"}), 404
+        restore_conversation(conversation)
 
         # AI 응답 저장
+        created_at = datetime.utcnow()
         assistant_msg = Message(
             conversation_id=conversation.id,
             role='assistant',
             content=full_content,
             model=model,
-            metrics=metrics if metrics else None
+            metrics=metrics if metrics else None,
+            created_at=created_at
         )
         db.session.add(assistant_msg)
+        record_metrics(conversation.user_id, model, metrics, created_at)
 
         # 대화 업데이트
         conversation.model_used = model
-        conversation.updated_at = db.func.now()
+        conversation.updated_at = datetime.utcnow()
 
-        db.session.commit()
+        with DB_COMMIT_DURATION.labels('save_message').time():
+            db.session.commit()
+        context_cache.append(conversation.id, _to_context_message('assistant', full_content))
 
         return jsonify({
             "success": True,
@@ -186,18 +609,87 @@ def save_message():
             "message": f"저장 실패: {str(e)}"
         }), 500
 
+@api_bp.route('/images/<image_hash>', methods=['GET'])
+@login_required
+def get_image(image_hash):
+    """이미지 조회 (해시 기반, ETag/Range 지원, 브라우저 캐시 가능)"""
+    if not is_image_hash(image_hash) or not image_store.exists(image_hash):
+        return jsonify({"success": False, "message": "이미지를 찾을 수 없습니다"}), 404
+
+    response = send_file(
+        image_store.path(image_hash),
+        mimetype=image_store.mimetype(image_hash),
+        etag=image_hash,
+        conditional=True,
+        max_age=31536000
+    )
+    # 해시가 곧 내용이므로 변경되지 않음
+    response.cache_control.private = True
+    response.cache_control.public = False
+    response.cache_control.immutable = True
+    return response
+
 @api_bp.route('/pull', methods=['POST'])
 @login_required
 def pull_model():
-    """모델 다운로드"""
+    """모델 다운로드 시작 (백그라운드 작업, 진행 상황은 GET /api/pull/<job_id>)"""
     data = request.json
     model_name = data.get('model')
 
     if not model_name:
         return jsonify({"success": False, "message": "모델명을 입력해주세요"}), 400
 
-    result = ollama.pull_model(model_name)
-    return jsonify(result)
+    job, created = pull_jobs.start(model_name)
+    return jsonify({
+        "success": True,
+        "created": created,  # False면 이미 진행 중인 같은 모델 다운로드
+        "message": f"모델 '{model_name}' 다운로드를 시작했습니다" if created else f"모델 '{model_name}'을 이미 다운로드 중입니다",
+        "job": job.to_dict()
+    }), 202
+
+@api_bp.route('/pull', methods=['GET'])
+@login_required
+def list_pull_jobs():
+    """진행 중이거나 최근에 끝난 다운로드 작업 목록"""
+    return jsonify({"success": True, "jobs": [job.to_dict() for job in pull_jobs.list()]})
+
+@api_bp.route('/pull/<job_id>', methods=['GET'])
+@login_required
+def pull_progress(job_id):
+    """다운로드 진행 상황 (?stream=1이면 NDJSON으로 변경될 때마다 전송)
+
+    스트리밍은 PULL_PROGRESS_STREAM_SECONDS가 지나면 끝나므로 클라이언트가 다시 요청한다
+    (다운로드가 오래 걸려도 웹 워커를 오래 점유하지 않도록).
+    """
+    job = pull_jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "다운로드 작업을 찾을 수 없습니다"}), 404
+
+    if not request.args.get('stream'):
+        return jsonify({"success": True, "job": job.to_dict()})
+
+    def generate():
+        deadline = time.monotonic() + Config.PULL_PROGRESS_STREAM_SECONDS
+        while True:
+            snapshot = job.to_dict()
+            yield encode_frame(snapshot)
+            remaining = deadline - time.monotonic()
+            if not job.active or remaining <= 0:
+                return
+            job.wait_for_change(snapshot['version'], remaining)
+            # 상태 줄이 많이 와도 일정 간격으로만 전송
+            time.sleep(min(Config.PULL_PROGRESS_INTERVAL, max(0.0, deadline - time.monotonic())))
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@api_bp.route('/pull/<job_id>', methods=['DELETE'])
+@login_required
+def cancel_pull(job_id):
+    """다운로드 취소"""
+    job = pull_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "다운로드 작업을 찾을 수 없습니다"}), 404
+    return jsonify({"success": True, "job": job.to_dict()})
 
 @api_bp.route('/delete', methods=['POST'])
 @login_required
@@ -210,24 +702,110 @@ def delete_model():
         return jsonify({"success": False, "message": "모델명을 입력해주세요"}), 400
 
     result = ollama.delete_model(model_name)
+    model_cache.invalidate()
     return jsonify(result)
 
 
 # ============ 대화 이력 관련 API ============
 
+# 델타 조회는 since보다 조금 앞부터 다시 보냄 (조회 시점에 아직 커밋되지 않았던 변경을 놓치지 않도록)
+CONVERSATION_SYNC_OVERLAP = timedelta(seconds=5)
+_CONVERSATION_LIST_COLUMNS = (
+    Conversation.id,
+    Conversation.title,
+    Conversation.model_used,
+    Conversation.created_at,
+    Conversation.updated_at
+)
+
+
+def _conversation_row_to_dict(row):
+    """목록 조회 결과(컬럼 튜플)를 Conversation.to_dict() 형식으로 변환"""
+    return {
+        'id': row.id,
+        'title': row.title,
+        'model_used': row.model_used,
+        'created_at': row.created_at.isoformat(),
+        'updated_at': row.updated_at.isoformat()
+    }
+
+
+def _conversation_list_etag(user_id):
+    """사용자 대화 목록 버전 (생성/수정/삭제 시 updated_at이 바뀜) - (ETag, sync_token) 반환"""
+    total, last_updated = db.session.query(
+        db.func.count(Conversation.id),
+        db.func.max(Conversation.updated_at)
+    ).filter(Conversation.user_id == user_id).one()
+    sync_token = last_updated.isoformat() if last_updated else None
+    return f'{user_id}-{total}-{sync_token or 0}', sync_token
+
+
 @api_bp.route('/conversations', methods=['GET'])
 @login_required
 def get_conversations():
-    """사용자의 모든 대화 목록 조회 (최신순)"""
+    """사용자의 대화 목록 조회 (최신순)
+
+    If-None-Match가 현재 ETag와 같으면 304를 반환한다.
+    since(이전 응답의 sync_token)가 있으면 그 뒤에 바뀐 대화와 삭제된 대화 id만 반환한다.
+    """
     user_id = session.get('user_id')
-    conversations = Conversation.query.filter_by(
-        user_id=user_id,
-        is_deleted=False
-    ).order_by(Conversation.updated_at.desc()).all()
+    etag, sync_token = _conversation_list_etag(user_id)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        since = request.args.get('since')
+        if since:
+            try:
+                since_time = datetime.fromisoformat(since) - CONVERSATION_SYNC_OVERLAP
+            except ValueError:
+                return jsonify({"success": False, "message": "잘못된 since 값입니다"}), 400
+
+            rows = db.session.query(*_CONVERSATION_LIST_COLUMNS, Conversation.is_deleted).filter(
+                Conversation.user_id == user_id,
+                Conversation.is_deleted.in_([False, True]),
+                Conversation.updated_at > since_time
+            ).order_by(Conversation.updated_at.desc()).all()
+            payload = {
+                "success": True,
+                "delta": True,
+                "conversations": [_conversation_row_to_dict(row) for row in rows if not row.is_deleted],
+                "deleted_ids": [row.id for row in rows if row.is_deleted],
+                "sync_token": sync_token
+            }
+        else:
+            rows = db.session.query(*_CONVERSATION_LIST_COLUMNS).filter_by(
+                user_id=user_id,
+                is_deleted=False
+            ).order_by(Conversation.updated_at.desc()).all()
+            payload = {
+                "success": True,
+                "conversations": [_conversation_row_to_dict(row) for row in rows],
+                "sync_token": sync_token
+            }
+        response = jsonify(payload)
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@api_bp.route('/search', methods=['GET'])
+@login_required
+def search():
+    """대화 검색 (제목/메시지 전문 검색, 관련도 순 스니펫)"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"success": False, "message": "검색어를 입력해주세요"}), 400
+
+    limit = request.args.get('limit', Config.SEARCH_RESULT_LIMIT, type=int)
+    limit = max(1, min(limit, Config.SEARCH_RESULT_LIMIT))
+    results = search_conversations(session.get('user_id'), query, limit)
 
     return jsonify({
         "success": True,
-        "conversations": [conv.to_dict() for conv in conversations]
+        "query": query,
+        "results": results
     })
 
 
@@ -258,7 +836,10 @@ def create_conversation():
 @api_bp.route('/conversations/<int:conversation_id>', methods=['GET'])
 @login_required
 def get_conversation(conversation_id):
-    """특정 대화 조회 (메시지 포함)"""
+    """특정 대화 조회 (메시지는 최신 페이지부터 키셋 페이지네이션)
+
+    Query: before_id - 이 id보다 이전 메시지 조회, limit - 페이지 크기
+    """
     user_id = session.get('user_id')
     conversation = Conversation.query.filter_by(
         id=conversation_id,
@@ -268,10 +849,29 @@ def get_conversation(conversation_id):
 
     if not conversation:
         return jsonify({"success": False, "message": "대화를 찾을 수 없습니다"}), 404
+    restore_conversation(conversation)  # 보관된 대화는 열 때 복원
+
+    before_id = request.args.get('before_id', type=int)
+    limit = request.args.get('limit', Config.MESSAGE_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, Config.MESSAGE_PAGE_MAX))
+
+    query = Message.query.filter(Message.conversation_id == conversation.id)
+    if before_id:
+        query = query.filter(Message.id < before_id)
+    # 한 개 더 조회해서 이전 페이지 존재 여부 판단
+    rows = query.order_by(Message.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    rows.reverse()  # 페이지 내에서는 오래된 순
+
+    data = conversation.to_dict()
+    data['messages'] = [msg.to_dict() for msg in rows]
 
     return jsonify({
         "success": True,
-        "conversation": conversation.to_dict(include_messages=True)
+        "conversation": data,
+        "has_more": has_more,
+        "next_before_id": rows[0].id if rows and has_more else None
     })
 
 
@@ -290,6 +890,7 @@ def delete_conversation(conversation_id):
 
     conversation.is_deleted = True
     db.session.commit()
+    context_cache.invalidate(conversation_id)
 
     return jsonify({"success": True, "message": "대화가 삭제되었습니다"})
 
@@ -1,23 +1,34 @@
+import math
 from flask import Blueprint, request, jsonify, session
 from models import db, User
-from utils.decorators import login_required
+from config import Config
+from utils.decorators import login_required, admin_required
+from utils.user_cache import user_cache
+from utils.response_cache import response_cache
+from utils.password_hasher import PasswordHasherBusy
+from utils.rate_limit import TokenBucketLimiter
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
+# 로그인/가입 시도 제한 (비밀번호 대입 공격과 bcrypt 연산 폭주 방지)
+user_login_limiter = TokenBucketLimiter(Config.LOGIN_RATE_USER_BURST, Config.LOGIN_RATE_USER_PER_MINUTE)
+ip_login_limiter = TokenBucketLimiter(Config.LOGIN_RATE_IP_BURST, Config.LOGIN_RATE_IP_PER_MINUTE)
 
-def admin_required(f):
-    """관리자 권한 필요 데코레이터"""
-    def decorated_function(*args, **kwargs):
-        user_id = session.get('user_id')
-        if not user_id:
-            return jsonify({"success": False, "message": "로그인이 필요합니다"}), 401
 
-        user = User.query.get(user_id)
-        if not user or not user.is_admin:
-            return jsonify({"success": False, "message": "관리자 권한이 필요합니다"}), 403
+def _retry_later(message, status, retry_after):
+    """429/503 응답 (Retry-After 헤더 포함)"""
+    response = jsonify({"success": False, "message": message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _too_many_attempts(retry_after):
+    return _retry_later("로그인 시도가 너무 많습니다. 잠시 후 다시 시도해주세요", 429, retry_after)
+
+
+def _server_busy():
+    return _retry_later("요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요", 503, 1)
 
-        return f(*args, **kwargs)
-    decorated_function.__name__ = f.__name__
-    return decorated_function
 
 @auth_bp.route('/login', methods=['POST'])
 def login():
@@ -29,14 +40,35 @@ def login():
     if not username or not password:
         return jsonify({"success": False, "message": "사용자명과 비밀번호를 입력해주세요"}), 400
 
+    retry_after = max(
+        ip_login_limiter.acquire(request.remote_addr or '-'),
+        user_login_limiter.acquire(username.lower())
+    )
+    if retry_after:
+        return _too_many_attempts(retry_after)
+
     user = User.query.filter_by(username=username).first()
+    # bcrypt 검증을 기다리는 동안 DB 연결을 잡고 있지 않도록 반환 (읽은 값은 그대로 사용 가능)
+    db.session.close()
 
-    if not user or not user.check_password(password):
-        return jsonify({"success": False, "message": "사용자명 또는 비밀번호가 잘못되었습니다"}), 401
+    try:
+        if not user or not user.check_password(password):
+            return jsonify({"success": False, "message": "사용자명 또는 비밀번호가 잘못되었습니다"}), 401
+    except PasswordHasherBusy:
+        return _server_busy()
 
     if not user.is_approved:
         return jsonify({"success": False, "message": "관리자의 승인을 기다리고 있습니다"}), 403
 
+    # BCRYPT_ROUNDS가 바뀌었으면 새 cost factor로 다시 해싱 (혼잡하면 다음 로그인 때)
+    if user.password_needs_rehash():
+        try:
+            user.set_password(password)
+            db.session.add(user)
+            db.session.commit()
+        except PasswordHasherBusy:
+            pass
+
     # 세션에 사용자 ID 저장
     session['user_id'] = user.id
     session['username'] = user.username
@@ -63,15 +95,15 @@ def check_auth():
     if not user_id:
         return jsonify({"authenticated": False}), 200
 
-    user = User.query.get(user_id)
+    user = user_cache.get(user_id)
     if not user:
         session.clear()
         return jsonify({"authenticated": False}), 200
 
     return jsonify({
         "authenticated": True,
-        "user": user.to_dict(),
-        "is_admin": user.is_admin
+        "user": user,
+        "is_admin": user['is_admin']
     }), 200
 
 @auth_bp.route('/register', methods=['POST'])
@@ -87,19 +119,30 @@ def register():
     if len(password) < 4:
         return jsonify({"success": False, "message": "비밀번호는 최소 4자 이상이어야 합니다"}), 400
 
+    retry_after = ip_login_limiter.acquire(request.remote_addr or '-')
+    if retry_after:
+        return _too_many_attempts(retry_after)
+
     if User.query.filter_by(username=username).first():
         return jsonify({"success": False, "message": "이미 존재하는 사용자명입니다"}), 400
 
     # 첫 번째 사용자인 경우 자동으로 관리자로 등록
     is_first_user = User.query.count() == 0
 
+    db.session.close()  # 해싱 중에는 DB 연결 반환
+
     user = User(username=username)
-    user.set_password(password)
+    try:
+        user.set_password(password)
+    except PasswordHasherBusy:
+        return _server_busy()
     user.is_admin = is_first_user
     user.is_approved = is_first_user
 
     db.session.add(user)
     db.session.commit()
+    # 같은 id로 캐시된 이전 사용자(삭제됨) 정보 제거
+    user_cache.invalidate(user.id)
 
     if is_first_user:
         message = "첫 번째 사용자로 관리자로 등록되었습니다"
@@ -133,6 +176,7 @@ def approve_user(user_id):
 
     user.is_approved = True
     db.session.commit()
+    user_cache.invalidate(user_id)
 
     return jsonify({
         "success": True,
@@ -155,8 +199,19 @@ def reject_user(user_id):
     username = user.username
     db.session.delete(user)
     db.session.commit()
+    user_cache.invalidate(user_id)
 
     return jsonify({
         "success": True,
         "message": f"{username} 사용자가 거부되었습니다"
     }), 200
+
+@auth_bp.route('/cache-stats', methods=['GET'])
+@admin_required
+def cache_stats():
+    """사용자 권한 캐시 적중률, 응답 캐시 사용량 (관리자만)"""
+    return jsonify({
+        "success": True,
+        "user_cache": user_cache.stats(),
+        "response_cache": response_cache.stats()
+    }), 200
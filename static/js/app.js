@@ -1,12 +1,24 @@
+const STREAM_RESUME_ATTEMPTS = 5;  // 끊긴 응답 스트림 재연결 시도 횟수
+
 class OllamaChat {
     constructor() {
         this.currentModel = null;
         this.messages = [];
         this.models = [];
         this.selectedImage = null;  // 선택된 이미지 저장
+        this.selectedImageFile = null;  // 선택된 이미지 원본 파일 (업로드 전 축소용)
+        this.imageMaxDimension = { default: 0, models: {} };  // 모델별 이미지 긴 변 최대 픽셀 (서버 설정)
         this.currentUser = null;
         this.conversations = [];  // 대화 목록
+        this.conversationsEtag = null;  // 대화 목록 ETag (바뀐 게 없으면 304)
+        this.conversationsSyncToken = null;  // 마지막 동기화 시점 (이후 변경분만 요청)
         this.currentConversation = null;  // 현재 대화
+        this.nextBeforeId = null;  // 이전 메시지 페이지 커서
+        this.loadingOlderMessages = false;
+        this.searchQuery = '';  // 대화 검색어
+        this.searchTimer = null;
+        this.pullJobId = null;  // 진행 중인 모델 다운로드 작업
+        this.currentStreamId = null;  // 응답 중인 채팅 스트림 (중지 버튼, 대화 전환 시 취소)
         this.setupMarked();
         this.init();
     }
@@ -71,8 +83,28 @@ class OllamaChat {
         // 새 대화
         document.getElementById('new-conversation-btn').addEventListener('click', () => this.createConversation());
 
+        // 다른 탭/기기에서 바뀐 대화 목록 반영 (탭으로 돌아올 때 변경분만 조회)
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'visible') {
+                this.loadConversations();
+            }
+        });
+
+        // 대화 검색 (입력이 멈추면 검색)
+        document.getElementById('search-input').addEventListener('input', (e) => {
+            clearTimeout(this.searchTimer);
+            this.searchTimer = setTimeout(() => this.searchConversations(e.target.value.trim()), 250);
+        });
+
         // 채팅
-        document.getElementById('send-btn').addEventListener('click', () => this.sendMessage());
+        // 응답 중에는 전송 버튼이 중지 버튼
+        document.getElementById('send-btn').addEventListener('click', () => {
+            if (this.currentStreamId) {
+                this.cancelGeneration();
+            } else {
+                this.sendMessage();
+            }
+        });
         document.getElementById('message-input').addEventListener('keydown', (e) => {
             if (e.key === 'Enter' && !e.shiftKey) {
                 e.preventDefault();
@@ -91,6 +123,13 @@ class OllamaChat {
             }
         });
 
+        // 위로 스크롤하면 이전 메시지 불러오기
+        document.getElementById('chat-container').addEventListener('scroll', (e) => {
+            if (e.target.scrollTop < 80) {
+                this.loadOlderMessages();
+            }
+        });
+
         // 모달
         document.getElementById('models-btn').addEventListener('click', () => this.openModal());
         document.getElementById('close-modal-btn').addEventListener('click', () => this.closeModal());
@@ -110,6 +149,7 @@ class OllamaChat {
 
         // 모델 다운로드
         document.getElementById('pull-btn').addEventListener('click', () => this.pullModel());
+        document.getElementById('pull-cancel-btn').addEventListener('click', () => this.cancelPull());
 
         // 이미지 업로드
         document.getElementById('image-upload-btn').addEventListener('click', () => {
@@ -231,6 +271,7 @@ class OllamaChat {
         document.getElementById('modal-overlay').classList.remove('hidden');
         // 모달 내용 로드
         this.loadModels();
+        this.resumePullJobs();
     }
 
     closeModal() {
@@ -249,11 +290,64 @@ class OllamaChat {
         const reader = new FileReader();
         reader.onload = (e) => {
             this.selectedImage = e.target.result;
+            this.selectedImageFile = file;
             this.showImagePreview();
         };
         reader.readAsDataURL(file);
     }
 
+    // 업로드 전에 모델별 최대 크기로 줄이고 다시 인코딩 ({ dataUrl, original } 반환)
+    async downscaleImage(file, dataUrl, model) {
+        const maxDimension = this.imageMaxDimension.models[model] ?? this.imageMaxDimension.default;
+        let bitmap;
+        try {
+            bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+        } catch (error) {
+            return { dataUrl, original: null };  // 브라우저가 디코딩할 수 없는 형식은 서버에서 처리
+        }
+        const original = { bytes: file.size, width: bitmap.width, height: bitmap.height };
+        const longest = Math.max(bitmap.width, bitmap.height);
+        const passthrough = ['image/jpeg', 'image/png'].includes(file.type);
+        if ((!maxDimension || longest <= maxDimension) && passthrough) {
+            bitmap.close();
+            return { dataUrl, original };
+        }
+
+        const scale = maxDimension && longest > maxDimension ? maxDimension / longest : 1;
+        const canvas = document.createElement('canvas');
+        canvas.width = Math.max(1, Math.round(bitmap.width * scale));
+        canvas.height = Math.max(1, Math.round(bitmap.height * scale));
+        const ctx = canvas.getContext('2d');
+        ctx.imageSmoothingQuality = 'high';
+        ctx.drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+        bitmap.close();
+
+        // 투명 영역이 있으면 PNG, 나머지는 JPEG (서버와 같은 기준)
+        let transparent = false;
+        if (file.type !== 'image/jpeg') {
+            const pixels = ctx.getImageData(0, 0, canvas.width, canvas.height).data;
+            for (let i = 3; i < pixels.length; i += 4) {
+                if (pixels[i] < 255) {
+                    transparent = true;
+                    break;
+                }
+            }
+        }
+        const blob = await new Promise(resolve =>
+            canvas.toBlob(resolve, transparent ? 'image/png' : 'image/jpeg', 0.85)
+        );
+        if (!blob) {
+            return { dataUrl, original };
+        }
+        const resized = await new Promise((resolve, reject) => {
+            const reader = new FileReader();
+            reader.onload = () => resolve(reader.result);
+            reader.onerror = reject;
+            reader.readAsDataURL(blob);
+        });
+        return { dataUrl: resized, original };
+    }
+
     showImagePreview() {
         const container = document.getElementById('image-preview-container');
         const preview = document.getElementById('image-preview');
@@ -263,6 +357,7 @@ class OllamaChat {
 
     removeImage() {
         this.selectedImage = null;
+        this.selectedImageFile = null;
         document.getElementById('image-preview-container').style.display = 'none';
         document.getElementById('image-input').value = '';
     }
@@ -313,20 +408,40 @@ class OllamaChat {
     // ============ 대화 이력 관련 메서드 ============
 
     async loadConversations() {
-        // 대화 목록 불러오기
+        // 대화 목록 불러오기 (바뀐 게 없으면 304, 두 번째부터는 변경분만 받아서 병합)
         try {
-            const response = await fetch('/api/conversations');
+            const url = this.conversationsSyncToken
+                ? `/api/conversations?since=${encodeURIComponent(this.conversationsSyncToken)}`
+                : '/api/conversations';
+            const headers = this.conversationsEtag ? { 'If-None-Match': this.conversationsEtag } : {};
+            const response = await fetch(url, { headers, cache: 'no-store' });
+            if (response.status === 304) return;
             const data = await response.json();
 
             if (data.success) {
-                this.conversations = data.conversations;
-                this.renderConversationsList();
+                if (data.delta) {
+                    this.mergeConversations(data.conversations, data.deleted_ids);
+                } else {
+                    this.conversations = data.conversations;
+                }
+                this.conversationsEtag = response.headers.get('ETag');
+                this.conversationsSyncToken = data.sync_token;
+                if (!this.searchQuery) {
+                    this.renderConversationsList();
+                }
             }
         } catch (error) {
             console.error('Failed to load conversations:', error);
         }
     }
 
+    mergeConversations(changed, deletedIds) {
+        // 변경분 병합 (같은 id는 새 값으로 교체, 최신 수정순 정렬)
+        const replaced = new Set([...deletedIds, ...changed.map(conv => conv.id)]);
+        this.conversations = changed.concat(this.conversations.filter(conv => !replaced.has(conv.id)));
+        this.conversations.sort((a, b) => b.updated_at.localeCompare(a.updated_at));
+    }
+
     renderConversationsList() {
         // 대화 목록 UI 렌더링
         const listContainer = document.getElementById('conversations-list');
@@ -385,8 +500,55 @@ class OllamaChat {
         listContainer.innerHTML = html;
     }
 
+    async searchConversations(query) {
+        // 대화 검색 (검색어가 없으면 대화 목록으로 복귀)
+        this.searchQuery = query;
+        if (!query) {
+            this.renderConversationsList();
+            return;
+        }
+
+        try {
+            const response = await fetch(`/api/search?q=${encodeURIComponent(query)}`);
+            const data = await response.json();
+            // 응답 도착 전에 검색어가 바뀌었으면 무시
+            if (data.success && this.searchQuery === query) {
+                this.renderSearchResults(data.results);
+            }
+        } catch (error) {
+            console.error('Failed to search conversations:', error);
+        }
+    }
+
+    renderSearchResults(results) {
+        // 검색 결과 UI 렌더링 (snippet은 서버에서 이스케이프된 HTML)
+        const listContainer = document.getElementById('conversations-list');
+
+        if (results.length === 0) {
+            listContainer.innerHTML = '<div class="p-4 text-slate-400 text-sm text-center">검색 결과가 없습니다</div>';
+            return;
+        }
+
+        const escapeText = (text) => {
+            const el = document.createElement('div');
+            el.textContent = text || '';
+            return el.innerHTML;
+        };
+
+        listContainer.innerHTML = results.map(result => `
+            <div class="px-3 py-2 mx-2 rounded-lg transition cursor-pointer hover:bg-slate-800 text-slate-300"
+                 onclick="chat.selectConversation(${result.conversation_id})">
+                <div class="truncate text-sm font-medium">${result.type === 'title' ? result.snippet : escapeText(result.title)}</div>
+                ${result.type === 'message'
+                    ? `<div class="text-xs text-slate-500 line-clamp-2">${result.snippet}</div>`
+                    : ''}
+            </div>
+        `).join('');
+    }
+
     async createConversation() {
-        // 새 대화 생성
+        // 새 대화 생성 (응답 중이던 대화는 생성 중지)
+        this.cancelGeneration();
         try {
             const response = await fetch('/api/conversations', {
                 method: 'POST',
@@ -410,7 +572,8 @@ class OllamaChat {
     }
 
     async selectConversation(conversationId) {
-        // 대화 선택 및 로드
+        // 대화 선택 및 로드 (응답 중이던 대화는 생성 중지)
+        this.cancelGeneration();
         try {
             const response = await fetch(`/api/conversations/${conversationId}`);
             const data = await response.json();
@@ -418,6 +581,7 @@ class OllamaChat {
             if (data.success) {
                 this.currentConversation = data.conversation;
                 this.messages = data.conversation.messages || [];
+                this.nextBeforeId = data.next_before_id;
                 this.currentModel = data.conversation.model_used || '';
 
                 // 모델 선택 업데이트
@@ -431,6 +595,29 @@ class OllamaChat {
         }
     }
 
+    async loadOlderMessages() {
+        // 이전 메시지 페이지 불러오기 (키셋 페이지네이션)
+        if (!this.currentConversation || !this.nextBeforeId || this.loadingOlderMessages) return;
+
+        const conversationId = this.currentConversation.id;
+        this.loadingOlderMessages = true;
+        try {
+            const response = await fetch(`/api/conversations/${conversationId}?before_id=${this.nextBeforeId}`);
+            const data = await response.json();
+
+            // 불러오는 동안 다른 대화로 이동했으면 무시
+            if (data.success && this.currentConversation?.id === conversationId) {
+                this.messages = (data.conversation.messages || []).concat(this.messages);
+                this.nextBeforeId = data.next_before_id;
+                this.updateChatDisplay({ keepScroll: true });
+            }
+        } catch (error) {
+            console.error('Failed to load older messages:', error);
+        } finally {
+            this.loadingOlderMessages = false;
+        }
+    }
+
     async deleteConversation(conversationId) {
         // 대화 삭제
         if (!confirm('이 대화를 삭제하시겠습니까?')) return;
@@ -449,6 +636,7 @@ class OllamaChat {
                 if (this.currentConversation?.id === conversationId) {
                     this.currentConversation = null;
                     this.messages = [];
+                    this.nextBeforeId = null;
                     this.updateChatDisplay();
                 }
                 this.renderConversationsList();
@@ -525,6 +713,9 @@ class OllamaChat {
 
             if (data.success) {
                 this.models = data.models || [];
+                if (data.image_max_dimension) {
+                    this.imageMaxDimension = data.image_max_dimension;
+                }
                 this.updateModelDisplay();
 
                 // 마지막 사용한 모델 자동 선택
@@ -619,6 +810,7 @@ class OllamaChat {
         const message = input.value.trim();
 
         if (!message && !this.selectedImage) return;
+        if (this.currentStreamId) return;  // 이전 응답이 끝나거나 중지될 때까지
         if (!this.currentModel) {
             alert('모델을 선택해주세요');
             return;
@@ -636,9 +828,16 @@ class OllamaChat {
             content: message || '(이미지만 첨부됨)'
         };
 
-        // 이미지가 있으면 추가
+        // 이미지가 있으면 모델별 최대 크기로 줄여서 추가
+        let imageOriginal = null;
         if (this.selectedImage) {
-            userMessage.images = [this.selectedImage.split(',')[1]]; // base64만 추출
+            let imageDataUrl = this.selectedImage;
+            if (this.selectedImageFile) {
+                const prepared = await this.downscaleImage(this.selectedImageFile, this.selectedImage, this.currentModel);
+                imageDataUrl = prepared.dataUrl;
+                imageOriginal = prepared.original;
+            }
+            userMessage.images = [imageDataUrl.split(',')[1]]; // base64만 추출
         }
 
         // Add user message to chat
@@ -654,35 +853,21 @@ class OllamaChat {
             sendBtn.disabled = true;
             sendBtn.textContent = '응답 중...';
 
-            // API 전송용 메시지 포맷 (이미지는 content에 포함)
-            const messagesForAPI = this.messages.map(msg => {
-                if (msg.images) {
-                    return {
-                        role: msg.role,
-                        content: msg.content,
-                        images: msg.images
-                    };
-                }
-                return {
-                    role: msg.role,
-                    content: msg.content
-                };
-            });
-
-            // 저장할 사용자 메시지 (이미지는 base64로 저장)
+            // 새 사용자 메시지만 전송 (이전 대화 내용은 서버에서 조립)
             const userMessageToSave = {
-                content: message || '(이미지만 첨부됨)',
-                image: this.selectedImage ? this.selectedImage.split(',')[1] : null
+                content: userMessage.content,
+                image: userMessage.images ? userMessage.images[0] : null,
+                image_original: imageOriginal  // 줄이기 전 크기 (메시지 메트릭에 기록)
             };
 
-            const response = await fetch('/api/chat', {
+            let response = await fetch('/api/chat', {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream'  // 이어 받을 수 있는 SSE 스트림
                 },
                 body: JSON.stringify({
                     model: this.currentModel,
-                    messages: messagesForAPI,
                     conversation_id: this.currentConversation.id,
                     user_message: userMessageToSave
                 })
@@ -692,9 +877,15 @@ class OllamaChat {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
 
+            // 응답 중에는 중지 버튼으로 사용 (캐시된 응답은 스트림 id가 없음)
+            const streamId = response.headers.get('X-Stream-Id');
+            this.currentStreamId = streamId;
+            if (streamId) {
+                sendBtn.disabled = false;
+                sendBtn.textContent = '중지';
+            }
+
             // 스트리밍 응답 처리
-            const reader = response.body.getReader();
-            const decoder = new TextDecoder();
             let fullContent = '';
             let assistantMessage = {
                 role: 'assistant',
@@ -705,67 +896,96 @@ class OllamaChat {
             // 어시스턴트 메시지를 미리 추가
             this.messages.push(assistantMessage);
 
-            let finalData = null;
-            while (true) {
-                const { done, value } = await reader.read();
-                if (done) break;
-
-                const chunk = decoder.decode(value, { stream: true });
-                const lines = chunk.split('\n');
-
-                for (const line of lines) {
-                    if (line.trim()) {
-                        try {
-                            const data = JSON.parse(line);
-
-                            // 최종 응답 신호 확인
-                            if (data.done && data.full_content) {
-                                finalData = data;
-                                assistantMessage.content = data.full_content;
-                                assistantMessage.metrics = data.metrics;
-                                assistantMessage.model = data.model;
-                                continue;
-                            }
-
-                            if (data.success && data.chunk) {
-                                fullContent += data.chunk;
-                                // 실시간으로 메시지 업데이트
-                                assistantMessage.content = fullContent;
-                                this.updateChatDisplay();
-                            }
-                            // 메트릭 정보 저장 (done이 true일 때)
-                            if (data.metrics && !data.full_content) {
-                                assistantMessage.metrics = data.metrics;
-                            }
-                        } catch (e) {
-                            // JSON 파싱 에러는 무시
-                        }
+            let lastEventId = '0';
+            let resumeFailed = false;
+            let finished = false;  // 최종/에러 프레임을 받음 (이 전에 스트림이 끝나면 끊긴 것으로 봄)
+            const handleFrame = (id, data) => {
+                if (id) lastEventId = id;
+
+                // 최종 응답 신호 확인 (응답은 서버에서 저장됨)
+                if (data.final) {
+                    finished = true;
+                    if (data.full_content) {
+                        assistantMessage.content = data.full_content;
                     }
+                    assistantMessage.metrics = data.metrics;
+                    assistantMessage.model = data.model;
+                    assistantMessage.cancelled = data.cancelled;
+                    return;
                 }
-            }
 
-            // 최종 업데이트
-            this.updateChatDisplay();
+                // 이어 받을 수 있는 범위를 벗어남 - 저장된 응답을 다시 불러옴
+                if (data.resume_failed) {
+                    resumeFailed = true;
+                    finished = true;
+                    return;
+                }
+
+                // 서버 스케줄러 대기 중 (차례가 오면 토큰이 이어서 옴)
+                if (data.queued) {
+                    assistantMessage.content = `⏳ 대기 중 (${data.position}번째)`;
+                    this.updateChatDisplay();
+                    return;
+                }
+
+                if (data.success === false && data.message) {
+                    finished = true;  // 에러 프레임 뒤에는 최종 프레임 없이 끝날 수 있음
+                }
+                if (data.success === false && data.message && !fullContent) {
+                    assistantMessage.content = '오류: ' + data.message;
+                    this.updateChatDisplay();
+                    return;
+                }
 
-            // AI 응답을 서버에 저장
-            if (finalData && this.currentConversation) {
+                if (data.success && data.chunk) {
+                    fullContent += data.chunk;
+                    // 실시간으로 메시지 업데이트
+                    assistantMessage.content = fullContent;
+                    this.updateChatDisplay();
+                }
+                // 메트릭 정보 저장 (done이 true일 때)
+                if (data.metrics) {
+                    assistantMessage.metrics = data.metrics;
+                }
+            };
+
+            // 연결이 끊기면 마지막으로 받은 이벤트 다음부터 이어 받음 (생성은 서버에서 계속됨)
+            // 프록시/서버 재시작으로 스트림이 에러 없이 닫혀도 최종 프레임 전이면 끊긴 것으로 처리
+            let attempts = 0;
+            while (true) {
                 try {
-                    await fetch('/api/save-message', {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json'
-                        },
-                        body: JSON.stringify({
-                            conversation_id: this.currentConversation.id,
-                            content: finalData.full_content,
-                            metrics: finalData.metrics,
-                            model: this.currentModel
-                        })
-                    });
+                    await this.readEventStream(response, handleFrame);
                 } catch (error) {
-                    console.error('Failed to save message:', error);
+                    console.warn('Stream interrupted:', error);
+                }
+                if (finished || !streamId || this.currentStreamId !== streamId) break;
+
+                response = null;
+                while (!response && attempts < STREAM_RESUME_ATTEMPTS) {
+                    attempts++;
+                    await new Promise(resolve => setTimeout(resolve, 1000 * attempts));
+                    try {
+                        response = await fetch(`/api/chat/${streamId}/events`, {
+                            headers: { 'Last-Event-ID': lastEventId }
+                        });
+                    } catch (error) {
+                        response = null;  // 아직 연결 불가
+                    }
                 }
+                if (!response || !response.ok) break;  // 재연결 실패 또는 만료된 스트림
             }
+
+            if ((!finished || resumeFailed) && streamId && this.currentStreamId === streamId && this.currentConversation) {
+                // 이어 받지 못함 - 서버에 저장된 응답으로 다시 표시
+                this.currentStreamId = null;
+                await this.selectConversation(this.currentConversation.id);
+            }
+
+            // 최종 업데이트
+            this.updateChatDisplay();
+
+            // 대화 목록 순서 갱신 (응답 저장은 서버에서 비동기로 커밋되므로 조금 뒤에 변경분 조회)
+            setTimeout(() => this.loadConversations(), 500);
         } catch (error) {
             console.error('Error sending message:', error);
             this.messages.push({
@@ -774,14 +994,69 @@ class OllamaChat {
             });
             this.updateChatDisplay();
         } finally {
+            this.currentStreamId = null;
             const sendBtn = document.getElementById('send-btn');
             sendBtn.disabled = false;
             sendBtn.textContent = '전송';
         }
     }
 
-    updateChatDisplay() {
+    async readEventStream(response, onEvent) {
+        // SSE 응답 읽기 - 이벤트마다 onEvent(id, data) 호출 (연결이 중간에 끊기면 예외)
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) return;
+
+            // 읽기 단위가 이벤트 경계와 맞지 않을 수 있으므로 마지막 미완성 이벤트는 보관
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+
+            for (const block of events) {
+                let id = null;
+                let data = '';
+                for (const line of block.split('\n')) {
+                    if (line.startsWith('id: ')) id = line.slice(4);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                }
+                if (!data) continue;  // retry, keep-alive 주석
+                try {
+                    onEvent(id, JSON.parse(data));
+                } catch (e) {
+                    // JSON 파싱 에러는 무시
+                }
+            }
+        }
+    }
+
+    async cancelGeneration() {
+        // 응답 생성 중지 (서버가 Ollama 연결을 끊고 그때까지의 응답을 저장, 스트림은 최종 프레임으로 끝남)
+        const streamId = this.currentStreamId;
+        if (!streamId) return;
+        this.currentStreamId = null;
+        document.getElementById('send-btn').disabled = true;  // 스트림이 끝나면 다시 전송 버튼
+        try {
+            await fetch(`/api/chat/${streamId}/cancel`, { method: 'POST' });
+        } catch (error) {
+            console.error('Error cancelling generation:', error);
+        }
+    }
+
+    getImageSrc(msg) {
+        // 방금 보낸 메시지는 base64, 저장된 메시지는 이미지 URL (브라우저 캐시 사용)
+        if (msg.images) return 'data:image/jpeg;base64,' + msg.images[0];
+        if (msg.image_url) return msg.image_url;
+        if (msg.image) return 'data:image/jpeg;base64,' + msg.image;
+        return null;
+    }
+
+    updateChatDisplay({ keepScroll = false } = {}) {
         const container = document.getElementById('chat-container');
+        const prevScrollHeight = container.scrollHeight;
+        const prevScrollTop = container.scrollTop;
 
         if (this.messages.length === 0) {
             container.innerHTML = '<div class="flex items-center justify-center h-full text-slate-500"><p class="text-center">모델을 선택하고 메시지를 입력해주세요</p></div>';
@@ -810,13 +1085,15 @@ class OllamaChat {
 
             messageEl.appendChild(contentEl);
 
-            // 이미지가 있으면 표시 (사용자 메시지만)
-            if (msg.images && msg.role === 'user') {
+            // 이미지가 있으면 표시 (사용자 메시지만, DB에서 불러온 메시지는 image_url로 조회)
+            const imageSrc = this.getImageSrc(msg);
+            if (imageSrc && msg.role === 'user') {
                 const imageEl = document.createElement('div');
                 imageEl.className = 'mt-2';
                 const img = document.createElement('img');
                 img.className = 'max-w-xs max-h-80 rounded-lg border border-blue-500';
-                img.src = 'data:image/jpeg;base64,' + msg.images[0];
+                img.loading = 'lazy';
+                img.src = imageSrc;
                 imageEl.appendChild(img);
                 messageEl.appendChild(imageEl);
             }
@@ -824,7 +1101,7 @@ class OllamaChat {
             container.appendChild(messageEl);
 
             // 메트릭 정보 표시 (AI 응답만)
-            if (msg.role === 'assistant' && (msg.metrics || msg.model)) {
+            if (msg.role === 'assistant' && (msg.metrics || msg.model || msg.cancelled)) {
                 const metricsEl = document.createElement('div');
                 metricsEl.className = 'flex justify-start mb-4 ml-0';
 
@@ -837,8 +1114,14 @@ class OllamaChat {
                 if (msg.model) {
                     metricsHTML += `<div><span class="font-semibold">🤖 모델:</span> ${msg.model}</div>`;
                 }
+                if (msg.cancelled) {
+                    metricsHTML += `<div><span class="font-semibold">⏹️ 생성 중지됨</span> (중지 전까지의 응답)</div>`;
+                }
 
                 if (msg.metrics) {
+                    if (msg.metrics.cached) {
+                        metricsHTML += `<div><span class="font-semibold">💾 캐시된 응답</span> (아래는 처음 생성할 때의 메트릭)</div>`;
+                    }
                     if (msg.metrics.tokens_per_second) {
                         metricsHTML += `<div><span class="font-semibold">⚡ 토큰 속도:</span> ${msg.metrics.tokens_per_second} tokens/sec</div>`;
                     }
@@ -861,8 +1144,13 @@ class OllamaChat {
             }
         });
 
-        // Scroll to bottom
-        container.scrollTop = container.scrollHeight;
+        if (keepScroll) {
+            // 앞쪽에 메시지가 추가되어도 보고 있던 위치 유지
+            container.scrollTop = container.scrollHeight - prevScrollHeight + prevScrollTop;
+        } else {
+            // Scroll to bottom
+            container.scrollTop = container.scrollHeight;
+        }
     }
 
     async pullModel() {
@@ -877,12 +1165,10 @@ class OllamaChat {
         }
 
         try {
-            const pullBtn = document.getElementById('pull-btn');
-            pullBtn.disabled = true;
-            pullBtn.textContent = '다운로드 중...';
             statusEl.textContent = '다운로드 시작...';
             statusEl.className = 'status-message';
 
+            // 다운로드는 서버의 백그라운드 작업으로 진행되고 진행 상황만 조회
             const response = await fetch('/api/pull', {
                 method: 'POST',
                 headers: {
@@ -896,10 +1182,8 @@ class OllamaChat {
             const data = await response.json();
 
             if (data.success) {
-                statusEl.textContent = data.message;
-                statusEl.className = 'status-message success';
                 input.value = '';
-                await this.loadModels();
+                this.watchPullJob(data.job);
             } else {
                 statusEl.textContent = '에러: ' + data.message;
                 statusEl.className = 'status-message error';
@@ -907,10 +1191,71 @@ class OllamaChat {
         } catch (error) {
             statusEl.textContent = '다운로드 실패: ' + error.message;
             statusEl.className = 'status-message error';
+        }
+    }
+
+    async resumePullJobs() {
+        // 모달을 다시 열었을 때 진행 중인 다운로드가 있으면 이어서 표시
+        if (this.pullJobId) return;
+        try {
+            const response = await fetch('/api/pull');
+            const data = await response.json();
+            const active = data.success && data.jobs.find(job => job.status === 'queued' || job.status === 'running');
+            if (active) this.watchPullJob(active);
+        } catch (error) {
+            console.error('Error loading pull jobs:', error);
+        }
+    }
+
+    async watchPullJob(job) {
+        const statusEl = document.getElementById('pull-status');
+        const pullBtn = document.getElementById('pull-btn');
+        const cancelBtn = document.getElementById('pull-cancel-btn');
+        this.pullJobId = job.job_id;
+        pullBtn.disabled = true;
+        pullBtn.textContent = '다운로드 중...';
+        cancelBtn.classList.remove('hidden');
+
+        try {
+            while (job.status === 'queued' || job.status === 'running') {
+                const progress = job.percent !== null
+                    ? ` ${job.percent}% (${this.formatBytes(job.completed)} / ${this.formatBytes(job.total)})`
+                    : '';
+                statusEl.textContent = `${job.model}: ${job.message}${progress}`;
+                statusEl.className = 'status-message';
+
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                const response = await fetch(`/api/pull/${job.job_id}`);
+                const data = await response.json();
+                if (!data.success) throw new Error(data.message);
+                job = data.job;
+            }
+
+            if (job.status === 'success') {
+                statusEl.textContent = job.message;
+                statusEl.className = 'status-message success';
+                await this.loadModels();
+            } else {
+                statusEl.textContent = (job.status === 'cancelled' ? '' : '에러: ') + job.message;
+                statusEl.className = 'status-message error';
+            }
+        } catch (error) {
+            statusEl.textContent = '다운로드 상태 확인 실패: ' + error.message;
+            statusEl.className = 'status-message error';
         } finally {
-            const pullBtn = document.getElementById('pull-btn');
+            this.pullJobId = null;
             pullBtn.disabled = false;
             pullBtn.textContent = '다운로드';
+            cancelBtn.classList.add('hidden');
+        }
+    }
+
+    async cancelPull() {
+        if (!this.pullJobId) return;
+        try {
+            await fetch(`/api/pull/${this.pullJobId}`, { method: 'DELETE' });
+        } catch (error) {
+            console.error('Error cancelling pull:', error);
         }
     }
 
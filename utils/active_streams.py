@@ -0,0 +1,134 @@
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+from utils.instrumentation import CHAT_STREAMS_CANCELLED
+from utils.stream_buffer import StreamBuffer
+from config import Config
+
+
+class ActiveStream:
+    """진행 중인 채팅 스트림 하나 (취소 요청/연결 끊김을 스트리밍 쪽에 전달)
+
+    스트리밍 쪽은 on_cancel()로 Ollama 응답을 끊는 함수를 등록하고,
+    cancel()은 어느 스레드에서 불러도 등록된 함수를 바로 실행한다.
+    이어 받을 수 있는 스트림(SSE)은 buffer에 프레임을 보관한다.
+    """
+
+    def __init__(self, user_id: int, conversation_id: Optional[int], model: str,
+                 buffer: Optional[StreamBuffer] = None):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.conversation_id = conversation_id
+        self.model = model
+        self.started_at = time.time()
+        self.reason: Optional[str] = None  # 'cancel'(취소 요청) 또는 'disconnect'(연결 끊김)
+        self.buffer = buffer
+        self.finished = False
+        self.expires_at = 0.0  # 끝난 뒤 이어 받을 수 있는 기한 (monotonic)
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """취소 시 실행할 함수 등록 (이미 취소됐으면 바로 실행)"""
+        with self._lock:
+            if self.reason is None:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self, reason: str = 'cancel') -> bool:
+        """스트림 취소 (이미 취소됐으면 False)"""
+        with self._lock:
+            if self.reason is not None or self.finished:
+                return False
+            self.reason = reason
+            callbacks, self._callbacks = self._callbacks, []
+        CHAT_STREAMS_CANCELLED.labels(reason).inc()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+        return True
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "conversation_id": self.conversation_id,
+            "model": self.model,
+            "started_at": self.started_at,
+            "cancelled": self.cancelled,
+            "finished": self.finished,
+            "resumable": self.buffer is not None
+        }
+
+
+class ActiveStreamRegistry:
+    """프로세스 안에서 진행 중인 채팅 스트림 목록 (stream_id -> ActiveStream)
+
+    버퍼가 있는 스트림은 생성이 끝난 뒤에도 retention초 동안 남겨서 마지막 프레임까지 이어 받을 수 있게 한다.
+    """
+
+    def __init__(self, retention: float = 0.0):
+        self.retention = retention
+        self._streams: Dict[str, ActiveStream] = {}
+        self._finished: Deque[ActiveStream] = deque()  # 끝난 순서 (= 기한 순서)
+        self._lock = threading.Lock()
+
+    def open(self, user_id: int, conversation_id: Optional[int], model: str,
+             buffer: Optional[StreamBuffer] = None) -> ActiveStream:
+        stream = ActiveStream(user_id, conversation_id, model, buffer)
+        with self._lock:
+            self._prune()
+            self._streams[stream.id] = stream
+        return stream
+
+    def close(self, stream: ActiveStream):
+        with self._lock:
+            if stream.finished:
+                return
+            stream.finished = True
+            if stream.buffer is None or self.retention <= 0:
+                self._streams.pop(stream.id, None)
+            else:
+                stream.expires_at = time.monotonic() + self.retention
+                self._finished.append(stream)
+
+    def _prune(self):
+        # 잠금을 잡은 상태에서 호출
+        now = time.monotonic()
+        while self._finished and self._finished[0].expires_at <= now:
+            self._streams.pop(self._finished.popleft().id, None)
+
+    def get(self, stream_id: str, user_id: int) -> Optional[ActiveStream]:
+        """사용자 본인의 스트림 (없거나 다른 사용자의 스트림이면 None)"""
+        with self._lock:
+            self._prune()
+            stream = self._streams.get(stream_id)
+        if stream is None or stream.user_id != user_id:
+            return None
+        return stream
+
+    def cancel(self, stream_id: str, user_id: int) -> Optional[ActiveStream]:
+        """사용자 본인의 스트림 취소 (없거나 다른 사용자의 스트림이면 None)"""
+        stream = self.get(stream_id, user_id)
+        if stream is not None:
+            stream.cancel('cancel')
+        return stream
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._prune()
+            return {
+                "active": len(self._streams) - len(self._finished),
+                "resumable": sum(1 for stream in self._streams.values() if stream.buffer is not None)
+            }
+
+
+active_streams = ActiveStreamRegistry(Config.STREAM_RESUME_RETENTION)
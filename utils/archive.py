@@ -0,0 +1,300 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+from models import db, Conversation, ConversationArchive, Message
+from utils.image_store import ImageStore, is_image_hash
+from config import Config
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성 - 없으면 gzip 사용
+    zstandard = None
+
+ZSTD_LEVEL = 9
+GZIP_LEVEL = 6
+PAYLOAD_VERSION = 1
+
+
+def default_codec() -> str:
+    """새로 보관할 때 쓸 압축 방식 (zstd를 선택했지만 zstandard가 없으면 gzip)"""
+    if Config.ARCHIVE_COMPRESSION == 'zstd' and zstandard is not None:
+        return 'zstd'
+    return 'gzip'
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def decompress(payload: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('zstd로 압축된 보관 데이터를 읽으려면 zstandard 패키지가 필요합니다')
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return gzip.decompress(payload)
+
+
+def _message_row(message: Message) -> Dict:
+    return {
+        "id": message.id,
+        "role": message.role,
+        "content": message.content,
+        "image": message.image,
+        "model": message.model,
+        "metrics": message.metrics,
+        "cancelled": message.cancelled,
+        "created_at": message.created_at.isoformat() if message.created_at else None
+    }
+
+
+def load_archived_messages(archive: ConversationArchive) -> List[Dict]:
+    """보관 행의 메시지 목록 (id 순)"""
+    data = json.loads(decompress(archive.payload, archive.codec))
+    return data["messages"]
+
+
+def index_archived_messages(conversation_id: int, user_id: int, messages: List[Dict]):
+    """보관한 메시지를 보관 검색 색인에 추가 (호출 측 트랜잭션, 색인은 utils.search에서 생성)
+
+    messages 행이 지워지면 message_fts에서도 빠지므로 보관된 대화는 이 색인으로 검색한다.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return
+    owner = f'u{int(user_id)}'
+    for message in messages:
+        ref_id = db.session.execute(db.text(
+            "INSERT INTO archived_message_refs(conversation_id, user_id, message_id, role, created_at) "
+            "VALUES (:conversation_id, :user_id, :message_id, :role, :created_at)"
+        ), {
+            'conversation_id': conversation_id, 'user_id': user_id, 'message_id': message['id'],
+            'role': message['role'], 'created_at': message['created_at']
+        }).lastrowid
+        db.session.execute(db.text(
+            "INSERT INTO archived_message_fts(rowid, content, owner) VALUES (:id, :content, :owner)"
+        ), {'id': ref_id, 'content': message['content'] or '', 'owner': owner})
+
+
+def unindex_archived_messages(conversation_id: int, messages: List[Dict]):
+    """보관 검색 색인에서 대화의 메시지 제거 (복원/완전 삭제 시, messages는 보관 데이터의 메시지 목록)
+
+    본문을 저장하지 않는 색인이라 지울 때도 색인했던 본문을 그대로 넘겨야 한다.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return
+    contents = {message['id']: message['content'] or '' for message in messages}
+    refs = db.session.execute(db.text(
+        "SELECT id, user_id, message_id FROM archived_message_refs WHERE conversation_id = :conversation_id"
+    ), {'conversation_id': conversation_id}).all()
+    for ref in refs:
+        if ref.message_id in contents:
+            db.session.execute(db.text(
+                "INSERT INTO archived_message_fts(archived_message_fts, rowid, content, owner) "
+                "VALUES ('delete', :id, :content, :owner)"
+            ), {'id': ref.id, 'content': contents[ref.message_id], 'owner': f'u{ref.user_id}'})
+    db.session.execute(db.text(
+        "DELETE FROM archived_message_refs WHERE conversation_id = :conversation_id"
+    ), {'conversation_id': conversation_id})
+
+
+def _keep_updated_at(conversation_id: int, values: Dict, extra_filter=None) -> int:
+    # 보관/복원은 대화 내용이 바뀐 것이 아니므로 목록 순서(updated_at)를 유지
+    query = Conversation.query.filter(Conversation.id == conversation_id)
+    if extra_filter is not None:
+        query = query.filter(extra_filter)
+    return query.update(dict(values, updated_at=Conversation.updated_at), synchronize_session=False)
+
+
+def archive_conversation(conversation_id: int, codec: Optional[str] = None) -> Optional[Dict]:
+    """대화의 메시지를 압축해서 보관 테이블로 옮김 (호출 측 트랜잭션에서 실행)
+
+    이미 보관된 대화에 그 뒤 메시지가 생겼으면 기존 보관분과 합친다.
+    옮긴 메시지가 없으면 None, 있으면 {"messages", "raw_bytes", "stored_bytes"} 반환
+    """
+    rows = Message.query.filter_by(conversation_id=conversation_id).order_by(Message.id).all()
+    archive = db.session.get(ConversationArchive, conversation_id)
+    if not rows and archive is not None:
+        return None
+    messages = load_archived_messages(archive) if archive is not None else []
+    moved = [_message_row(row) for row in rows]
+    messages.extend(moved)
+
+    raw = json.dumps({"version": PAYLOAD_VERSION, "messages": messages},
+                     ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    codec = codec or default_codec()
+    if archive is None:
+        archive = ConversationArchive(conversation_id=conversation_id)
+        db.session.add(archive)
+    archive.codec = codec
+    archive.payload = compress(raw, codec)
+    archive.message_count = len(messages)
+    archive.raw_bytes = len(raw)
+    archive.image_hashes = sorted({m["image"] for m in messages if is_image_hash(m["image"])}) or None
+    archive.archived_at = datetime.utcnow()
+
+    if rows:
+        Message.query.filter(
+            Message.conversation_id == conversation_id,
+            Message.id <= rows[-1].id
+        ).delete(synchronize_session=False)
+    _keep_updated_at(conversation_id, {"is_archived": True})
+    user_id = db.session.query(Conversation.user_id).filter(Conversation.id == conversation_id).scalar()
+    index_archived_messages(conversation_id, user_id, moved)
+    return {"messages": len(rows), "raw_bytes": len(raw), "stored_bytes": len(archive.payload)}
+
+
+def restore_conversation(conversation: Conversation) -> int:
+    """보관된 대화의 메시지를 messages 테이블로 되돌림 (복원한 메시지 수 반환, 커밋 포함)
+
+    원래 id로 되돌려서 키셋 페이지네이션과 클라이언트가 가진 id가 그대로 유효하다.
+    보관 후 SQLite가 같은 id를 다른 메시지에 다시 썼으면 이 대화의 메시지 전체를 새 id로 순서대로 넣는다.
+    여러 요청이 동시에 열어도 is_archived 조건부 UPDATE로 한 요청만 복원한다.
+    """
+    if not conversation.is_archived:
+        return 0
+    conversation_id = conversation.id
+    if not _keep_updated_at(conversation_id, {"is_archived": False, "restored_at": datetime.utcnow()},
+                            Conversation.is_archived.is_(True)):
+        db.session.rollback()  # 다른 요청이 이미 복원함
+        return 0
+
+    archive = db.session.get(ConversationArchive, conversation_id)
+    messages = load_archived_messages(archive) if archive is not None else []
+    unindex_archived_messages(conversation_id, messages)
+    if messages:
+        first, last = messages[0]["id"], messages[-1]["id"]
+        taken = db.session.query(db.func.count(Message.id)).filter(
+            Message.id.between(first, last),
+            Message.conversation_id != conversation_id
+        ).scalar()
+        newer = Message.query.filter(
+            Message.conversation_id == conversation_id,
+            Message.id <= last
+        ).count()
+        if taken or newer:
+            # id 충돌 - 보관분 뒤에 이어지는 메시지까지 새 id로 다시 넣어 순서 유지
+            live = Message.query.filter_by(conversation_id=conversation_id).order_by(Message.id).all()
+            messages.extend(_message_row(row) for row in live)
+            Message.query.filter_by(conversation_id=conversation_id).delete(synchronize_session=False)
+            for message in messages:
+                message.pop("id")
+
+        for message in messages:
+            message["conversation_id"] = conversation_id
+            if message["created_at"]:
+                message["created_at"] = datetime.fromisoformat(message["created_at"])
+        db.session.bulk_insert_mappings(Message, messages)
+    if archive is not None:
+        db.session.delete(archive)
+    db.session.commit()
+    return len(messages)
+
+
+def archive_conversations(idle_before: Optional[datetime], batch_size: int = 100) -> Dict:
+    """소프트 삭제된 대화와 idle_before 이전부터 쓰지 않은 대화를 보관 (idle_before=None이면 삭제된 대화만)"""
+    condition = Conversation.is_deleted.is_(True)
+    if idle_before is not None:
+        # 복원해서 다시 읽은 대화는 복원 시각부터 다시 센다
+        condition = db.or_(condition, db.and_(
+            Conversation.updated_at < idle_before,
+            db.or_(Conversation.restored_at.is_(None), Conversation.restored_at < idle_before)
+        ))
+    totals = {"conversations": 0, "messages": 0, "raw_bytes": 0, "stored_bytes": 0}
+    last_id = 0
+    codec = default_codec()
+
+    while True:
+        # 이미 보관됐더라도 그 뒤 메시지가 남아 있으면 다시 보관 (archive_conversation이 합침)
+        ids = [row.id for row in db.session.query(Conversation.id).filter(
+            Conversation.id > last_id,
+            condition,
+            db.or_(Conversation.is_archived.isnot(True),
+                   db.exists().where(Message.conversation_id == Conversation.id))
+        ).order_by(Conversation.id).limit(batch_size)]
+        if not ids:
+            break
+        for conversation_id in ids:
+            result = archive_conversation(conversation_id, codec)
+            if result:
+                totals["conversations"] += 1
+                totals["messages"] += result["messages"]
+                totals["raw_bytes"] += result["raw_bytes"]
+                totals["stored_bytes"] += result["stored_bytes"]
+        last_id = ids[-1]
+        db.session.commit()
+        db.session.expunge_all()
+    return totals
+
+
+def purge_deleted(deleted_before: datetime, batch_size: int = 500) -> int:
+    """deleted_before 이전에 소프트 삭제된 대화를 완전히 삭제 (삭제한 대화 수 반환)
+
+    메트릭 집계(metric_rollups)는 그대로 남는다.
+    """
+    purged = 0
+    while True:
+        ids = [row.id for row in db.session.query(Conversation.id).filter(
+            Conversation.is_deleted.is_(True),
+            Conversation.updated_at < deleted_before
+        ).limit(batch_size)]
+        if not ids:
+            break
+        # 메시지 FTS 삭제 트리거가 대화 행을 참조하므로 메시지를 먼저 삭제
+        for archive in ConversationArchive.query.filter(ConversationArchive.conversation_id.in_(ids)):
+            unindex_archived_messages(archive.conversation_id, load_archived_messages(archive))
+        Message.query.filter(Message.conversation_id.in_(ids)).delete(synchronize_session=False)
+        ConversationArchive.query.filter(ConversationArchive.conversation_id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        Conversation.query.filter(Conversation.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        purged += len(ids)
+    return purged
+
+
+def collect_unused_images(store: ImageStore, grace_seconds: float) -> Dict:
+    """어떤 메시지/보관 대화도 참조하지 않는 이미지 파일 삭제
+
+    업로드 직후 메시지가 아직 저장되지 않은 파일을 지우지 않도록 grace_seconds보다 오래된 파일만 삭제한다.
+    """
+    referenced = {
+        value for (value,) in db.session.query(Message.image).filter(Message.image.isnot(None)).distinct()
+    }
+    for (hashes,) in db.session.query(ConversationArchive.image_hashes):
+        referenced.update(hashes or ())
+
+    cutoff = datetime.utcnow().timestamp() - grace_seconds
+    removed = 0
+    freed = 0
+    for image_hash, path, stat in store.iter_files():
+        if image_hash in referenced or stat.st_mtime > cutoff:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        removed += 1
+        freed += stat.st_size
+    return {"removed": removed, "freed_bytes": freed}
+
+
+def database_size() -> int:
+    """SQLite DB 파일 + WAL 크기 (바이트)"""
+    path = db.engine.url.database
+    total = 0
+    for suffix in ('', '-wal'):
+        if path and os.path.exists(path + suffix):
+            total += os.path.getsize(path + suffix)
+    return total
+
+
+def vacuum_database():
+    """빈 페이지를 정리해서 DB 파일 크기를 줄임 (실행하는 동안 다른 쓰기는 대기)"""
+    db.session.remove()
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.execute(db.text('VACUUM'))
+        if db.engine.dialect.name == 'sqlite':
+            conn.execute(db.text('PRAGMA wal_checkpoint(TRUNCATE)'))
@@ -0,0 +1,281 @@
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Set
+from utils.ollama_client import OllamaClient
+
+
+class Backend:
+    """Ollama 서버 하나의 상태"""
+
+    def __init__(self, client: OllamaClient):
+        self.client = client
+        self.url = client.base_url
+        self.healthy = True  # 처음에는 연결된다고 가정 (첫 조회/요청에서 확인)
+        self.models: Optional[Set[str]] = None  # None이면 아직 모름
+        self.in_flight = 0
+        self.tokens_per_second: Optional[float] = None  # 최근 생성 속도 (지수 이동 평균)
+        self.requests = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def has_model(self, model: str) -> bool:
+        return self.models is None or model in self.models
+
+    def to_dict(self) -> Dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "models": sorted(self.models) if self.models is not None else None,
+            "in_flight": self.in_flight,
+            "tokens_per_second": round(self.tokens_per_second, 2) if self.tokens_per_second else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "last_error": self.last_error
+        }
+
+
+class _TrackedStream:
+    """스트리밍 응답 래퍼 - 닫힐 때 서버의 진행 중 요청 수와 생성 속도 갱신"""
+
+    def __init__(self, response, router: 'OllamaRouter', backend: Backend):
+        self._response = response
+        self._router = router
+        self._backend = backend
+        self._last_line = None
+        self._finished = False
+
+    def iter_lines(self, **kwargs):
+        for line in self._response.iter_lines(**kwargs):
+            if line:
+                self._last_line = line
+            yield line
+
+    async def aiter_lines(self):
+        async for line in self._response.aiter_lines():
+            if line:
+                self._last_line = line
+            yield line
+
+    def close(self):
+        self._response.close()
+        self._finish()
+
+    async def aclose(self):
+        await self._response.aclose()
+        self._finish()
+
+    @property
+    def raw(self):
+        return self._response.raw
+
+    def _finish(self):
+        if not self._finished:
+            self._finished = True
+            self._router._finish(self._backend, self._last_line)
+
+
+class OllamaRouter:
+    """여러 Ollama 서버에 채팅을 나눠 보내는 라우터 (OllamaClient와 같은 인터페이스)
+
+    서버별로 연결 상태, 설치된 모델(get_models), 진행 중인 스트림 수, 최근 생성 속도를 추적하고
+    모델이 있는 서버 중 예상 대기 시간((진행 중 + 1) / 초당 토큰)이 가장 짧은 서버로 보낸다.
+    첫 토큰 전에 연결이 실패하면(요청이 전송되지 않음) 다음 서버로 넘긴다.
+    연결에 실패했던 서버는 다른 서버가 모두 실패했을 때만 시도하며, 성공하면 다시 정상으로 본다.
+    서버가 하나면 OllamaClient와 똑같이 동작한다.
+    """
+
+    EWMA_ALPHA = 0.3
+
+    def __init__(self, urls: List[str]):
+        # 서버가 여럿이면 같은 서버에 재시도하는 대신 다른 서버로 넘긴다
+        max_retries = 0 if len(urls) > 1 else None
+        self.backends = [Backend(OllamaClient(url, max_retries=max_retries)) for url in urls]
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return self.backends[0].url
+
+    def candidates(self, model: str) -> List[Backend]:
+        """시도할 서버 순서 (정상 서버를 예상 대기 시간 순으로, 그 다음 연결 실패했던 서버)"""
+        with self._lock:
+            rates = [b.tokens_per_second for b in self.backends if b.tokens_per_second]
+            default_rate = sum(rates) / len(rates) if rates else 1.0
+
+            def expected_wait(backend):
+                return (backend.in_flight + 1) / (backend.tokens_per_second or default_rate)
+
+            # 모델 목록이 오래됐을 수 있으므로 아무 서버에도 없으면 전체를 시도
+            with_model = [b for b in self.backends if b.has_model(model)] or self.backends
+            healthy = sorted((b for b in with_model if b.healthy), key=expected_wait)
+            unhealthy = sorted((b for b in with_model if not b.healthy), key=expected_wait)
+            return healthy + unhealthy
+
+    def chat(self, model: str, messages: List[Dict], stream: bool = False,
+             options: Optional[Dict] = None) -> Dict:
+        """채팅 API 호출 (OllamaClient.chat과 같은 결과, "backend"에 선택된 서버 주소)"""
+        result = self._no_backend(model)
+        for backend in self.candidates(model):
+            self._start(backend)
+            try:
+                result = backend.client.chat(model, messages, stream=stream, options=options)
+            except BaseException:
+                # 응답 전에 취소됨 (ASGI 태스크 취소 등) - 자리만 반납
+                self._finish(backend, None)
+                raise
+            if self._settle(backend, model, result, stream):
+                break
+        return self._wrap(result)
+
+    async def achat(self, model: str, messages: List[Dict], stream: bool = False,
+                    options: Optional[Dict] = None) -> Dict:
+        """채팅 API 호출 (비동기)"""
+        result = self._no_backend(model)
+        for backend in self.candidates(model):
+            self._start(backend)
+            try:
+                result = await backend.client.achat(model, messages, stream=stream, options=options)
+            except BaseException:
+                # 응답 전에 취소됨 (ASGI 태스크 취소 등) - 자리만 반납
+                self._finish(backend, None)
+                raise
+            if self._settle(backend, model, result, stream):
+                break
+        return self._wrap(result)
+
+    def check_connection(self) -> Dict:
+        """하나라도 연결되면 연결 성공"""
+        results = [backend.client.check_connection() for backend in self.backends]
+        if any(result.get('connected') for result in results):
+            return {"connected": True, "message": "Ollama 서버 연결 성공"}
+        return results[0]
+
+    def get_models(self) -> Dict:
+        """모든 서버의 모델 목록 (이름 기준 중복 제거, 서버별 상태도 갱신)"""
+        merged = {}
+        failure = None
+        for backend in self.backends:
+            result = backend.client.get_models()
+            with self._lock:
+                backend.checked_at = time.time()
+                if result.get('success'):
+                    backend.healthy = True
+                    backend.models = {model.get('name') for model in result['models']}
+                else:
+                    backend.healthy = False
+                    backend.last_error = result.get('message')
+            if result.get('success'):
+                for model in result['models']:
+                    merged.setdefault(model.get('name'), model)
+            else:
+                failure = result
+        if not merged and failure is not None and not any(b.healthy for b in self.backends):
+            return failure
+        models = list(merged.values())
+        return {"success": True, "models": models, "count": len(models)}
+
+    def pull_model(self, model_name: str) -> Dict:
+        """모든 정상 서버에 모델 다운로드"""
+        return self._each(lambda client: client.pull_model(model_name), model_name, "다운로드")
+
+    def pull_targets(self) -> List[OllamaClient]:
+        """모델을 다운로드할 서버 (연결된 서버 전체, 서버가 하나면 항상 그 서버)"""
+        if len(self.backends) == 1:
+            return [self.backends[0].client]
+        with self._lock:
+            return [backend.client for backend in self.backends if backend.healthy]
+
+    def delete_model(self, model_name: str) -> Dict:
+        """모델이 있는 모든 서버에서 삭제"""
+        return self._each(lambda client: client.delete_model(model_name), model_name, "삭제",
+                          only_with_model=True)
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            return [backend.to_dict() for backend in self.backends]
+
+    def close(self):
+        for backend in self.backends:
+            backend.client.close()
+
+    async def aclose(self):
+        for backend in self.backends:
+            await backend.client.aclose()
+
+    def _each(self, action, model_name: str, verb: str, only_with_model: bool = False) -> Dict:
+        if len(self.backends) == 1:
+            return action(self.backends[0].client)
+        targets = [
+            b for b in self.backends
+            if b.healthy and (not only_with_model or b.has_model(model_name))
+        ]
+        failed = []
+        for backend in targets:
+            result = action(backend.client)
+            if not result.get('success'):
+                failed.append(f"{backend.url}: {result.get('message')}")
+        if not targets:
+            return {"success": False, "message": "연결된 Ollama 서버가 없습니다"}
+        if failed:
+            return {"success": False, "message": f"{verb} 실패 - " + ', '.join(failed)}
+        return {"success": True, "message": f"모델 '{model_name}' {verb} 완료 (서버 {len(targets)}대)"}
+
+    def _no_backend(self, model: str) -> Dict:
+        return {"success": False, "message": f"모델 '{model}'이 있는 Ollama 서버가 없습니다"}
+
+    def _start(self, backend: Backend):
+        with self._lock:
+            backend.in_flight += 1
+            backend.requests += 1
+
+    def _settle(self, backend: Backend, model: str, result: Dict, stream: bool) -> bool:
+        """결과 반영 - 이 결과로 끝내면 True, 다음 서버로 넘기면 False"""
+        result['backend'] = backend
+        if result.get('success'):
+            with self._lock:
+                backend.healthy = True
+            if not stream:
+                self._finish(backend, None)
+            return True
+        with self._lock:
+            backend.in_flight -= 1
+            backend.failures += 1
+            backend.last_error = result.get('message')
+            if result.get('connect_error'):
+                backend.healthy = False
+                return False
+            if result.get('status') == 404:
+                # 모델 목록이 오래됐음 - 이 서버에는 모델이 없음
+                if backend.models is not None:
+                    backend.models.discard(model)
+                return False
+        return True
+
+    def _wrap(self, result: Dict) -> Dict:
+        backend = result.pop('backend', None)
+        if backend is None:
+            return result
+        result['backend'] = backend.url
+        if result.get('success') and result.get('stream'):
+            result['response'] = _TrackedStream(result['response'], self, backend)
+        return result
+
+    def _finish(self, backend: Backend, last_line):
+        # 마지막 줄(done=true)의 eval_count/eval_duration으로 생성 속도 갱신
+        rate = None
+        if last_line:
+            try:
+                data = json.loads(last_line)
+                if data.get('done') and data.get('eval_duration'):
+                    rate = data.get('eval_count', 0) / (data['eval_duration'] / 1e9)
+            except (ValueError, TypeError, AttributeError):
+                pass
+        with self._lock:
+            backend.in_flight -= 1
+            if rate:
+                if backend.tokens_per_second is None:
+                    backend.tokens_per_second = rate
+                else:
+                    backend.tokens_per_second += self.EWMA_ALPHA * (rate - backend.tokens_per_second)
@@ -0,0 +1,163 @@
+import json
+import time
+from typing import Dict, List, Optional
+from config import Config
+
+# 스트리밍 핫 루프용 인코더 (공백 없는 구분자, 한글을 \uXXXX로 늘리지 않음)
+_frame_encoder = json.JSONEncoder(
+    ensure_ascii=False,
+    separators=(',', ':'),
+    check_circular=False
+)
+
+
+def encode_frame(data: Dict) -> str:
+    """NDJSON 한 줄로 인코딩"""
+    return _frame_encoder.encode(data) + '\n'
+
+
+def parse_metrics(chunk: Dict) -> Dict:
+    """Ollama 마지막 청크(done=true)에서 성능 메트릭 계산"""
+    metrics = {}
+
+    # 토큰 속도 계산 (tokens/sec)
+    eval_count = chunk.get('eval_count', 0)
+    eval_duration = chunk.get('eval_duration', 0)
+    if eval_count > 0 and eval_duration > 0:
+        tokens_per_sec = eval_count / (eval_duration / 1e9)
+        metrics['tokens_per_second'] = round(tokens_per_sec, 2)
+
+    # 생성 시간 (초)
+    if eval_duration > 0:
+        metrics['generation_time_sec'] = round(eval_duration / 1e9, 2)
+
+    # 프롬프트 처리 시간 (초)
+    prompt_eval_duration = chunk.get('prompt_eval_duration', 0)
+    if prompt_eval_duration > 0:
+        metrics['prompt_processing_time_sec'] = round(prompt_eval_duration / 1e9, 2)
+
+    # 모델 로드 시간 (초)
+    load_duration = chunk.get('load_duration', 0)
+    if load_duration > 0:
+        metrics['load_time_sec'] = round(load_duration / 1e9, 2)
+
+    return metrics
+
+
+class ChatStreamProcessor:
+    """Ollama 스트리밍 응답(NDJSON 라인)을 클라이언트 프레임으로 변환
+
+    동기(WSGI) / 비동기(ASGI) 스트리밍 경로가 함께 사용한다.
+    토큰은 flush_interval(초)이 지나거나 flush_max_chars만큼 쌓이면 한 프레임으로 묶어 보낸다.
+    첫 토큰은 바로 보낸다. flush_interval=0이면 토큰마다 프레임을 보낸다.
+    """
+
+    def __init__(self, model: str, conversation_id: Optional[int] = None,
+                 flush_interval: Optional[float] = None, flush_max_chars: Optional[int] = None):
+        self.model = model
+        self.conversation_id = conversation_id
+        self.flush_interval = (
+            Config.STREAM_FLUSH_INTERVAL_MS / 1000 if flush_interval is None else flush_interval
+        )
+        self.flush_max_chars = (
+            Config.STREAM_FLUSH_MAX_CHARS if flush_max_chars is None else flush_max_chars
+        )
+        self.metrics = {}
+        self.done = False
+        self.cached = False  # 응답 캐시에서 재생한 응답
+        self.cancelled = False  # 취소 요청/연결 끊김으로 생성 도중 끝남
+        self._parts: List[str] = []  # 전체 응답 (문자열 += 대신 리스트에 누적)
+        self._pending: List[str] = []  # 아직 보내지 않은 토큰
+        self._pending_chars = 0
+        self._last_flush = float('-inf')
+
+    @property
+    def full_content(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = [''.join(self._parts)]
+        return self._parts[0] if self._parts else ''
+
+    def process_line(self, line, now: Optional[float] = None) -> Optional[Dict]:
+        """Ollama 응답 한 줄 처리 - 보낼 프레임이 있으면 반환, 모으는 중이면 None"""
+        if not line:
+            return None
+        try:
+            chunk = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+
+        # Ollama 응답은 message.content 형식
+        message = chunk.get('message') or {}
+        response_text = message.get('content', '')
+        if response_text:
+            self._parts.append(response_text)
+            self._pending.append(response_text)
+            self._pending_chars += len(response_text)
+
+        # done이 true일 때 남은 토큰과 성능 메트릭을 함께 전송
+        if chunk.get('done', False):
+            self.done = True
+            self.metrics = parse_metrics(chunk)
+            response_data = self._take_pending(now, done=True)
+            if self.metrics:
+                response_data['metrics'] = self.metrics
+            return response_data
+
+        if not self._pending:
+            return None
+        now = time.monotonic() if now is None else now
+        if (now - self._last_flush >= self.flush_interval
+                or self._pending_chars >= self.flush_max_chars):
+            return self._take_pending(now)
+        return None
+
+    def flush_pending(self, now: Optional[float] = None) -> Optional[Dict]:
+        """모아둔 토큰이 있으면 프레임으로 반환 (스트림이 done 없이 끝났을 때)"""
+        if not self._pending:
+            return None
+        return self._take_pending(now)
+
+    def replay(self, content: str, metrics: Dict) -> List[Dict]:
+        """캐시된 응답을 스트리밍 프레임으로 변환 (flush_max_chars 단위로 나눔, 메트릭에 cached 표시)"""
+        self.cached = True
+        self.done = True
+        self.metrics = dict(metrics or {}, cached=True)
+        self._parts = [content]
+        size = max(1, self.flush_max_chars)
+        frames = [
+            {"success": True, "chunk": content[i:i + size], "done": False}
+            for i in range(0, len(content), size)
+        ]
+        frames.append({"success": True, "chunk": "", "done": True, "metrics": self.metrics})
+        return frames
+
+    def _take_pending(self, now: Optional[float], done: bool = False) -> Dict:
+        text = ''.join(self._pending)
+        self._pending = []
+        self._pending_chars = 0
+        self._last_flush = time.monotonic() if now is None else now
+        return {
+            "success": True,
+            "chunk": text,
+            "done": done
+        }
+
+    def final_frame(self) -> Dict:
+        """최종 응답 완료 신호
+
+        대화에 속한 응답은 서버가 저장하므로 전체 내용을 다시 보내지 않는다.
+        """
+        frame = {
+            "success": True,
+            "done": True,
+            "final": True,
+            "saved": self.conversation_id is not None,
+            "metrics": self.metrics,
+            "conversation_id": self.conversation_id,
+            "model": self.model,
+            "cached": self.cached,
+            "cancelled": self.cancelled
+        }
+        if self.conversation_id is None:
+            frame['full_content'] = self.full_content
+        return frame
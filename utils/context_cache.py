@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+class ConversationContextCache:
+    """대화별 Ollama 컨텍스트(messages 목록) LRU 캐시 (바이트 예산 기반)"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, List[Dict]]" = OrderedDict()
+        self._sizes: Dict[int, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def estimate_size(message: Dict) -> int:
+        """메시지 하나가 차지하는 대략적인 바이트 수"""
+        size = len(message.get('content') or '')
+        for image in message.get('images') or []:
+            size += len(image)
+        return size
+
+    def get(self, conversation_id: int) -> Optional[List[Dict]]:
+        """캐시된 컨텍스트 조회 (없으면 None)"""
+        with self._lock:
+            messages = self._entries.get(conversation_id)
+            if messages is None:
+                return None
+            self._entries.move_to_end(conversation_id)
+            return list(messages)
+
+    def set(self, conversation_id: int, messages: List[Dict]):
+        """컨텍스트 전체를 캐시에 저장"""
+        size = sum(self.estimate_size(msg) for msg in messages)
+        with self._lock:
+            self._remove(conversation_id)
+            if size > self.max_bytes:
+                return
+            self._entries[conversation_id] = list(messages)
+            self._sizes[conversation_id] = size
+            self._total_bytes += size
+            self._evict()
+
+    def append(self, conversation_id: int, message: Dict):
+        """캐시된 컨텍스트가 있으면 메시지를 덧붙임 (없으면 다음 조회 시 DB에서 로드)"""
+        size = self.estimate_size(message)
+        with self._lock:
+            messages = self._entries.get(conversation_id)
+            if messages is None:
+                return
+            messages.append(message)
+            self._sizes[conversation_id] += size
+            self._total_bytes += size
+            self._entries.move_to_end(conversation_id)
+            if self._sizes[conversation_id] > self.max_bytes:
+                self._remove(conversation_id)
+            self._evict()
+
+    def invalidate(self, conversation_id: int):
+        """대화 컨텍스트 캐시 제거"""
+        with self._lock:
+            self._remove(conversation_id)
+
+    def clear(self):
+        """전체 캐시 비우기"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict:
+        """캐시 사용 현황"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def _remove(self, conversation_id: int):
+        if conversation_id in self._entries:
+            del self._entries[conversation_id]
+            self._total_bytes -= self._sizes.pop(conversation_id)
+
+    def _evict(self):
+        # 가장 오래 사용하지 않은 대화부터 제거
+        while self._total_bytes > self.max_bytes and self._entries:
+            conversation_id, _ = self._entries.popitem(last=False)
+            self._total_bytes -= self._sizes.pop(conversation_id)
@@ -0,0 +1,178 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+from config import Config
+from utils.scheduler import ModelScheduler, SchedulerFull
+
+MESSAGE_OVERHEAD_TOKENS = 4  # 역할/구분 토큰
+IMAGE_TOKENS = 576  # 이미지 하나 (비전 인코더 패치 수 기준 대략값)
+
+SUMMARY_PROMPT = (
+    '다음은 사용자와 AI 어시스턴트의 이전 대화입니다. 이후 대화를 이어가는 데 필요한 사실, 결정, '
+    '요청 사항, 코드나 수치 같은 세부 정보를 빠뜨리지 말고 간결하게 요약하세요. '
+    '이전 요약이 있으면 새 내용과 합쳐 하나의 요약으로 만드세요. 요약만 출력하세요.'
+)
+SUMMARY_PREFIX = '이전 대화 요약:\n'
+
+
+def estimate_tokens(message: Dict) -> int:
+    """메시지 하나의 토큰 수 추정 (UTF-8 3바이트당 1토큰 - 영문 약 3글자, 한글 1글자)"""
+    content = message.get('content') or ''
+    return (
+        len(content.encode('utf-8')) // 3
+        + MESSAGE_OVERHEAD_TOKENS
+        + IMAGE_TOKENS * len(message.get('images') or [])
+    )
+
+
+def context_budget(model: str, options: Optional[Dict] = None) -> int:
+    """프롬프트에 쓸 토큰 예산 (모델 컨텍스트 길이 - 응답 예약분, 0이면 제한 없음)
+
+    컨텍스트 길이는 요청 options.num_ctx, CONTEXT_MODEL_TOKENS의 모델별 값, CONTEXT_MAX_TOKENS 순으로 정한다.
+    """
+    num_ctx = (options or {}).get('num_ctx')
+    if not isinstance(num_ctx, int) or num_ctx <= 0:
+        num_ctx = Config.CONTEXT_MODEL_TOKENS.get(model, Config.CONTEXT_MAX_TOKENS)
+    if num_ctx <= 0:
+        return 0
+    return max(num_ctx - Config.CONTEXT_RESPONSE_RESERVE, num_ctx // 2)
+
+
+def fit_context(messages: List[Dict], budget: int, summary: Optional[str] = None,
+                summary_count: int = 0, summary_reserve: int = 0) -> Dict:
+    """토큰 예산에 맞게 Ollama에 보낼 메시지 선택
+
+    앞쪽 system 메시지와 마지막 메시지(새 사용자 메시지)는 항상 보낸다.
+    잘라내는 위치(cut)는 예산의 절반 단위로만 앞으로 옮긴다. 그래서 대화가 길어져도 매 턴
+    프롬프트 앞부분이 바뀌지 않고 Ollama가 이전 턴의 프롬프트 처리 결과를 재사용할 수 있다.
+    summary가 있으면 system 다음 메시지 summary_count개 대신 요약을 system 메시지로 넣는다.
+
+    반환: {"messages", "cut" (잘라낸 메시지 수), "total_tokens", "sent_tokens"}
+    """
+    pinned = 0
+    while pinned < len(messages) - 1 and messages[pinned].get('role') == 'system':
+        pinned += 1
+    head, body = messages[:pinned], messages[pinned:]
+    tokens = [estimate_tokens(message) for message in body]
+    total = sum(tokens)
+    if budget <= 0:
+        return {"messages": messages, "cut": 0, "total_tokens": total, "sent_tokens": total}
+
+    available = budget - sum(estimate_tokens(message) for message in head) - summary_reserve
+    cut = 0
+    if total > available:
+        step = max(1, budget // 2)
+        target = math.ceil((total - available) / step) * step
+        dropped = 0
+        while cut < len(body) - 1 and dropped < target:
+            dropped += tokens[cut]
+            cut += 1
+        # 남기는 부분이 AI 응답으로 시작하지 않도록
+        while cut < len(body) - 1 and body[cut].get('role') == 'assistant':
+            cut += 1
+
+    prefix = []
+    if summary and 0 < summary_count <= len(body) - 1:
+        cut = max(cut, summary_count)
+        prefix = [{"role": "system", "content": SUMMARY_PREFIX + summary}]
+    selected = head + prefix + body[cut:]
+    return {
+        "messages": selected,
+        "cut": cut,
+        "total_tokens": total,
+        "sent_tokens": sum(estimate_tokens(message) for message in selected)
+    }
+
+
+class ConversationSummarizer:
+    """잘려나간 오래된 대화를 요약하는 백그라운드 작업 (대화별로 한 번에 하나)
+
+    요약 요청도 채팅과 같은 Ollama를 쓰므로 스케줄러 대기열을 거친다.
+    요약이 끝나면 on_done(conversation_id, summary, count)를 호출한다.
+    on_done의 저장이 비동기라도 같은 범위를 다시 요약하지 않도록 최근에 끝낸 범위를 기억한다.
+    """
+
+    RECENT_LIMIT = 1024
+
+    def __init__(self, client, scheduler: ModelScheduler, on_done: Callable[[int, str, int], None],
+                 max_tokens: int, model: Optional[str] = None):
+        self.client = client
+        self.scheduler = scheduler
+        self.on_done = on_done
+        self.max_tokens = max_tokens
+        self.model = model
+        self.completed = 0
+        self.failed = 0
+        self._pending = set()
+        self._recent: "OrderedDict[int, int]" = OrderedDict()  # conversation_id -> 요약한 메시지 수
+        self._lock = threading.Lock()
+
+    def submit(self, conversation_id: int, model: str, previous: Optional[str],
+               messages: List[Dict], count: int) -> bool:
+        """요약 작업 등록 (같은 대화의 작업이 진행 중이면 False)
+
+        previous: 기존 요약, messages: 기존 요약 이후 새로 요약할 메시지, count: 새 요약이 대신하는 메시지 수
+        """
+        with self._lock:
+            if conversation_id in self._pending or self._recent.get(conversation_id, 0) >= count:
+                return False
+            self._pending.add(conversation_id)
+        threading.Thread(
+            target=self._run,
+            args=(conversation_id, self.model or model, previous, messages, count),
+            name=f'summary-{conversation_id}',
+            daemon=True
+        ).start()
+        return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"running": len(self._pending), "completed": self.completed, "failed": self.failed}
+
+    def _run(self, conversation_id: int, model: str, previous: Optional[str], messages: List[Dict], count: int):
+        summary = None
+        try:
+            summary = self._summarize(model, previous, messages)
+            if summary:
+                self.on_done(conversation_id, summary, count)
+        finally:
+            with self._lock:
+                self._pending.discard(conversation_id)
+                if summary:
+                    self.completed += 1
+                    self._recent[conversation_id] = count
+                    self._recent.move_to_end(conversation_id)
+                    if len(self._recent) > self.RECENT_LIMIT:
+                        self._recent.popitem(last=False)
+                else:
+                    self.failed += 1
+
+    def _summarize(self, model: str, previous: Optional[str], messages: List[Dict]) -> Optional[str]:
+        try:
+            ticket = self.scheduler.enqueue(model)
+        except SchedulerFull:
+            return None
+        try:
+            deadline = time.monotonic() + Config.SCHEDULER_QUEUE_TIMEOUT
+            while not ticket.wait(Config.SCHEDULER_POSITION_INTERVAL):
+                self.scheduler.position(ticket)  # 기아 방지 조건 재확인
+                if time.monotonic() >= deadline:
+                    return None
+
+            lines = []
+            if previous:
+                lines.append(f'[이전 요약]\n{previous}\n')
+            for message in messages:
+                speaker = '사용자' if message.get('role') == 'user' else 'AI'
+                lines.append(f"{speaker}: {message.get('content') or ''}")
+            result = self.client.chat(model, [
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": '\n'.join(lines)}
+            ], options={"num_predict": self.max_tokens, "temperature": 0.2})
+        finally:
+            self.scheduler.release(ticket)
+        if not result.get('success'):
+            return None
+        return (result.get('message') or '').strip() or None
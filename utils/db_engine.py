@@ -0,0 +1,43 @@
+from sqlalchemy import event
+from config import Config
+
+
+def engine_options() -> dict:
+    """SQLAlchemy 엔진 옵션 (연결 풀 크기, SQLite 잠금 대기 시간)"""
+    return {
+        'pool_size': Config.DB_POOL_SIZE,
+        'max_overflow': Config.DB_MAX_OVERFLOW,
+        'pool_timeout': Config.DB_POOL_TIMEOUT,
+        'connect_args': {
+            'timeout': Config.SQLITE_BUSY_TIMEOUT_MS / 1000,
+            'check_same_thread': False
+        }
+    }
+
+
+def _sqlite_pragmas():
+    pragmas = [
+        ('journal_mode', Config.SQLITE_JOURNAL_MODE),
+        ('synchronous', Config.SQLITE_SYNCHRONOUS),
+        ('busy_timeout', Config.SQLITE_BUSY_TIMEOUT_MS),
+        ('mmap_size', Config.SQLITE_MMAP_SIZE),
+        ('cache_size', -Config.SQLITE_CACHE_SIZE_KB),  # 음수면 KiB 단위
+        ('temp_store', 'MEMORY'),
+    ]
+    return [(name, value) for name, value in pragmas if value not in (None, '')]
+
+
+def configure_sqlite(engine):
+    """새 SQLite 연결마다 PRAGMA 적용 (WAL, synchronous, mmap, busy timeout)"""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = _sqlite_pragmas()
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
@@ -1,5 +1,6 @@
 from flask import session, jsonify
 from functools import wraps
+from utils.user_cache import user_cache
 
 def login_required(f):
     """로그인이 필요한 라우트를 보호하는 데코레이터"""
@@ -10,6 +11,28 @@ def login_required(f):
         if not user_id:
             return jsonify({"success": False, "message": "로그인이 필요합니다"}), 401
 
+        # 삭제(거부)되었거나 승인이 취소된 사용자 (캐시, TTL 안에 반영)
+        user = user_cache.get(user_id)
+        if not user or not user['is_approved']:
+            session.clear()
+            return jsonify({"success": False, "message": "로그인이 필요합니다"}), 401
+
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+def admin_required(f):
+    """관리자 권한 필요 데코레이터"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({"success": False, "message": "로그인이 필요합니다"}), 401
+
+        user = user_cache.get(user_id)
+        if not user or not user['is_admin']:
+            return jsonify({"success": False, "message": "관리자 권한이 필요합니다"}), 403
+
         return f(*args, **kwargs)
 
     return decorated_function
@@ -0,0 +1,97 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from config import Config
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # 선택 의존성 - 없으면 크기만 기록하고 원본 그대로 사용
+    Image = None
+
+# Ollama 비전 모델이 그대로 받을 수 있는 형식 (그 외는 다시 인코딩)
+PASSTHROUGH_FORMATS = ('JPEG', 'PNG')
+
+
+class ImageProcessorBusy(Exception):
+    """이미지 처리 대기열이 가득 참 (잠시 후 다시 시도)"""
+
+
+def max_dimension_for(model: Optional[str]) -> int:
+    """모델에 보낼 이미지의 긴 변 최대 픽셀 (0이면 줄이지 않음)"""
+    return Config.IMAGE_MODEL_MAX_DIMENSION.get(model or '', Config.IMAGE_MAX_DIMENSION)
+
+
+class ImageProcessor:
+    """업로드 이미지 축소/재인코딩 전용 스레드 풀
+
+    디코딩과 리샘플링은 CPU를 많이 쓰므로 요청 스레드 대신 workers개의 스레드에서 실행하고,
+    대기 중인 작업은 queue_limit개로 제한해서 넘치면 ImageProcessorBusy를 발생시킨다 (Pillow는 실행 중 GIL을 놓음).
+    긴 변이 max_dimension 이하인 JPEG/PNG는 다시 인코딩하지 않고 그대로 쓴다.
+    """
+
+    def __init__(self, workers: int, queue_limit: int, jpeg_quality: int):
+        self.jpeg_quality = jpeg_quality
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-processor')
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def process(self, data: bytes, max_dimension: int) -> Tuple[bytes, Dict]:
+        """(처리한 이미지 바이트, 크기 정보) 반환 - 이미지가 아니면 ValueError"""
+        if Image is None:
+            return data, {"original_bytes": len(data), "bytes": len(data)}
+        if not self._slots.acquire(blocking=False):
+            raise ImageProcessorBusy()
+        try:
+            future = self._executor.submit(self._process, data, max_dimension)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def _process(self, data: bytes, max_dimension: int) -> Tuple[bytes, Dict]:
+        try:
+            image = Image.open(io.BytesIO(data))
+            source_format = image.format
+            original_size = image.size
+            too_large = max_dimension > 0 and max(original_size) > max_dimension
+            if not too_large and source_format in PASSTHROUGH_FORMATS:
+                image.verify()
+                output = data
+                size = original_size
+            else:
+                if too_large:
+                    image.draft('RGB', (max_dimension, max_dimension))  # JPEG는 디코딩 단계에서 축소
+                image = ImageOps.exif_transpose(image)
+                if too_large:
+                    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+                output = self._encode(image)
+                size = image.size
+        except (OSError, SyntaxError, Image.DecompressionBombError):
+            raise ValueError('잘못된 이미지 데이터입니다')
+        return output, {
+            "original_bytes": len(data),
+            "bytes": len(output),
+            "original_width": original_size[0],
+            "original_height": original_size[1],
+            "width": size[0],
+            "height": size[1]
+        }
+
+    def _encode(self, image) -> bytes:
+        # 투명 영역이 있으면 PNG, 나머지는 JPEG
+        buffer = io.BytesIO()
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            image = image.convert('RGBA')
+            if image.getextrema()[3][0] < 255:
+                image.save(buffer, format='PNG', optimize=True)
+                return buffer.getvalue()
+        image.convert('RGB').save(buffer, format='JPEG', quality=self.jpeg_quality, optimize=True)
+        return buffer.getvalue()
+
+
+image_processor = ImageProcessor(Config.IMAGE_WORKERS, Config.IMAGE_QUEUE_LIMIT, Config.IMAGE_JPEG_QUALITY)
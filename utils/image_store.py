@@ -0,0 +1,119 @@
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional
+
+IMAGE_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# 파일 시그니처 -> MIME 타입
+_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+)
+
+
+def is_image_hash(value: Optional[str]) -> bool:
+    """이미지 저장소 해시 형식인지 확인"""
+    return bool(value) and bool(IMAGE_HASH_PATTERN.match(value))
+
+
+def decode_base64(value: str) -> bytes:
+    """base64 문자열(data URL 허용)을 바이트로 변환 (잘못된 값이면 ValueError)"""
+    if value.startswith('data:') and ',' in value:
+        value = value.split(',', 1)[1]
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError('잘못된 이미지 데이터입니다')
+    if not data:
+        raise ValueError('잘못된 이미지 데이터입니다')
+    return data
+
+
+class ImageStore:
+    """SHA-256 콘텐츠 주소 기반 이미지 파일 저장소 (중복 제거)"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, image_hash: str) -> str:
+        """해시에 해당하는 파일 경로"""
+        return os.path.join(self.root, image_hash[:2], image_hash)
+
+    def exists(self, image_hash: str) -> bool:
+        return is_image_hash(image_hash) and os.path.exists(self.path(image_hash))
+
+    def save_bytes(self, data: bytes) -> str:
+        """이미지 바이트 저장 후 해시 반환 (이미 있으면 재사용)"""
+        image_hash = hashlib.sha256(data).hexdigest()
+        path = self.path(image_hash)
+        if os.path.exists(path):
+            return image_hash
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)  # 원자적 교체
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return image_hash
+
+    def save_base64(self, value: str) -> str:
+        """base64 문자열(data URL 허용) 저장 후 해시 반환
+
+        잘못된 base64면 ValueError 발생
+        """
+        return self.save_bytes(decode_base64(value))
+
+    def load_bytes(self, image_hash: str) -> Optional[bytes]:
+        if not self.exists(image_hash):
+            return None
+        with open(self.path(image_hash), 'rb') as f:
+            return f.read()
+
+    def load_base64(self, image_hash: str) -> Optional[str]:
+        data = self.load_bytes(image_hash)
+        if data is None:
+            return None
+        return base64.b64encode(data).decode('ascii')
+
+    def resolve_base64(self, value: Optional[str]) -> Optional[str]:
+        """Message.image 값을 Ollama 전송용 base64로 변환 (마이그레이션 전 값은 그대로)"""
+        if not value:
+            return None
+        if is_image_hash(value):
+            return self.load_base64(value)
+        return value
+
+    def iter_files(self):
+        """저장된 이미지 파일 (해시, 경로, os.stat 결과) - 쓰다 남은 임시 파일 포함 (해시는 None)"""
+        for prefix in os.scandir(self.root):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.is_file():
+                    name = entry.name
+                    yield (name if is_image_hash(name) else None), entry.path, entry.stat()
+
+    def mimetype(self, image_hash: str) -> str:
+        """파일 시그니처로 MIME 타입 추정"""
+        with open(self.path(image_hash), 'rb') as f:
+            header = f.read(16)
+        for signature, mimetype in _SIGNATURES:
+            if header.startswith(signature):
+                return mimetype
+        if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+            return 'image/webp'
+        return 'application/octet-stream'
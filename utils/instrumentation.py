@@ -0,0 +1,334 @@
+import functools
+import inspect
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+from flask import g, request
+from config import Config
+
+# 히스토그램 구간 상한 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STREAM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class _Child:
+    """레이블 값 조합 하나의 값 (스레드별 칸에 기록하고 조회할 때 합산)
+
+    기록하는 쪽은 자기 스레드의 리스트만 바꾸므로 잠금이 없다.
+    잠금은 스레드가 처음 기록할 때(칸 등록)와 조회할 때만 잡는다.
+    끝난 스레드의 칸은 조회 시 _retired에 합친 뒤 버린다.
+    """
+
+    FOLD_THRESHOLD = 256  # 등록된 칸이 이만큼 쌓이면 끝난 스레드 칸을 정리
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._cells: List[Tuple[threading.Thread, List[float]]] = []
+        self._retired = [0.0] * size
+        self._lock = threading.Lock()
+
+    def _cell(self) -> List[float]:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = [0.0] * self._size
+            with self._lock:
+                if len(self._cells) >= self.FOLD_THRESHOLD:
+                    self._fold_dead()
+                self._cells.append((threading.current_thread(), cell))
+            self._local.cell = cell
+            return cell
+
+    def _fold_dead(self):
+        # 잠금을 잡은 상태에서 호출
+        alive = []
+        for thread, cell in self._cells:
+            if thread.is_alive():
+                alive.append((thread, cell))
+            else:
+                for i, value in enumerate(cell):
+                    self._retired[i] += value
+        self._cells = alive
+
+    def values(self) -> List[float]:
+        with self._lock:
+            self._fold_dead()
+            totals = list(self._retired)
+            for _, cell in self._cells:
+                for i, value in enumerate(cell):
+                    totals[i] += value
+        return totals
+
+
+class CounterChild(_Child):
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount: float = 1.0):
+        self._cell()[0] += amount
+
+
+class HistogramChild(_Child):
+    def __init__(self, buckets: Sequence[float]):
+        self._buckets = buckets
+        # 구간별 개수 + (+Inf 구간) + 합계 + 개수
+        super().__init__(len(buckets) + 3)
+
+    def observe(self, value: float):
+        cell = self._cell()
+        cell[bisect_left(self._buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def time(self) -> '_Timer':
+        """with 블록 실행 시간 기록"""
+        return _Timer(self)
+
+
+class _Timer:
+    def __init__(self, child: HistogramChild):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _Metric(ABC):
+    """메트릭 하나 (이름, 설명, 레이블) - 종류별로 값 칸과 출력 형식을 정함"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], _Child] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> _Child:
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self) -> _Child:
+        """레이블 값 조합 하나의 값 칸"""
+
+    def _label_text(self, values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Prometheus 텍스트 형식 줄 목록"""
+
+
+class Counter(_Metric):
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for values, child in list(self._children.items()):
+            lines.append(f'{self.name}{self._label_text(values)} {_number(child.values()[0])}')
+        return lines
+
+
+class Histogram(_Metric):
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for values, child in list(self._children.items()):
+            totals = child.values()
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float('inf'),), totals):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _number(bound)
+                lines.append(f'{self.name}_bucket{self._label_text(values, ("le", le))} {_number(cumulative)}')
+            lines.append(f'{self.name}_sum{self._label_text(values)} {_number(totals[-2])}')
+            lines.append(f'{self.name}_count{self._label_text(values)} {_number(totals[-1])}')
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class MetricsRegistry:
+    """Prometheus 텍스트 형식으로 내보내는 카운터/히스토그램 모음
+
+    enabled=False면 init_app()이 훅을 등록하지 않고 Ollama 클라이언트 래퍼도 기록하지 않는다.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def init_app(self, app):
+        """요청 처리 시간 측정 훅 등록"""
+        if not self.enabled:
+            return
+
+        @app.before_request
+        def _start_timer():
+            g.metrics_start = time.perf_counter()
+
+        @app.after_request
+        def _observe_request(response):
+            start = g.pop('metrics_start', None)
+            if start is not None:
+                # 스트리밍 응답은 본문을 보내기 전까지 (스트림 시간은 ollama_stream_duration_seconds)
+                endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+                HTTP_REQUEST_DURATION.labels(request.method, endpoint, response.status_code).observe(
+                    time.perf_counter() - start
+                )
+            return response
+
+
+metrics = MetricsRegistry(enabled=Config.METRICS_ENABLED)
+
+HTTP_REQUEST_DURATION = metrics.histogram(
+    'http_request_duration_seconds', 'HTTP 핸들러 처리 시간', ('method', 'endpoint', 'status')
+)
+OLLAMA_REQUESTS = metrics.counter(
+    'ollama_requests_total', 'Ollama API 호출 수 (result: ok, error, connect_error)', ('backend', 'method', 'result')
+)
+OLLAMA_REQUEST_DURATION = metrics.histogram(
+    'ollama_request_duration_seconds', 'Ollama API 응답 시간 (스트리밍은 응답 헤더까지)', ('method',)
+)
+OLLAMA_TIME_TO_FIRST_TOKEN = metrics.histogram(
+    'ollama_time_to_first_token_seconds', 'Ollama 채팅 요청부터 첫 토큰까지 걸린 시간', ('model',)
+)
+OLLAMA_STREAM_DURATION = metrics.histogram(
+    'ollama_stream_duration_seconds', 'Ollama 채팅 스트림 전체 시간', ('model',), buckets=STREAM_BUCKETS
+)
+CHAT_STREAMS_CANCELLED = metrics.counter(
+    'chat_streams_cancelled_total', '중간에 끝난 채팅 스트림 수 (reason: cancel, disconnect)', ('reason',)
+)
+DB_COMMIT_DURATION = metrics.histogram(
+    'db_commit_duration_seconds', 'DB 커밋 시간 (source: write_behind, save_message)', ('source',)
+)
+
+
+class _TimedStream:
+    """스트리밍 응답 래퍼 - 첫 줄 도착 시간과 닫힐 때까지의 시간 기록"""
+
+    def __init__(self, response, model: str, start: float):
+        self._response = response
+        self._model = model
+        self._start = start
+        self._first_token = False
+        self._closed = False
+
+    def _line(self, line):
+        if line and not self._first_token:
+            self._first_token = True
+            OLLAMA_TIME_TO_FIRST_TOKEN.labels(self._model).observe(time.perf_counter() - self._start)
+
+    def iter_lines(self, **kwargs):
+        for line in self._response.iter_lines(**kwargs):
+            self._line(line)
+            yield line
+
+    async def aiter_lines(self):
+        async for line in self._response.aiter_lines():
+            self._line(line)
+            yield line
+
+    def close(self):
+        self._response.close()
+        self._finish()
+
+    async def aclose(self):
+        await self._response.aclose()
+        self._finish()
+
+    @property
+    def raw(self):
+        return self._response.raw
+
+    def _finish(self):
+        if not self._closed:
+            self._closed = True
+            OLLAMA_STREAM_DURATION.labels(self._model).observe(time.perf_counter() - self._start)
+
+
+def _record_ollama_call(client, method: str, start: float, result: Dict, args, kwargs) -> Dict:
+    OLLAMA_REQUEST_DURATION.labels(method).observe(time.perf_counter() - start)
+    if result.get('success') or result.get('connected'):
+        outcome = 'ok'
+    elif result.get('connect_error'):
+        outcome = 'connect_error'
+    else:
+        outcome = 'error'
+    OLLAMA_REQUESTS.labels(client.base_url, method, outcome).inc()
+    if result.get('success') and result.get('stream'):
+        model = kwargs.get('model', args[0] if args else '')
+        result['response'] = _TimedStream(result['response'], model, start)
+    return result
+
+
+def instrument_ollama(method):
+    """OllamaClient 메서드 래퍼 - 호출 수/결과/응답 시간 기록 (스트리밍 채팅은 첫 토큰/전체 시간도)"""
+    name = 'chat' if method.__name__ == 'achat' else method.__name__
+
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            if not metrics.enabled:
+                return await method(self, *args, **kwargs)
+            start = time.perf_counter()
+            result = await method(self, *args, **kwargs)
+            return _record_ollama_call(self, name, start, result, args, kwargs)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not metrics.enabled:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        result = method(self, *args, **kwargs)
+        return _record_ollama_call(self, name, start, result, args, kwargs)
+    return wrapper
@@ -0,0 +1,269 @@
+import math
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from models import db, Conversation, Message, MetricRollup, User
+
+# 집계하는 메트릭 (ChatStreamProcessor의 parse_metrics 결과)
+ROLLUP_METRICS = ('tokens_per_second', 'generation_time_sec', 'prompt_processing_time_sec', 'load_time_sec')
+PERCENTILES = (50, 95, 99)
+
+# 로그 스케일 히스토그램 구간 (경계 비율 1.05 -> 백분위수 상대 오차 약 2.5%)
+HIST_MIN = 0.001
+HIST_RATIO = 1.05
+_LOG_RATIO = math.log(HIST_RATIO)
+
+
+def bin_index(value: float) -> int:
+    """값이 속하는 구간 번호 (HIST_MIN 이하는 0)"""
+    if value <= HIST_MIN:
+        return 0
+    return int(math.log(value / HIST_MIN) / _LOG_RATIO) + 1
+
+
+def bin_value(index: int) -> float:
+    """구간 대표값 (구간의 기하 평균)"""
+    if index <= 0:
+        return 0.0
+    return HIST_MIN * HIST_RATIO ** (index - 0.5)
+
+
+def hour_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_keys(user_id: int, model: Optional[str], created_at: datetime):
+    """메시지 하나가 반영되는 (dimension, bucket_start, key) 목록
+
+    모델별은 시간 단위, 사용자별은 일 단위 - 사용자가 많아도 집계 행 수가 메시지 수보다 훨씬 적게 유지된다.
+    """
+    return (
+        ('model', hour_start(created_at), model or ''),
+        ('user', day_start(created_at), str(user_id))
+    )
+
+
+def _metric_values(metrics: Optional[Dict]):
+    if not metrics or metrics.get('cached'):
+        return  # 캐시 재생은 모델 성능이 아님
+    for name in ROLLUP_METRICS:
+        value = metrics.get(name)
+        if isinstance(value, (int, float)) and value >= 0:
+            yield name, value
+
+
+def record_metrics(user_id: int, model: Optional[str], metrics: Optional[Dict], created_at: datetime):
+    """메시지 하나의 메트릭을 집계 테이블에 반영 (호출 측 트랜잭션에서 실행, 캐시 재생은 제외)
+
+    쓰기 지연 큐 스레드와 요청 스레드(save_message)가 같은 집계 행을 동시에 처음 만들 수 있으므로
+    읽고 나서 넣지 않고 기본 키 충돌 시 갱신하는 INSERT 한 문장으로 반영한다.
+    """
+    keys = rollup_keys(user_id, model, created_at)
+    table = MetricRollup.__table__
+    for name, value in _metric_values(metrics):
+        index = str(bin_index(value))
+        path = f'$."{index}"'
+        for dimension, bucket, key in keys:
+            statement = insert(table).values(
+                dimension=dimension, bucket_start=bucket, key=key, metric=name,
+                count=1, total=value, min_value=value, max_value=value, histogram={index: 1}
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.dimension, table.c.bucket_start, table.c.key, table.c.metric],
+                set_={
+                    "count": table.c.count + 1,
+                    "total": table.c.total + value,
+                    "min_value": func.min(func.coalesce(table.c.min_value, value), value),
+                    "max_value": func.max(func.coalesce(table.c.max_value, value), value),
+                    # JSON 컬럼 안의 구간 개수만 SQLite JSON 함수로 증가
+                    "histogram": func.json_set(
+                        func.coalesce(table.c.histogram, '{}'), path,
+                        func.coalesce(func.json_extract(table.c.histogram, path), 0) + 1
+                    )
+                }
+            )
+            db.session.execute(statement)
+
+
+def rebuild_rollups(batch_size: int = 5000) -> int:
+    """저장된 assistant 메시지로 집계 테이블을 다시 만듦 (처리한 메시지 수 반환)
+
+    메시지를 created_at 순서로 읽으면서 하루 단위씩 메모리에서 집계해 한 번에 넣는다.
+    """
+    MetricRollup.query.delete()
+    db.session.commit()
+    processed = 0
+    last = None  # (created_at, id) 키셋 커서
+    current_day = None
+    pending: Dict[tuple, _Accumulator] = {}
+
+    def flush_pending():
+        db.session.bulk_insert_mappings(MetricRollup, [
+            accumulator.to_row(*key) for key, accumulator in pending.items()
+        ])
+        pending.clear()
+
+    while True:
+        query = db.session.query(
+            Message.id, Message.model, Message.metrics, Message.created_at, Conversation.user_id
+        ).join(Conversation, Conversation.id == Message.conversation_id).filter(
+            Message.role == 'assistant',
+            Message.metrics.isnot(None)
+        )
+        if last is not None:
+            query = query.filter(db.tuple_(Message.created_at, Message.id) > last)
+        rows = query.order_by(Message.created_at, Message.id).limit(batch_size).all()
+        if not rows:
+            break
+        for row in rows:
+            last = (row.created_at, row.id)
+            day = day_start(row.created_at)
+            if day != current_day:
+                flush_pending()
+                current_day = day
+            keys = rollup_keys(row.user_id, row.model, row.created_at)
+            for name, value in _metric_values(row.metrics):
+                for dimension, bucket, key in keys:
+                    pending.setdefault((dimension, bucket, key, name), _Accumulator()).add_value(value)
+            processed += 1
+        db.session.commit()
+    flush_pending()
+    db.session.commit()
+    return processed
+
+
+class _Accumulator:
+    """메트릭 값 또는 여러 집계 행의 히스토그램 병합"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min_value = None
+        self.max_value = None
+        self.histogram: Dict[int, int] = {}
+
+    def add_value(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+        index = bin_index(value)
+        self.histogram[index] = self.histogram.get(index, 0) + 1
+
+    def add(self, count: int, total: float, min_value: float, max_value: float, histogram: Optional[Dict]):
+        self.count += count
+        self.total += total
+        self.min_value = min_value if self.min_value is None else min(self.min_value, min_value)
+        self.max_value = max_value if self.max_value is None else max(self.max_value, max_value)
+        for key, bin_count in (histogram or {}).items():
+            index = int(key)
+            self.histogram[index] = self.histogram.get(index, 0) + bin_count
+
+    def to_row(self, dimension: str, bucket: datetime, key: str, metric: str) -> Dict:
+        return {
+            "dimension": dimension,
+            "bucket_start": bucket,
+            "key": key,
+            "metric": metric,
+            "count": self.count,
+            "total": self.total,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "histogram": {str(index): count for index, count in self.histogram.items()}
+        }
+
+    def summary(self) -> Dict:
+        result = {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "min": self.min_value,
+            "max": self.max_value
+        }
+        bins = sorted(self.histogram.items())
+        for p in PERCENTILES:
+            rank = max(1, math.ceil(p / 100 * self.count))
+            seen = 0
+            value = None
+            for index, count in bins:
+                seen += count
+                if seen >= rank:
+                    value = bin_value(index)
+                    break
+            if value is not None:
+                # 구간 대표값이 실제 최소/최대를 벗어나지 않게
+                value = round(min(max(value, self.min_value), self.max_value), 3)
+            result[f"p{p}"] = value
+        return result
+
+
+def query_analytics(group: str, since: datetime, bucket: str = 'day', model: Optional[str] = None,
+                    user_id: Optional[int] = None, metrics: Iterable[str] = ROLLUP_METRICS) -> List[Dict]:
+    """집계 테이블에서 그룹별 백분위수 계산
+
+    group: 'model', 'user', 'time' (time은 bucket='hour' 또는 'day' 단위)
+    사용자별 집계는 일 단위이고 모델 구분이 없으므로 user_id 필터는 사용자별/일별 분석에만,
+    model 필터는 모델별/시간별 분석에만 쓸 수 있다 (그 외 조합은 ValueError).
+    """
+    if user_id and (model or group == 'model' or (group == 'time' and bucket == 'hour')):
+        raise ValueError('사용자 필터는 사용자별 또는 일별 분석에만 사용할 수 있습니다')
+    if model and group == 'user':
+        raise ValueError('모델 필터는 사용자별 분석에 사용할 수 없습니다')
+
+    dimension = 'user' if group == 'user' or user_id else 'model'
+    metrics = [name for name in metrics if name in ROLLUP_METRICS]
+    query = db.session.query(
+        MetricRollup.bucket_start, MetricRollup.key, MetricRollup.metric, MetricRollup.count,
+        MetricRollup.total, MetricRollup.min_value, MetricRollup.max_value, MetricRollup.histogram
+    ).filter(
+        MetricRollup.dimension == dimension,
+        MetricRollup.bucket_start >= (hour_start(since) if dimension == 'model' else day_start(since)),
+        MetricRollup.metric.in_(metrics)
+    )
+    if model:
+        query = query.filter(MetricRollup.key == model)
+    if user_id:
+        query = query.filter(MetricRollup.key == str(user_id))
+
+    def group_key(row):
+        if group != 'time':
+            return row.key
+        moment = row.bucket_start if bucket == 'hour' else day_start(row.bucket_start)
+        return moment.isoformat()
+
+    groups: Dict = {}
+    for row in query:
+        accumulators = groups.setdefault(group_key(row), {})
+        accumulators.setdefault(row.metric, _Accumulator()).add(
+            row.count, row.total, row.min_value, row.max_value, row.histogram
+        )
+
+    usernames = {}
+    if group == 'user' and groups:
+        ids = [int(key) for key in groups]
+        usernames = {
+            str(uid): username
+            for uid, username in db.session.query(User.id, User.username).filter(User.id.in_(ids))
+        }
+
+    results = []
+    for key, accumulators in groups.items():
+        summaries = {name: accumulators[name].summary() for name in metrics if name in accumulators}
+        entry = {
+            "key": int(key) if group == 'user' else key,
+            "responses": max(summary["count"] for summary in summaries.values()),
+            "metrics": summaries
+        }
+        if group == 'user':
+            entry["username"] = usernames.get(key)
+        results.append(entry)
+
+    if group == 'time':
+        results.sort(key=lambda entry: entry["key"])
+    else:
+        results.sort(key=lambda entry: entry["responses"], reverse=True)
+    return results
@@ -0,0 +1,88 @@
+import threading
+import time
+from typing import Dict, Optional
+
+
+class ModelListCache:
+    """Ollama 모델 목록(/api/tags) 공유 캐시
+
+    /api/health와 /api/models가 같은 결과를 메모리에서 응답한다.
+    TTL이 지나면 이전 값을 그대로 반환하고 백그라운드 스레드가 갱신한다 (stale-while-revalidate).
+    """
+
+    def __init__(self, client, ttl: float, refresh_interval: float):
+        self.client = client
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self._result: Optional[Dict] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self) -> Dict:
+        """모델 목록 결과 (OllamaClient.get_models() 형식)"""
+        self._ensure_thread()
+        with self._lock:
+            result = self._result
+            age = time.monotonic() - self._fetched_at
+        if result is None:
+            return self.refresh()
+        if age > self.ttl:
+            self._wakeup.set()
+        return result
+
+    def health(self) -> Dict:
+        """연결 상태 (OllamaClient.check_connection() 형식)"""
+        result = self.get()
+        if result.get('success'):
+            return {
+                "connected": True,
+                "message": "Ollama 서버 연결 성공"
+            }
+        return {
+            "connected": False,
+            "message": result.get('message', '알 수 없는 에러')
+        }
+
+    def refresh(self) -> Dict:
+        """Ollama에서 다시 조회 (동시에 여러 요청이 와도 한 번만 조회)"""
+        requested_at = time.monotonic()
+        with self._fetch_lock:
+            with self._lock:
+                if self._result is not None and self._fetched_at >= requested_at:
+                    return self._result
+            result = self.client.get_models()
+            with self._lock:
+                self._result = result
+                self._fetched_at = time.monotonic()
+            return result
+
+    def invalidate(self):
+        """캐시 무효화 (모델 다운로드/삭제 후, 다음 조회 시 새로 가져옴)"""
+        with self._lock:
+            self._result = None
+            self._fetched_at = 0.0
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='model-list-refresh',
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        # 주기적으로(또는 TTL 만료 신호를 받으면) 갱신
+        while True:
+            self._wakeup.wait(self.refresh_interval)
+            self._wakeup.clear()
+            try:
+                self.refresh()
+            except Exception:
+                pass
@@ -1,18 +1,84 @@
+import socket
 import requests
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from urllib3.util.retry import Retry
 from typing import Optional, Dict, List
 from config import Config
+from utils.instrumentation import instrument_ollama
 
 class OllamaClient:
-    """Ollama API 클라이언트"""
+    """Ollama API 클라이언트 (keep-alive 연결 풀 사용)"""
 
-    def __init__(self, base_url: Optional[str] = None):
-        self.base_url = base_url or Config.OLLAMA_API_URL
-        self.timeout = 30
+    def __init__(self, base_url: Optional[str] = None, pool_size: Optional[int] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None, retry_backoff: Optional[float] = None):
+        self.base_url = (base_url or Config.OLLAMA_API_URL).rstrip('/')
+        self.pool_size = pool_size or Config.OLLAMA_POOL_SIZE
+        self.connect_timeout = connect_timeout or Config.OLLAMA_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or Config.OLLAMA_READ_TIMEOUT
+        self.max_retries = Config.OLLAMA_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = Config.OLLAMA_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.timeout = (self.connect_timeout, self.read_timeout)
+        self.session = self._create_session()
+        self._async_client = None
 
+    def _create_session(self) -> requests.Session:
+        """연결 풀 세션 생성 (연결 에러만 backoff 재시도, 요청이 전송된 뒤에는 재시도 안 함)"""
+        retry = Retry(
+            total=None,
+            connect=self.max_retries,
+            read=0,
+            status=0,
+            other=0,
+            redirect=0,
+            backoff_factor=self.retry_backoff,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """비동기 클라이언트 (ASGI 모드용, 처음 사용할 때 생성)"""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                # transport를 직접 넘기면 AsyncClient의 limits는 무시되므로 transport에 지정
+                transport=httpx.AsyncHTTPTransport(
+                    retries=self.max_retries,
+                    limits=httpx.Limits(
+                        max_connections=None,
+                        max_keepalive_connections=self.pool_size
+                    )
+                )
+            )
+        return self._async_client
+
+    def close(self):
+        """연결 풀 정리"""
+        self.session.close()
+
+    async def aclose(self):
+        """비동기 연결 풀 정리"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    @instrument_ollama
     def check_connection(self) -> Dict:
         """Ollama 서버 연결 확인"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/tags",
                 timeout=self.timeout
             )
@@ -37,10 +103,11 @@ class OllamaClient:
                 "message": f"에러 발생: {str(e)}"
             }
 
+    @instrument_ollama
     def get_models(self) -> Dict:
         """설치된 모델 목록 조회"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/tags",
                 timeout=self.timeout
             )
@@ -57,25 +124,35 @@ class OllamaClient:
                     "success": False,
                     "message": f"에러: {response.status_code}"
                 }
+        except requests.exceptions.ConnectionError:
+            return {
+                "success": False,
+                "message": "Ollama 서버에 연결할 수 없습니다"
+            }
         except Exception as e:
             return {
                 "success": False,
                 "message": f"모델 목록 조회 실패: {str(e)}"
             }
 
-    def chat(self, model: str, messages: List[Dict], stream: bool = False) -> Dict:
-        """채팅 API 호출 (스트리밍 지원)"""
+    @instrument_ollama
+    def chat(self, model: str, messages: List[Dict], stream: bool = False,
+             options: Optional[Dict] = None) -> Dict:
+        """채팅 API 호출 (스트리밍 지원, options는 Ollama 생성 옵션 - temperature, seed 등)"""
         try:
             payload = {
                 "model": model,
                 "messages": messages,
                 "stream": stream
             }
+            if options:
+                payload["options"] = options
 
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/chat",
                 json=payload,
-                timeout=None if stream else self.timeout * 10,  # 스트리밍은 무제한 타임아웃
+                # 스트리밍은 읽기 타임아웃 없음 (연결 타임아웃만 적용)
+                timeout=(self.connect_timeout, None if stream else self.read_timeout * 10),
                 stream=stream  # 스트리밍 모드 활성화
             )
 
@@ -96,21 +173,96 @@ class OllamaClient:
             else:
                 return {
                     "success": False,
-                    "message": f"채팅 에러: {response.status_code}"
+                    "message": f"채팅 에러: {response.status_code}",
+                    "status": response.status_code
                 }
+        except requests.exceptions.ConnectionError as e:
+            if not connect_failed(e):
+                # 요청을 보낸 뒤 연결이 끊김 - 이미 생성 중일 수 있으므로 다른 서버로 넘기지 않음
+                return {
+                    "success": False,
+                    "message": f"채팅 실패: {str(e)}"
+                }
+            # 요청이 전송되기 전 실패 (다른 서버로 넘겨도 안전)
+            return {
+                "success": False,
+                "message": "Ollama 서버에 연결할 수 없습니다",
+                "connect_error": True
+            }
         except Exception as e:
             return {
                 "success": False,
                 "message": f"채팅 실패: {str(e)}"
             }
 
+    @instrument_ollama
+    async def achat(self, model: str, messages: List[Dict], stream: bool = False,
+                    options: Optional[Dict] = None) -> Dict:
+        """채팅 API 호출 (비동기, httpx)
+
+        stream=True면 열린 httpx.Response를 반환하며 호출 측에서 aiter_lines() 후 aclose() 해야 함
+        """
+        try:
+            payload = {
+                "model": model,
+                "messages": messages,
+                "stream": stream
+            }
+            if options:
+                payload["options"] = options
+
+            request = self.async_client.build_request(
+                "POST",
+                "/api/chat",
+                json=payload,
+                timeout=httpx.Timeout(
+                    None if stream else self.read_timeout * 10,
+                    connect=self.connect_timeout
+                )
+            )
+            response = await self.async_client.send(request, stream=stream)
+
+            if response.status_code == 200:
+                if stream:
+                    return {
+                        "success": True,
+                        "stream": True,
+                        "response": response
+                    }
+                else:
+                    data = response.json()
+                    return {
+                        "success": True,
+                        "stream": False,
+                        "message": data.get('message', {}).get('content', '')
+                    }
+            else:
+                await response.aclose()
+                return {
+                    "success": False,
+                    "message": f"채팅 에러: {response.status_code}",
+                    "status": response.status_code
+                }
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            return {
+                "success": False,
+                "message": "Ollama 서버에 연결할 수 없습니다",
+                "connect_error": True
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"채팅 실패: {str(e)}"
+            }
+
+    @instrument_ollama
     def pull_model(self, model_name: str) -> Dict:
         """모델 다운로드"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/pull",
                 json={"name": model_name},
-                timeout=None  # 다운로드는 무제한 타임아웃
+                timeout=(self.connect_timeout, None)  # 다운로드는 무제한 타임아웃
             )
 
             if response.status_code == 200:
@@ -129,10 +281,52 @@ class OllamaClient:
                 "message": f"다운로드 에러: {str(e)}"
             }
 
+    @instrument_ollama
+    def pull_model_stream(self, model_name: str) -> Dict:
+        """모델 다운로드 (진행 상황 스트리밍)
+
+        성공하면 열린 requests.Response를 반환하며 호출 측에서 iter_lines()로 상태 줄
+        ({"status", "digest", "total", "completed"} 또는 {"error"})을 읽은 뒤 close() 해야 함
+        """
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/pull",
+                json={"name": model_name, "stream": True},
+                timeout=(self.connect_timeout, None),  # 다운로드/검증은 오래 걸릴 수 있음 (취소는 close())
+                stream=True
+            )
+            if response.status_code == 200:
+                return {
+                    "success": True,
+                    "response": response
+                }
+            response.close()
+            return {
+                "success": False,
+                "message": f"다운로드 실패: {response.status_code}"
+            }
+        except requests.exceptions.ConnectionError as e:
+            if not connect_failed(e):
+                return {
+                    "success": False,
+                    "message": f"다운로드 에러: {str(e)}"
+                }
+            return {
+                "success": False,
+                "message": "Ollama 서버에 연결할 수 없습니다",
+                "connect_error": True
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"다운로드 에러: {str(e)}"
+            }
+
+    @instrument_ollama
     def delete_model(self, model_name: str) -> Dict:
         """모델 삭제"""
         try:
-            response = requests.delete(
+            response = self.session.delete(
                 f"{self.base_url}/api/delete",
                 json={"name": model_name},
                 timeout=self.timeout
@@ -153,3 +347,33 @@ class OllamaClient:
                 "success": False,
                 "message": f"삭제 에러: {str(e)}"
             }
+
+
+def connect_failed(error: requests.exceptions.ConnectionError) -> bool:
+    """연결 단계에서 실패해서 요청이 전송되지 않았는지 (True면 다른 서버로 넘겨도 안전)
+
+    requests는 요청을 보낸 뒤 연결이 끊긴 경우(ProtocolError, "Connection aborted")에도
+    ConnectionError를 내므로 연결 시간 초과와 연결 생성/이름 해석 실패(NewConnectionError)만 인정한다.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, 'reason', reason)  # 재시도 후 실패면 MaxRetryError로 감싸져 있음
+    return isinstance(reason, NewConnectionError)  # NameResolutionError 포함
+
+
+def abort_response(response):
+    """다른 스레드에서 읽고 있는 스트리밍 응답(requests)을 즉시 끊음
+
+    Response.close()는 읽기를 기다리던 스레드를 깨우지 못하므로(다음 데이터가 올 때까지 대기)
+    소켓을 shutdown해서 읽던 쪽이 바로 에러로 끝나게 한다. 연결 정리는 읽던 쪽의 close()에서 한다.
+    Ollama는 연결이 끊긴 것을 보고 생성을 멈춘다.
+    """
+    connection = getattr(getattr(response, 'raw', None), 'connection', None)
+    sock = getattr(connection, 'sock', None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass  # 이미 닫힘
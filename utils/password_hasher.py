@@ -0,0 +1,82 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import bcrypt
+from config import Config
+
+
+class PasswordHasherBusy(Exception):
+    """비밀번호 해싱 대기열이 가득 참 (잠시 후 다시 시도)"""
+
+
+class PasswordHasher:
+    """bcrypt 해싱/검증 전용 스레드 풀
+
+    동시성 상한일 뿐 요청 스레드를 비워 주지는 않는다: hash()/verify()를 부른 요청 스레드는
+    결과가 나올 때까지 그대로 기다린다 (WSGI 스레드, ASGI에서는 a2wsgi 스레드).
+    bcrypt는 의도적으로 느린 연산이라 로그인이 몰리면 CPU를 전부 차지하므로
+    동시에 실행되는 연산은 workers개로, 대기 중인 연산은 queue_limit개로 제한하고
+    넘치면 기다리지 않고 바로 PasswordHasherBusy를 발생시킨다 (bcrypt는 실행 중 GIL을 놓음).
+    nice > 0이면 작업 스레드의 CPU 우선순위를 낮춰서 채팅 스트리밍이 먼저 실행되게 한다 (Linux).
+    """
+
+    def __init__(self, workers: int, queue_limit: int, rounds: int, nice: int = 0):
+        self.rounds = rounds
+        self.nice = nice
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='password-hasher',
+            initializer=self._lower_priority
+        )
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+
+    def hash(self, password: str) -> str:
+        """비밀번호 해싱 (설정된 cost factor 사용)"""
+        hashed = self._run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds))
+        return hashed.decode('utf-8')
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        """비밀번호 확인"""
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """저장된 해시의 cost factor가 설정값과 다른지 확인"""
+        return self.rounds_of(password_hash) != self.rounds
+
+    @staticmethod
+    def rounds_of(password_hash: str) -> Optional[int]:
+        """bcrypt 해시($2b$12$...)에서 cost factor 추출"""
+        parts = password_hash.split('$')
+        if len(parts) < 4 or not parts[2].isdigit():
+            return None
+        return int(parts[2])
+
+    def _lower_priority(self):
+        # Linux는 스레드별 nice 값을 지원 (다른 OS에서는 무시)
+        if self.nice <= 0:
+            return
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+        except (AttributeError, OSError):
+            pass
+
+    def _run(self, fn, *args):
+        # 호출한 스레드는 future.result()에서 블록됨 - 이벤트 루프에서 직접 부르면 안 됨
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+
+password_hasher = PasswordHasher(
+    Config.PASSWORD_HASH_WORKERS,
+    Config.PASSWORD_HASH_QUEUE_LIMIT,
+    Config.BCRYPT_ROUNDS,
+    Config.PASSWORD_HASH_NICE
+)
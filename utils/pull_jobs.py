@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+from utils.ollama_client import abort_response
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class PullJob:
+    """모델 다운로드 작업 하나 (진행 상황은 Ollama 상태 줄에서 계산)"""
+
+    def __init__(self, model: str):
+        self.id = uuid.uuid4().hex
+        self.model = model
+        self.status = 'queued'  # queued, running, success, error, cancelled
+        self.message = '대기 중'
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.version = 0  # 상태가 바뀔 때마다 증가 (스트리밍 응답이 변경을 기다림)
+        self._layers: Dict[Tuple[int, str], Tuple[int, int]] = {}  # (서버, digest) -> (total, completed)
+        self._response = None
+        self._cancelled = threading.Event()
+        self._cond = threading.Condition()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def to_dict(self) -> Dict:
+        with self._cond:
+            total = sum(total for total, _ in self._layers.values())
+            completed = sum(completed for _, completed in self._layers.values())
+            return {
+                "job_id": self.id,
+                "model": self.model,
+                "status": self.status,
+                "message": self.message,
+                "total": total,
+                "completed": completed,
+                "percent": round(completed * 100 / total, 1) if total else None,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "version": self.version
+            }
+
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        """version 이후 상태가 바뀌거나 timeout이 지날 때까지 대기 (현재 version 반환)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version or not self.active, timeout)
+            return self.version
+
+    def _update(self, status: Optional[str] = None, message: Optional[str] = None,
+                layer: Optional[Tuple[int, str]] = None, total: int = 0, completed: int = 0):
+        with self._cond:
+            if not self.active:
+                return  # 끝난 작업(취소 등)은 더 바꾸지 않음
+            if status:
+                self.status = status
+                if status not in ACTIVE_STATUSES:
+                    self.finished_at = time.time()
+            if message:
+                self.message = message
+            if layer and total:
+                self._layers[layer] = (total, completed)
+            self.version += 1
+            self._cond.notify_all()
+
+
+class PullJobRegistry:
+    """백그라운드 모델 다운로드 작업 관리
+
+    다운로드는 요청 스레드가 아니라 작업 스레드에서 Ollama /api/pull 스트림을 읽으며 진행한다.
+    같은 모델을 다운로드 중이면 새 작업을 만들지 않고 진행 중인 작업을 돌려준다.
+    끝난 작업은 retention초 동안 조회할 수 있다. 작업이 끝나면(성공/실패/취소) on_complete()를 호출한다.
+    """
+
+    def __init__(self, client, retention: float, on_complete: Optional[Callable[[], None]] = None):
+        self.client = client  # pull_targets()로 다운로드할 서버 목록을 주는 OllamaRouter
+        self.retention = retention
+        self.on_complete = on_complete
+        self._jobs: Dict[str, PullJob] = {}
+        self._lock = threading.Lock()
+
+    def start(self, model: str) -> Tuple[PullJob, bool]:
+        """다운로드 시작 - (작업, 새로 만들었는지) 반환"""
+        with self._lock:
+            self._prune()
+            for job in self._jobs.values():
+                if job.model == model and job.active:
+                    return job, False
+            job = PullJob(model)
+            self._jobs[job.id] = job
+        threading.Thread(target=self._run, args=(job,), name=f'pull-{model}', daemon=True).start()
+        return job, True
+
+    def get(self, job_id: str) -> Optional[PullJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[PullJob]:
+        with self._lock:
+            self._prune()
+            return sorted(self._jobs.values(), key=lambda job: job.started_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[PullJob]:
+        """다운로드 취소 (Ollama 연결을 끊으면 Ollama도 다운로드를 멈춤, 받은 부분은 다음에 이어받음)"""
+        job = self.get(job_id)
+        if job is None or not job.active:
+            return job
+        job._cancelled.set()
+        response = job._response
+        if response is not None:
+            # close()로는 iter_lines()에서 기다리던 작업 스레드가 다음 상태 줄까지 깨지 않으므로 소켓을 끊음
+            abort_response(response)
+        job._update('cancelled', '취소됨')
+        return job
+
+    def _prune(self):
+        # 잠금을 잡은 상태에서 호출
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if not job.active and job.finished_at and now - job.finished_at > self.retention:
+                del self._jobs[job_id]
+
+    def _run(self, job: PullJob):
+        try:
+            self._pull_all(job)
+        finally:
+            # 여러 서버 중 일부만 받았거나 취소되어도 모델 목록은 바뀌었을 수 있음
+            if self.on_complete:
+                self.on_complete()
+
+    def _pull_all(self, job: PullJob):
+        targets = self.client.pull_targets()
+        if not targets:
+            job._update('error', '연결된 Ollama 서버가 없습니다')
+            return
+        job._update('running', '다운로드 시작')
+        try:
+            for index, target in enumerate(targets):
+                error = self._pull_one(job, index, target)
+                if job.cancelled:
+                    return
+                if error:
+                    prefix = f'{target.base_url}: ' if len(targets) > 1 else ''
+                    job._update('error', prefix + error)
+                    return
+        except Exception as e:
+            job._update('error', f'다운로드 에러: {str(e)}')
+            return
+        job._update('success', f"모델 '{job.model}' 다운로드 완료")
+
+    def _pull_one(self, job: PullJob, index: int, target) -> Optional[str]:
+        """서버 하나에서 다운로드 - 실패하면 에러 메시지 반환"""
+        result = target.pull_model_stream(job.model)
+        if not result.get('success'):
+            return result.get('message')
+        response = result['response']
+        job._response = response
+        last_status = None
+        try:
+            if job.cancelled:
+                return None
+            for line in response.iter_lines():
+                if job.cancelled:
+                    return None
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get('error'):
+                    return data['error']
+                last_status = data.get('status')
+                job._update(
+                    message=data.get('status'),
+                    layer=(index, data['digest']) if data.get('digest') else None,
+                    total=data.get('total') or 0,
+                    completed=data.get('completed') or 0
+                )
+        except Exception:
+            if job.cancelled:
+                return None
+            raise
+        finally:
+            job._response = None
+            response.close()
+        if last_status != 'success' and not job.cancelled:
+            return '다운로드가 완료되지 않았습니다 (연결 끊김)'
+        return None
@@ -0,0 +1,37 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class TokenBucketLimiter:
+    """키(사용자명, IP 등)별 토큰 버킷
+
+    키마다 최대 burst개의 토큰을 가지며 분당 per_minute개씩 다시 채워진다.
+    오래 쓰이지 않은 키부터 max_keys개를 넘지 않게 정리한다.
+    """
+
+    def __init__(self, burst: int, per_minute: float, max_keys: int = 10000):
+        self.burst = burst
+        self.rate = per_minute / 60.0  # 초당 충전량
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """토큰 하나 사용 - 허용되면 0, 아니면 다시 시도할 수 있을 때까지 남은 초 반환"""
+        if self.burst <= 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated_at) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / self.rate if self.rate > 0 else float('inf')
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
@@ -0,0 +1,125 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from config import Config
+from models import db, ResponseCacheEntry
+from utils.write_behind import write_queue
+
+
+def _normalize_text(text: str) -> str:
+    return (text or '').replace('\r\n', '\n').strip()
+
+
+def response_cache_key(model: str, messages: List[Dict], options: Optional[Dict] = None) -> str:
+    """모델명 + 정규화한 메시지 + 생성 옵션의 SHA-256 (이미지는 내용 해시로 대체)"""
+    normalized = []
+    for message in messages:
+        entry = {
+            'role': message.get('role'),
+            'content': _normalize_text(message.get('content', ''))
+        }
+        images = message.get('images')
+        if images:
+            entry['images'] = [hashlib.sha256(image.encode('ascii')).hexdigest() for image in images]
+        normalized.append(entry)
+    payload = json.dumps(
+        {'model': model, 'messages': normalized, 'options': options or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """채팅 응답 캐시 (SQLite response_cache 테이블, 용량 기준 LRU)
+
+    같은 모델/메시지/옵션의 요청은 Ollama를 다시 호출하지 않고 저장된 응답을 재생한다.
+    enabled가 False면 사용하지 않으며, exclude_models에 있는 모델은 항상 제외한다.
+    조회 시각 갱신과 저장/정리는 쓰기 지연 큐에서 처리한다.
+    """
+
+    def __init__(self, enabled: bool, max_bytes: int, exclude_models: Iterable[str] = ()):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.exclude_models = set(exclude_models)
+
+    def enabled_for(self, model: str) -> bool:
+        return self.enabled and model not in self.exclude_models
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """캐시된 응답 {"content", "metrics"} 조회 (없으면 None, 앱 컨텍스트 필요)"""
+        entry = db.session.get(ResponseCacheEntry, key)
+        if entry is None:
+            return None
+        cached = {"content": entry.content, "metrics": entry.metrics or {}}
+
+        def touch():
+            ResponseCacheEntry.query.filter_by(key=key).update({
+                "last_used_at": datetime.utcnow(),
+                "hit_count": ResponseCacheEntry.hit_count + 1
+            }, synchronize_session=False)
+        write_queue.submit(touch)
+        return cached
+
+    def store(self, key: str, model: str, content: str, metrics: Optional[Dict]):
+        """응답 저장 (완료된 응답만, 용량을 넘으면 오래 안 쓴 항목부터 삭제)"""
+        size = len(content.encode('utf-8')) + len(json.dumps(metrics or {}))
+        if size > self.max_bytes:
+            return
+
+        def save():
+            db.session.merge(ResponseCacheEntry(
+                key=key,
+                model=model,
+                content=content,
+                metrics=metrics or None,
+                size=size,
+                hit_count=0,
+                last_used_at=datetime.utcnow()
+            ))
+            db.session.flush()
+            self._evict()
+        write_queue.submit(save)
+
+    def _evict(self):
+        total = db.session.query(db.func.coalesce(db.func.sum(ResponseCacheEntry.size), 0)).scalar()
+        excess = total - self.max_bytes
+        while excess > 0:
+            rows = db.session.query(ResponseCacheEntry.key, ResponseCacheEntry.size).order_by(
+                ResponseCacheEntry.last_used_at
+            ).limit(500).all()
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                victims.append(key)
+                excess -= size
+                if excess <= 0:
+                    break
+            ResponseCacheEntry.query.filter(ResponseCacheEntry.key.in_(victims)).delete(
+                synchronize_session=False
+            )
+
+    def stats(self) -> Dict:
+        entries, total, hits = db.session.query(
+            db.func.count(ResponseCacheEntry.key),
+            db.func.coalesce(db.func.sum(ResponseCacheEntry.size), 0),
+            db.func.coalesce(db.func.sum(ResponseCacheEntry.hit_count), 0)
+        ).one()
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "exclude_models": sorted(self.exclude_models)
+        }
+
+
+response_cache = ResponseCache(
+    Config.RESPONSE_CACHE_ENABLED,
+    Config.RESPONSE_CACHE_MAX_BYTES,
+    Config.RESPONSE_CACHE_EXCLUDE_MODELS
+)
@@ -0,0 +1,204 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional
+from config import Config
+
+
+class SchedulerFull(Exception):
+    """대기열이 가득 참"""
+
+
+class Ticket:
+    """채팅 요청 하나의 실행 순서표 (ModelScheduler.enqueue()가 발급)"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.released = False
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._async_waiters: List[tuple] = []  # (loop, future)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """실행 허가를 기다림 (스레드용, timeout 안에 허가되면 True)"""
+        return self._event.wait(timeout)
+
+    async def wait_async(self, timeout: Optional[float] = None) -> bool:
+        """실행 허가를 기다림 (코루틴용)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self.granted:
+                return True
+            self._async_waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self.granted
+        finally:
+            with self._lock:
+                if (loop, future) in self._async_waiters:
+                    self._async_waiters.remove((loop, future))
+
+    def _grant(self):
+        with self._lock:
+            self.granted = True
+            waiters, self._async_waiters = self._async_waiters, []
+        self._event.set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(True)
+
+
+class ModelScheduler:
+    """Ollama 앞단 채팅 요청 스케줄러 (모델별 대기열)
+
+    동시에 생성하는 요청 수를 모델별(max_per_model)/전체(max_concurrent)로 제한한다.
+    Ollama가 메모리에 올려둘 수 있는 모델 수(max_loaded_models)를 넘는 모델 전환은
+    이미 올라가 있는 모델의 요청을 먼저 처리해서 줄인다 (모델 로드/언로드 반복 방지).
+    max_wait(초)보다 오래 기다린 요청은 모델 전환이 필요해도 먼저 실행한다 (기아 방지).
+    max_concurrent <= 0이면 제한 없이 바로 실행한다.
+    """
+
+    def __init__(self, max_concurrent: int, max_per_model: int, max_loaded_models: int,
+                 max_wait: float, max_queue: int):
+        self.max_concurrent = max_concurrent
+        self.max_per_model = max_per_model
+        self.max_loaded_models = max(1, max_loaded_models)
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[Ticket]] = {}
+        self._running: Dict[str, int] = {}
+        self._resident: "OrderedDict[str, None]" = OrderedDict()  # 최근 실행한 모델 (LRU)
+        self._waiting = 0
+        self.switches = 0  # 적재되지 않은 모델로 전환한 횟수
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrent > 0
+
+    def enqueue(self, model: str) -> Ticket:
+        """대기열에 추가 (자리가 있으면 바로 허가됨, 가득 차면 SchedulerFull)"""
+        ticket = Ticket(model)
+        if not self.enabled:
+            ticket._grant()
+            return ticket
+        with self._lock:
+            if self.max_queue > 0 and self._waiting >= self.max_queue:
+                raise SchedulerFull()
+            self._queues.setdefault(model, deque()).append(ticket)
+            self._waiting += 1
+            self._dispatch()
+        return ticket
+
+    def release(self, ticket: Ticket):
+        """생성 종료 또는 대기 취소 (여러 번 호출해도 안전)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            if ticket.granted:
+                self._running[ticket.model] -= 1
+                if not self._running[ticket.model]:
+                    del self._running[ticket.model]
+            else:
+                queue = self._queues.get(ticket.model)
+                if queue and ticket in queue:
+                    queue.remove(ticket)
+                    self._waiting -= 1
+                    if not queue:
+                        del self._queues[ticket.model]
+            self._dispatch()
+
+    def position(self, ticket: Ticket) -> int:
+        """대기 순서 (같은 모델 대기열 기준, 1부터, 허가되었으면 0)
+
+        대기 중인 요청이 주기적으로 호출하므로 기아 방지 조건(max_wait)도 이때 다시 확인한다.
+        """
+        with self._lock:
+            self._dispatch()
+            if ticket.granted:
+                return 0
+            queue = self._queues.get(ticket.model)
+            return queue.index(ticket) + 1 if queue and ticket in queue else 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "running": dict(self._running),
+                "waiting": {model: len(queue) for model, queue in self._queues.items()},
+                "resident_models": list(self._resident),
+                "switches": self.switches,
+                "max_concurrent": self.max_concurrent,
+                "max_per_model": self.max_per_model,
+                "max_loaded_models": self.max_loaded_models
+            }
+
+    def _dispatch(self):
+        # 잠금을 잡은 상태에서 호출 - 자리가 있는 동안 다음 요청을 허가
+        if not self.enabled:
+            return
+        while self._waiting and sum(self._running.values()) < self.max_concurrent:
+            model = self._next_model(time.monotonic())
+            if model is None:
+                return
+            ticket = self._queues[model].popleft()
+            if not self._queues[model]:
+                del self._queues[model]
+            self._waiting -= 1
+            if model not in self._resident:
+                self.switches += 1
+            self._resident[model] = None
+            self._resident.move_to_end(model)
+            while len(self._resident) > self.max_loaded_models:
+                self._resident.popitem(last=False)
+            self._running[model] = self._running.get(model, 0) + 1
+            ticket._grant()
+
+    def _next_model(self, now: float) -> Optional[str]:
+        candidates = [
+            model for model in self._queues
+            if self._running.get(model, 0) < self.max_per_model
+        ]
+        if not candidates:
+            return None
+
+        def oldest(model):
+            return self._queues[model][0].enqueued_at
+
+        # 1. 너무 오래 기다린 요청 (기아 방지)
+        starved = [model for model in candidates if now - oldest(model) >= self.max_wait]
+        if starved:
+            return min(starved, key=oldest)
+
+        # 2. 이미 올라가 있는 모델 (모델 전환 없이 처리)
+        resident = [model for model in candidates if model in self._resident]
+        if resident:
+            return min(resident, key=oldest)
+
+        # 3. 실행 중인 모델을 내리지 않고 올릴 자리가 있을 때만 전환
+        busy_models = sum(1 for count in self._running.values() if count)
+        if busy_models < self.max_loaded_models:
+            return min(candidates, key=oldest)
+        return None
+
+
+scheduler = ModelScheduler(
+    Config.SCHEDULER_MAX_CONCURRENT,
+    Config.SCHEDULER_MAX_PER_MODEL,
+    Config.SCHEDULER_MAX_LOADED_MODELS,
+    Config.SCHEDULER_MAX_WAIT,
+    Config.SCHEDULER_MAX_QUEUE
+)
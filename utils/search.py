@@ -0,0 +1,273 @@
+import re
+from html import escape
+from typing import Dict, List
+from sqlalchemy import text
+from models import db, Conversation, ConversationArchive
+from utils.archive import index_archived_messages, load_archived_messages
+
+# snippet() 강조 표시용 제어 문자 (HTML 이스케이프 후 <mark>로 바꿈)
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+MAX_QUERY_TOKENS = 8
+
+# FTS5 인덱스 (external content - 본문은 messages/conversations 테이블에서 읽음)
+# owner 컬럼('u<user_id>')을 인덱싱해서 사용자 범위 필터링도 FTS 안에서 처리한다.
+# 한글은 조사가 붙으므로 검색어마다 접두사 검색을 쓰고, prefix 인덱스로 빠르게 처리한다.
+_FTS_SCHEMA = (
+    """
+    CREATE VIEW IF NOT EXISTS message_search_source AS
+    SELECT m.id AS id, m.content AS content, 'u' || c.user_id AS owner
+    FROM messages m JOIN conversations c ON c.id = m.conversation_id
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS message_fts USING fts5(
+        content, owner,
+        content='message_search_source', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO message_fts(rowid, content, owner)
+        SELECT new.id, new.content, 'u' || user_id FROM conversations WHERE id = new.conversation_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO message_fts(message_fts, rowid, content, owner)
+        SELECT 'delete', old.id, old.content, 'u' || user_id FROM conversations WHERE id = old.conversation_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+        INSERT INTO message_fts(message_fts, rowid, content, owner)
+        SELECT 'delete', old.id, old.content, 'u' || user_id FROM conversations WHERE id = old.conversation_id;
+        INSERT INTO message_fts(rowid, content, owner)
+        SELECT new.id, new.content, 'u' || user_id FROM conversations WHERE id = new.conversation_id;
+    END
+    """,
+    """
+    CREATE VIEW IF NOT EXISTS conversation_search_source AS
+    SELECT id, title, 'u' || user_id AS owner FROM conversations
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS conversation_fts USING fts5(
+        title, owner,
+        content='conversation_search_source', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_fts_insert AFTER INSERT ON conversations BEGIN
+        INSERT INTO conversation_fts(rowid, title, owner) VALUES (new.id, new.title, 'u' || new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_fts_delete AFTER DELETE ON conversations BEGIN
+        INSERT INTO conversation_fts(conversation_fts, rowid, title, owner)
+        VALUES ('delete', old.id, old.title, 'u' || old.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_fts_update AFTER UPDATE OF title, user_id ON conversations BEGIN
+        INSERT INTO conversation_fts(conversation_fts, rowid, title, owner)
+        VALUES ('delete', old.id, old.title, 'u' || old.user_id);
+        INSERT INTO conversation_fts(rowid, title, owner) VALUES (new.id, new.title, 'u' || new.user_id);
+    END
+    """,
+    # 보관된 메시지 색인 - 보관하면 messages 행이 지워져 message_fts에서도 빠지므로 따로 색인한다.
+    # 본문은 압축된 보관 데이터에만 두고(contentless) 메시지 정보는 archived_message_refs에 둔다.
+    """
+    CREATE TABLE IF NOT EXISTS archived_message_refs (
+        id INTEGER PRIMARY KEY,
+        conversation_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        message_id INTEGER,
+        role VARCHAR(20),
+        created_at VARCHAR(32)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_archived_message_refs_conversation ON archived_message_refs(conversation_id)
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS archived_message_fts USING fts5(
+        content, owner,
+        content='',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+)
+
+_MESSAGE_SEARCH = text("""
+    SELECT m.id, m.conversation_id, m.role, m.created_at, c.title,
+           snippet(message_fts, 0, :mark_start, :mark_end, '…', 16) AS snippet
+    FROM message_fts
+    JOIN messages m ON m.id = message_fts.rowid
+    JOIN conversations c ON c.id = m.conversation_id
+    WHERE message_fts MATCH :query AND c.is_deleted = 0
+    ORDER BY bm25(message_fts, 1.0, 0.0)
+    LIMIT :limit
+""").columns(created_at=db.DateTime)
+
+_TITLE_SEARCH = text("""
+    SELECT c.id, c.title, c.updated_at,
+           highlight(conversation_fts, 0, :mark_start, :mark_end) AS snippet
+    FROM conversation_fts
+    JOIN conversations c ON c.id = conversation_fts.rowid
+    WHERE conversation_fts MATCH :query AND c.is_deleted = 0
+    ORDER BY bm25(conversation_fts, 1.0, 0.0)
+    LIMIT :limit
+""").columns(updated_at=db.DateTime)
+
+_ARCHIVED_MESSAGE_SEARCH = text("""
+    SELECT r.message_id, r.conversation_id, r.role, r.created_at, c.title
+    FROM archived_message_fts
+    JOIN archived_message_refs r ON r.id = archived_message_fts.rowid
+    JOIN conversations c ON c.id = r.conversation_id
+    WHERE archived_message_fts MATCH :query AND c.is_deleted = 0 AND c.is_archived = 1
+    ORDER BY bm25(archived_message_fts, 1.0, 0.0)
+    LIMIT :limit
+""")
+
+
+def ensure_search_index():
+    """FTS5 검색 인덱스와 동기화 트리거 생성 (처음 만들 때 기존 데이터 색인)"""
+    if db.engine.dialect.name != 'sqlite':
+        return
+    with db.engine.begin() as conn:
+        existing = {
+            row[0] for row in conn.execute(text(
+                "SELECT name FROM sqlite_master "
+                "WHERE name IN ('message_fts', 'conversation_fts', 'archived_message_fts')"
+            ))
+        }
+        for statement in _FTS_SCHEMA:
+            conn.execute(text(statement))
+        if 'message_fts' not in existing:
+            conn.execute(text("INSERT INTO message_fts(message_fts) VALUES ('rebuild')"))
+        if 'conversation_fts' not in existing:
+            conn.execute(text("INSERT INTO conversation_fts(conversation_fts) VALUES ('rebuild')"))
+    if 'archived_message_fts' not in existing:
+        # 색인이 생기기 전에 보관된 대화
+        archives = db.session.query(ConversationArchive, Conversation.user_id).join(
+            Conversation, Conversation.id == ConversationArchive.conversation_id
+        )
+        for archive, user_id in archives:
+            index_archived_messages(archive.conversation_id, user_id, load_archived_messages(archive))
+        db.session.commit()
+
+
+def optimize_search_index():
+    """FTS5 인덱스 세그먼트를 하나로 병합 (대량 삭제/보관 뒤 검색 속도와 크기 회복)"""
+    if db.engine.dialect.name != 'sqlite':
+        return
+    with db.engine.begin() as conn:
+        conn.execute(text("INSERT INTO message_fts(message_fts) VALUES ('optimize')"))
+        conn.execute(text("INSERT INTO conversation_fts(conversation_fts) VALUES ('optimize')"))
+        conn.execute(text("INSERT INTO archived_message_fts(archived_message_fts) VALUES ('optimize')"))
+
+
+def build_match_query(query: str, user_id: int, column: str) -> str:
+    """사용자 입력을 FTS5 MATCH 식으로 변환 (연산자 문법은 쓰지 않고 단어별 접두사 AND 검색)
+
+    검색할 단어가 없으면 빈 문자열 반환
+    """
+    tokens = _TOKEN_PATTERN.findall(query)[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return ''
+    terms = ' '.join(f'"{token}"*' for token in tokens)
+    return f'owner : u{int(user_id)} AND {column} : ({terms})'
+
+
+def _render_snippet(value: str) -> str:
+    return escape(value or '').replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+def _archived_snippet(content: str, tokens: List[str], size: int = 16) -> str:
+    """보관된 메시지의 스니펫 (FTS5 snippet()처럼 첫 일치 단어 주변 size단어, 일치한 단어는 <mark>)"""
+    prefixes = tuple(token.lower() for token in tokens)
+    words = list(_TOKEN_PATTERN.finditer(content or ''))
+    hits = [i for i, word in enumerate(words) if word.group().lower().startswith(prefixes)]
+    if not hits:
+        return escape((content or '')[:100])
+    start = max(0, min(hits[0] - 2, len(words) - size))
+    end = min(len(words), start + size)
+    parts = ['…'] if start > 0 else []
+    position = words[start].start()
+    for i in range(start, end):
+        word = words[i]
+        parts.append(escape(content[position:word.start()]))
+        if i in hits:
+            parts.append(f'<mark>{escape(word.group())}</mark>')
+        else:
+            parts.append(escape(word.group()))
+        position = word.end()
+    if end < len(words):
+        parts.append('…')
+    return ''.join(parts)
+
+
+def _search_archived(user_id: int, query: str, limit: int) -> List[Dict]:
+    """보관된 대화의 메시지 검색 (스니펫은 일치한 대화의 보관 데이터를 풀어서 만듦)"""
+    message_query = build_match_query(query, user_id, 'content')
+    rows = db.session.execute(_ARCHIVED_MESSAGE_SEARCH, {'query': message_query, 'limit': limit}).all()
+    if not rows:
+        return []
+    contents = {}
+    archives = ConversationArchive.query.filter(
+        ConversationArchive.conversation_id.in_({row.conversation_id for row in rows})
+    )
+    for archive in archives:
+        for message in load_archived_messages(archive):
+            contents[(archive.conversation_id, message['id'])] = message['content']
+    tokens = _TOKEN_PATTERN.findall(query)[:MAX_QUERY_TOKENS]
+    return [{
+        'type': 'message',
+        'conversation_id': row.conversation_id,
+        'title': row.title,
+        'message_id': row.message_id,
+        'role': row.role,
+        'snippet': _archived_snippet(contents.get((row.conversation_id, row.message_id), ''), tokens),
+        'created_at': row.created_at
+    } for row in rows]
+
+
+def search_conversations(user_id: int, query: str, limit: int = 20) -> List[Dict]:
+    """사용자 대화 검색 (제목 일치 먼저, 다음 메시지 본문, 남는 자리에 보관된 메시지 - 각각 관련도 순)
+
+    snippet은 HTML 이스케이프된 문자열이며 일치한 부분만 <mark>로 감싼다.
+    """
+    params = {'mark_start': _MARK_START, 'mark_end': _MARK_END, 'limit': limit}
+    results = []
+
+    title_query = build_match_query(query, user_id, 'title')
+    if not title_query:
+        return results
+    for row in db.session.execute(_TITLE_SEARCH, {**params, 'query': title_query}):
+        results.append({
+            'type': 'title',
+            'conversation_id': row.id,
+            'title': row.title,
+            'message_id': None,
+            'role': None,
+            'snippet': _render_snippet(row.snippet),
+            'created_at': row.updated_at.isoformat()
+        })
+
+    message_query = build_match_query(query, user_id, 'content')
+    for row in db.session.execute(_MESSAGE_SEARCH, {**params, 'query': message_query}):
+        results.append({
+            'type': 'message',
+            'conversation_id': row.conversation_id,
+            'title': row.title,
+            'message_id': row.id,
+            'role': row.role,
+            'snippet': _render_snippet(row.snippet),
+            'created_at': row.created_at.isoformat()
+        })
+    found = sum(1 for result in results if result['type'] == 'message')
+    if found < limit:
+        results.extend(_search_archived(user_id, query, limit - found))
+    return results
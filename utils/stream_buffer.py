@@ -0,0 +1,174 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+from utils.chat_stream import encode_frame
+
+SSE_RETRY = 'retry: 1000\n\n'  # EventSource 재연결 간격 (ms)
+SSE_KEEPALIVE = ': keep-alive\n\n'
+RESUME_GAP_FRAME = {
+    "success": False,
+    "resume_failed": True,
+    "message": "이어 받을 수 있는 범위를 벗어났습니다. 대화를 다시 불러와주세요"
+}
+
+
+class ResumeGap(Exception):
+    """요청한 위치의 프레임이 이미 버퍼에서 밀려남"""
+
+
+def sse_event(seq: int, frame: str) -> str:
+    """NDJSON 프레임 한 줄을 SSE 이벤트로 (id는 순번)"""
+    return f'id: {seq}\ndata: {frame.rstrip()}\n\n'
+
+
+def parse_last_event_id(value: Optional[str]) -> int:
+    """Last-Event-ID 값 (없거나 잘못되면 0 - 처음부터)"""
+    try:
+        return max(0, int(value or 0))
+    except ValueError:
+        return 0
+
+
+class StreamBuffer:
+    """생성 하나의 프레임을 순번과 함께 보관하는 링 버퍼 (최근 capacity개)
+
+    생성 쪽(스레드/태스크)이 append()하고, 클라이언트 연결마다 read()/wait()로 순번 뒤의 프레임을 읽는다.
+    연결이 끊겨도 생성은 계속되며 재연결한 클라이언트는 Last-Event-ID 다음 프레임부터 받는다.
+    읽는 연결이 하나도 없는 상태가 abandon_timeout초 이어지면 on_abandoned()를 호출한다 (생성 중지용).
+    """
+
+    def __init__(self, capacity: int, abandon_timeout: float = 0.0,
+                 on_abandoned: Optional[Callable[[], None]] = None):
+        self._frames: Deque[Tuple[int, str]] = deque(maxlen=max(1, capacity))
+        self.last_seq = 0
+        self.closed = False
+        self.readers = 0
+        self.abandon_timeout = abandon_timeout
+        self.on_abandoned = on_abandoned
+        self._cond = threading.Condition()
+        self._async_waiters: List[tuple] = []  # (loop, future)
+
+    def append(self, frame: str) -> int:
+        with self._cond:
+            self.last_seq += 1
+            self._frames.append((self.last_seq, frame))
+            seq = self.last_seq
+            self._notify()
+        return seq
+
+    def close(self):
+        """생성 끝 (더 이상 프레임이 추가되지 않음)"""
+        with self._cond:
+            self.closed = True
+            self._notify()
+
+    def _notify(self):
+        # _cond를 잡은 상태에서 호출
+        self._cond.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def read(self, after: int) -> Tuple[List[Tuple[int, str]], bool]:
+        """순번 after 다음 프레임 목록과 생성이 끝났는지 반환 (밀려난 범위면 ResumeGap)"""
+        with self._cond:
+            if self._frames and after < self._frames[0][0] - 1:
+                raise ResumeGap()
+            frames = []
+            for item in reversed(self._frames):  # 보통 끝부분 몇 개만 새 프레임
+                if item[0] <= after:
+                    break
+                frames.append(item)
+            frames.reverse()
+            return frames, self.closed
+
+    def wait(self, after: int, timeout: Optional[float] = None) -> bool:
+        """after 뒤 프레임이 생기거나 생성이 끝날 때까지 대기 (스레드용, timeout 안에 생기면 True)"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.last_seq > after or self.closed, timeout)
+
+    async def wait_async(self, after: int, timeout: Optional[float] = None) -> bool:
+        """wait()의 코루틴 버전"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._cond:
+            if self.last_seq > after or self.closed:
+                return True
+            self._async_waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._cond:
+                if (loop, future) in self._async_waiters:
+                    self._async_waiters.remove((loop, future))
+
+    def attach(self):
+        """읽는 연결 등록 - 응답을 만들 때 호출하고 응답이 닫힐 때 detach() (본문을 읽기 전에 끊겨도 짝이 맞도록)"""
+        with self._cond:
+            self.readers += 1
+
+    def detach(self):
+        """읽던 연결이 끝남 - 남은 연결이 없으면 abandon_timeout 뒤 재연결 여부 확인"""
+        with self._cond:
+            self.readers -= 1
+            idle = self.readers == 0 and not self.closed
+        if idle and self.on_abandoned is not None:
+            timer = threading.Timer(self.abandon_timeout, self._check_abandoned)
+            timer.daemon = True
+            timer.start()
+
+    def _check_abandoned(self):
+        with self._cond:
+            abandoned = self.readers == 0 and not self.closed
+        if abandoned:
+            self.on_abandoned()
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(True)
+
+
+def _take(buffer: StreamBuffer, after: int):
+    """(보낼 SSE 텍스트, 마지막 순번, 끝났는지) - 밀려난 범위면 에러 이벤트 후 끝"""
+    try:
+        frames, closed = buffer.read(after)
+    except ResumeGap:
+        return 'data: ' + encode_frame(RESUME_GAP_FRAME) + '\n', after, True
+    if frames:
+        after = frames[-1][0]
+    return ''.join(sse_event(seq, frame) for seq, frame in frames), after, closed
+
+
+def iter_events(buffer: StreamBuffer, after: int, keepalive: float):
+    """순번 after 다음 프레임부터 SSE로 보냄 (WSGI용, 생성이 끝나고 다 보내면 종료)
+
+    새 프레임이 없으면 keepalive초마다 주석을 보내 프록시가 연결을 끊지 않게 한다.
+    읽는 연결 등록(attach/detach)은 호출 측에서 한다.
+    """
+    yield SSE_RETRY
+    while True:
+        text, after, finished = _take(buffer, after)
+        if text:
+            yield text
+        if finished:
+            return
+        if not text and not buffer.wait(after, keepalive):
+            yield SSE_KEEPALIVE
+
+
+async def aiter_events(buffer: StreamBuffer, after: int, keepalive: float):
+    """iter_events()의 비동기 버전 (ASGI용)"""
+    yield SSE_RETRY
+    while True:
+        text, after, finished = _take(buffer, after)
+        if text:
+            yield text
+        if finished:
+            return
+        if not text and not await buffer.wait_async(after, keepalive):
+            yield SSE_KEEPALIVE
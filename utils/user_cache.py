@@ -0,0 +1,63 @@
+import threading
+import time
+from typing import Dict, Optional
+from config import Config
+from models import db, User
+
+
+class UserPrincipalCache:
+    """사용자 권한 정보 캐시 (user_id -> User.to_dict())
+
+    로그인/관리자 확인마다 DB를 조회하지 않도록 메모리에 보관한다.
+    승인/거부 시 invalidate()로 바로 반영하고, 다른 프로세스에서 바뀐 내용도 TTL(초) 안에 반영된다.
+    없는 사용자(삭제됨)도 None으로 캐시한다. 앱 컨텍스트 안에서 사용.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[int, tuple] = {}  # user_id -> (principal, expires_at)
+        self._lock = threading.Lock()
+        self._generation = 0  # invalidate() 횟수 (조회 중 무효화된 값을 저장하지 않도록)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        """사용자 정보 조회 (없는 사용자면 None)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generation
+
+        user = db.session.get(User, user_id)
+        principal = user.to_dict() if user else None
+        with self._lock:
+            if generation == self._generation:
+                self._entries[user_id] = (principal, time.monotonic() + self.ttl)
+        return principal
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """사용자 캐시 삭제 (user_id가 없으면 전체)"""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None
+            }
+
+
+user_cache = UserPrincipalCache(Config.USER_CACHE_TTL)
@@ -0,0 +1,92 @@
+import atexit
+import queue
+import threading
+import time
+from typing import Callable, Optional
+from models import db
+from utils.instrumentation import DB_COMMIT_DURATION
+
+
+class WriteBehindQueue:
+    """DB 쓰기 지연 큐
+
+    스트리밍 경로에서 커밋을 분리한다. 작업(db.session에 객체를 추가하는 함수)을
+    백그라운드 스레드가 모아서 한 번에 커밋하며, 제출 순서(FIFO)대로 실행된다.
+    """
+
+    def __init__(self, batch_size: int = 50, flush_interval: float = 0.05):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.app = None
+        self._queue: "queue.Queue[Callable[[], None]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """앱 등록 및 백그라운드 스레드 시작"""
+        self.batch_size = app.config.get('WRITE_BEHIND_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('WRITE_BEHIND_FLUSH_INTERVAL', self.flush_interval)
+        with self._lock:
+            self.app = app
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def submit(self, task: Callable[[], None]):
+        """쓰기 작업 등록 (앱 컨텍스트 안에서 실행되며 커밋은 큐가 처리)"""
+        self._queue.put(task)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """지금까지 등록된 작업이 커밋될 때까지 대기"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        # flush() 대기 신호는 커밋이 끝난 뒤에 알림
+        markers = [item for item in batch if isinstance(item, threading.Event)]
+        batch = [item for item in batch if not isinstance(item, threading.Event)]
+        try:
+            if batch:
+                self._execute(batch)
+        finally:
+            for marker in markers:
+                marker.set()
+
+    def _execute(self, batch):
+        with self.app.app_context():
+            try:
+                for task in batch:
+                    task()
+                with DB_COMMIT_DURATION.labels('write_behind').time():
+                    db.session.commit()
+            except Exception:
+                # 배치 실패 시 작업별로 다시 시도해서 문제 있는 작업만 버림
+                db.session.rollback()
+                for task in batch:
+                    try:
+                        task()
+                        db.session.commit()
+                    except Exception:
+                        db.session.rollback()
+                        self.app.logger.exception('write-behind 작업 실패')
+
+
+write_queue = WriteBehindQueue()